@@ -0,0 +1,1237 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for convert_jlpt_to_spanish.py
+Runs offline against the bundled vocabulary files and synthetic corpora;
+results are written to a JSON file that later runs can be compared with:
+
+    python benchmark_converter.py suite --results baseline.json
+    python benchmark_converter.py suite --baseline baseline.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional
+
+import checkpoint
+import columnar
+import convert_jlpt_to_spanish as converter
+import http_cache
+import kanji_index
+import load_test_service
+import merge_datasets
+import mock_servers
+import paged_fetch
+import quiz_distractors
+import search_index
+import sqlite_export
+import transliterate
+
+CORPUS_FILE = "vocabulario-jlpt-4000.json"
+RESULTS_FILE = "benchmark-results.json"
+
+def legacy_translate_english_to_spanish(english_text: str) -> str:
+    """Reference copy of the old translator: table rebuilt per call, one replace() per phrase"""
+    translations = dict(converter.WORD_TRANSLATIONS)
+
+    if not english_text:
+        return ""
+
+    text = english_text.lower().strip()
+    if text in translations:
+        return translations[text]
+
+    words = text.split()
+    translated_words = []
+    for word in words:
+        if word in translations:
+            translated_words.append(translations[word])
+        else:
+            translated_words.append(word)
+
+    result = " ".join(translated_words)
+    for phrase, replacement in converter.PHRASE_TRANSLATIONS:
+        result = result.replace(phrase, replacement)
+    return result
+
+def legacy_select_words_by_level(words: List[Dict[str, Any]],
+                                 target: int = converter.TARGET_WORDS) -> List[Dict[str, Any]]:
+    """Reference copy of the old selection: top-up recounts selected words per level"""
+    convert = converter.convert_jlpt_level
+    selected_words = []
+    words_by_level = {}
+    for word in words:
+        words_by_level.setdefault(convert(word.get('level', 5)), []).append(word)
+
+    for level, target_count in converter.LEVEL_DISTRIBUTION.items():
+        level_words = words_by_level.get(level, [])
+        selected_words.extend(level_words[:min(len(level_words), target_count)])
+
+    if len(selected_words) < target:
+        remaining_needed = target - len(selected_words)
+        for level in ["N5", "N4", "N3", "N2", "N1"]:
+            level_words = words_by_level.get(level, [])
+            already_selected = len([w for w in selected_words if convert(w.get('level', 5)) == level])
+            available_more = min(len(level_words) - already_selected, remaining_needed)
+            if available_more > 0:
+                selected_words.extend(level_words[already_selected:already_selected + available_more])
+                remaining_needed -= available_more
+                if remaining_needed <= 0:
+                    break
+    return selected_words
+
+def legacy_determine_word_type(japanese_word: str, meaning: str) -> str:
+    """Reference copy of the old classifier: one re.search per pattern"""
+    japanese_lower = japanese_word.lower()
+    for pattern in converter.WORD_TYPE_PATTERNS["verbo"]:
+        if re.search(pattern, japanese_lower):
+            return "verbo"
+    for pattern in converter.WORD_TYPE_PATTERNS["adjetivo"]:
+        if re.search(pattern, japanese_lower):
+            return "adjetivo"
+    return "sustantivo"
+
+def load_translation_inputs(path: str = CORPUS_FILE) -> List[str]:
+    """
+    English-ish inputs taken from the corpus
+    Untranslated glosses survive verbatim in the español field, so every gloss
+    is used, plus the table keys and phrases themselves
+    """
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+
+    inputs = []
+    for word in data['words']:
+        inputs.extend(word['español'])
+        inputs.append(word['romaji'])
+    inputs.extend(converter.WORD_TRANSLATIONS)
+    inputs.extend(phrase for phrase, _ in converter.PHRASE_TRANSLATIONS)
+    inputs.extend(f"{a} {b}" for a, b in zip(inputs[::7], inputs[3::11]))
+    return inputs
+
+def measure(func: Callable[[str], str], inputs: List[str], repeat: int = 5) -> float:
+    """Best-of-N words per second for func over inputs"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for text in inputs:
+            func(text)
+        best = min(best, time.perf_counter() - start)
+    return len(inputs) / best
+
+def bench_translate() -> Dict[str, float]:
+    """Compare the compiled Translator with the legacy implementation"""
+    inputs = load_translation_inputs()
+
+    mismatches = [
+        text for text in inputs
+        if legacy_translate_english_to_spanish(text) != converter.translate_english_to_spanish(text)
+    ]
+    before = measure(legacy_translate_english_to_spanish, inputs)
+    after = measure(converter.translate_english_to_spanish, inputs)
+
+    print(f"translate: {len(inputs)} inputs, {len(mismatches)} differ from legacy output")
+    for text in mismatches[:10]:
+        print(f"  {text!r}: {legacy_translate_english_to_spanish(text)!r}"
+              f" -> {converter.translate_english_to_spanish(text)!r}")
+    print(f"  before: {before:,.0f} words/s")
+    print(f"  after:  {after:,.0f} words/s ({after / before:.1f}x)")
+    return {"inputs": len(inputs), "mismatches": len(mismatches), "before": before, "after": after}
+
+def write_source_fixture(path: str, copies: int, corpus: str = CORPUS_FILE):
+    """Write an API-shaped word list made of `copies` copies of the corpus"""
+    with open(corpus, encoding='utf-8') as f:
+        words = json.load(f)['words']
+    records = [
+        {"word": w['kanji'], "furigana": w['kana'], "romaji": w['romaji'],
+         "meaning": w['español'][0], "level": int(w['level'][1])}
+        for w in words
+    ]
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("[")
+        for i in range(copies):
+            for j, record in enumerate(records):
+                f.write(("," if i or j else "") + json.dumps(record, ensure_ascii=False))
+        f.write("]")
+
+def run_converter_quietly(argv: List[str]) -> Dict[str, Any]:
+    """Run converter.main with stdout suppressed, measuring time and peak traced memory"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        converter.main(argv)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"seconds": elapsed, "peak_bytes": peak}
+
+def bench_stream() -> Dict[str, Any]:
+    """Peak memory of the in-memory and streaming pipelines as the source grows"""
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "source.json")
+        for copies in (1, 5, 25):
+            write_source_fixture(source, copies)
+            size = os.path.getsize(source)
+            row = {}
+            for mode, extra in (("full", []), ("stream", ["--stream"])):
+                output = os.path.join(tmp, f"{mode}.json")
+                row[mode] = run_converter_quietly(["--source", source, "--output", output] + extra)
+            same = open(os.path.join(tmp, "full.json"), 'rb').read() == open(os.path.join(tmp, "stream.json"), 'rb').read()
+            print(f"stream: source {size / 1e6:.1f} MB, identical output: {same}")
+            for mode, stats in row.items():
+                print(f"  {mode:6s} {stats['seconds']:.2f}s, peak {stats['peak_bytes'] / 1e6:.1f} MB")
+            results[copies] = row
+    return results
+
+def load_source_records(copies: int = 1, corpus: str = CORPUS_FILE) -> List[Dict[str, Any]]:
+    """API-shaped records made of `copies` copies of the corpus"""
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "source.json")
+        write_source_fixture(source, copies, corpus)
+        with open(source, encoding='utf-8') as f:
+            return json.load(f)
+
+def bench_workers() -> Dict[int, float]:
+    """Scaling of process_words over 1, 2, 4 and 8 worker processes"""
+    words = load_source_records(copies=20)
+    results = {}
+    baseline = None
+    print(f"workers: {len(words)} words, {os.cpu_count()} CPUs")
+    for workers in (1, 2, 4, 8):
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            output = list(converter.process_words(words, workers=workers))
+        elapsed = time.perf_counter() - start
+        if baseline is None:
+            baseline = output
+        results[workers] = len(words) / elapsed
+        print(f"  {workers} workers: {results[workers]:,.0f} words/s"
+              f" ({results[workers] / results[1]:.2f}x), identical: {output == baseline}")
+    return results
+
+def bench_select() -> Dict[str, float]:
+    """Selection time on 100k words, with N5 short so the top-up phase runs"""
+    rng = random.Random(0)
+    words = load_source_records(copies=32)
+    words = [w for w in words if w['level'] != 5] + [w for w in words if w['level'] == 5][:300]
+    rng.shuffle(words)
+    words = words[:100000]
+
+    def timed(func: Callable[[], List[Dict[str, Any]]]) -> float:
+        best = float('inf')
+        for _ in range(5):
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                func()
+            best = min(best, time.perf_counter() - start)
+        return best * 1000
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        same = legacy_select_words_by_level(words) == converter.select_words_by_level(words)
+    results = {"legacy": timed(lambda: legacy_select_words_by_level(words))}
+    for distribution in ("fixed", "proportional", "weighted"):
+        for sample in ("first", "random"):
+            results[f"{distribution}/{sample}"] = timed(lambda: converter.select_words_by_level(
+                words, distribution=distribution, sample=sample, seed=1))
+
+    # The old top-up rescan grows with the number of selected words
+    for target in (20000, 60000):
+        results[f"legacy target={target}"] = timed(lambda: legacy_select_words_by_level(words, target))
+        results[f"fixed target={target}"] = timed(lambda: converter.select_words_by_level(words, target=target))
+
+    print(f"select: {len(words)} words, identical to legacy: {same}")
+    for name, ms in results.items():
+        print(f"  {name:22s} {ms:7.1f} ms")
+    return results
+
+def bench_classify() -> Dict[str, Any]:
+    """Suffix-table classifier vs the old regex loop on the bundled corpus"""
+    with open(CORPUS_FILE, encoding='utf-8') as f:
+        words = json.load(f)['words']
+    # The corpus keeps no English; "to X" glosses survive as "a X" after translation
+    glosses = ["to " + w['español'][0][2:] if w['español'][0].startswith("a ") else w['español'][0]
+               for w in words]
+    pairs = [(w['kanji'], gloss) for w, gloss in zip(words, glosses)]
+    labels = [w['type'] for w in words]
+
+    legacy = [legacy_determine_word_type(kanji, gloss) for kanji, gloss in pairs]
+    classifier = converter.WordTypeClassifier()
+    gloss_classifier = converter.WordTypeClassifier(use_gloss=True)
+    current = classifier.classify_many(pairs)
+    with_gloss = gloss_classifier.classify_many(pairs)
+
+    def rate(func: Callable[[], Any]) -> float:
+        best = float('inf')
+        for _ in range(5):
+            start = time.perf_counter()
+            func()
+            best = min(best, time.perf_counter() - start)
+        return len(pairs) / best
+
+    results = {
+        "legacy": rate(lambda: [legacy_determine_word_type(k, g) for k, g in pairs]),
+        "classify": rate(lambda: [classifier.classify(k, g) for k, g in pairs]),
+        "classify_many": rate(lambda: classifier.classify_many(pairs)),
+        "classify_many+gloss": rate(lambda: gloss_classifier.classify_many(pairs)),
+    }
+    agree = sum(a == b for a, b in zip(legacy, current))
+    changed = [(pair, old, new) for pair, old, new in zip(pairs, current, with_gloss) if old != new]
+
+    print(f"classify: {len(pairs)} words")
+    print(f"  suffix table agrees with legacy: {agree}/{len(pairs)},"
+          f" with corpus labels: {sum(a == b for a, b in zip(labels, current))}/{len(pairs)}")
+    print(f"  gloss mode changes {len(changed)} words, e.g.")
+    for (kanji, gloss), old, new in changed[:8]:
+        print(f"    {kanji} ({gloss}): {old} -> {new}")
+    for name, value in results.items():
+        print(f"  {name:20s} {value:12,.0f} words/s")
+    results.update({"agree": agree, "gloss_changes": len(changed)})
+    return results
+
+def bench_search() -> Dict[str, Any]:
+    """Index lookups vs the browser's linear scan, per query"""
+    results = {}
+    queries = ["a", "ca", "dia", "man", "estudiante", "がく", "学", "sei", "tabe", "xyz"]
+    for dataset, partitions in (("vocabulario-jlpt-4000.json", [None, "N5", "N3"]),
+                                ("vocabulario-uchinaguchi.json", [None])):
+        with tempfile.TemporaryDirectory() as tmp:
+            start = time.perf_counter()
+            index_path = search_index.build_index_for_file(dataset, os.path.join(tmp, "index.json"))
+            build_ms = (time.perf_counter() - start) * 1000
+            size = os.path.getsize(index_path)
+            index = search_index.SearchIndex.load(index_path, dataset)
+        words = index.words
+        key = "level" if "level" in words[0] else "category"
+
+        def linear(term: str, partition: Optional[str]) -> List[int]:
+            # What filterAndDisplayVocabulary does: lowercase includes on every field
+            term = term.lower().strip()
+            return [i for i, w in enumerate(words)
+                    if (partition is None or w.get(key) == partition)
+                    and any(term in v.lower() for f in index.fields
+                            for v in (w[f] if isinstance(w[f], list) else [w[f]]))]
+
+        def per_query(func: Callable[[str, Optional[str]], Any]) -> float:
+            best = float('inf')
+            for _ in range(5):
+                start = time.perf_counter()
+                for term in queries:
+                    for partition in partitions:
+                        func(term, partition)
+                best = min(best, time.perf_counter() - start)
+            return best / (len(queries) * len(partitions)) * 1e6
+
+        index.search("warm-up")
+        scan_us = per_query(linear)
+        index_us = per_query(index.search)
+        print(f"search: {dataset}, index {size / 1024:.0f} KB built in {build_ms:.0f} ms")
+        print(f"  linear scan {scan_us:8.1f} us/query")
+        print(f"  index       {index_us:8.1f} us/query ({scan_us / index_us:.0f}x)")
+        results[dataset] = {"scan_us": scan_us, "index_us": index_us, "index_bytes": size}
+    return results
+
+def columnar_round_trip_checks(words: List[Dict[str, Any]], metadata: Dict[str, Any],
+                               reader: columnar.ColumnarReader) -> Dict[str, bool]:
+    """Every row, column, category filter and the metadata read back as written"""
+    fields = set().union(*(word.keys() for word in words))
+    return {
+        "all fields stored": fields == set(reader.fields),
+        "row count": len(reader) == len(words),
+        "rows": [row.to_dict() for row in reader] == [{name: w[name] for name in reader.fields} for w in words],
+        "columns": all(reader.values(name) == [w[name] for w in words] for name in reader.fields),
+        "category filters": all(reader.where(name, value) == [i for i, w in enumerate(words) if w[name] == value]
+                                for name in reader.categories for value in reader.categories[name]),
+        "metadata": reader.metadata == metadata
+    }
+
+def bench_columnar() -> Dict[str, Any]:
+    """Columnar file vs json.load: round trip checks on both datasets, load time and memory"""
+    results = {}
+    for dataset in ("vocabulario-jlpt-4000.json", "vocabulario-uchinaguchi.json"):
+        with open(dataset, encoding='utf-8') as f:
+            data = json.load(f)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "data.vocab")
+            columnar.write_columnar(data['words'], path, data['metadata'])
+            size = os.path.getsize(path)
+
+            with columnar.ColumnarReader(path) as reader:
+                checks = columnar_round_trip_checks(data['words'], data['metadata'], reader)
+
+            def measure_load(func: Callable[[], Any]) -> Dict[str, float]:
+                best = float('inf')
+                for _ in range(5):
+                    start = time.perf_counter()
+                    func()
+                    best = min(best, time.perf_counter() - start)
+                tracemalloc.start()
+                keep = func()
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                del keep
+                return {"ms": best * 1000, "peak_kb": peak / 1024}
+
+            def json_load():
+                with open(dataset, encoding='utf-8') as f:
+                    return json.load(f)
+
+            key = "level" if "level" in data['words'][0] else "category"
+            first_value = data['words'][0][key]
+
+            def json_one_column():
+                words = json_load()['words']
+                return [w['romaji'] for w in words if w[key] == first_value]
+
+            def columnar_one_column():
+                with columnar.ColumnarReader(path) as reader:
+                    return [reader.value('romaji', i) for i in reader.where(key, first_value)]
+
+            row = {
+                "json.load": measure_load(json_load),
+                "columnar open": measure_load(lambda: columnar.ColumnarReader(path)),
+                f"json romaji where {key}={first_value}": measure_load(json_one_column),
+                f"columnar romaji where {key}={first_value}": measure_load(columnar_one_column),
+            }
+        print(f"columnar: {dataset}, {os.path.getsize(dataset) / 1024:.0f} KB JSON -> {size / 1024:.0f} KB, round trip: "
+              + ", ".join(f"{name}: {ok}" for name, ok in checks.items()))
+        for name, stats in row.items():
+            print(f"  {name:34s} {stats['ms']:8.2f} ms, peak {stats['peak_kb']:8.1f} KB")
+        results[dataset] = {**row, "checks": checks}
+    return results
+
+# Synthetic corpus: the real JLPT list has roughly these level sizes
+SYNTHETIC_LEVEL_MIX = {5: 0.09, 4: 0.08, 3: 0.27, 2: 0.23, 1: 0.33}
+# Glosses per meaning and their frequency in the API data
+SYNTHETIC_GLOSS_COUNTS = {1: 48, 2: 26, 3: 14, 4: 7, 5: 3, 6: 2}
+SYNTHETIC_SYLLABLES = [
+    ("か", "ka"), ("き", "ki"), ("く", "ku"), ("け", "ke"), ("こ", "ko"), ("さ", "sa"), ("し", "shi"),
+    ("す", "su"), ("せ", "se"), ("そ", "so"), ("た", "ta"), ("ち", "chi"), ("つ", "tsu"), ("て", "te"),
+    ("と", "to"), ("な", "na"), ("に", "ni"), ("の", "no"), ("は", "ha"), ("ひ", "hi"), ("ふ", "fu"),
+    ("ま", "ma"), ("み", "mi"), ("も", "mo"), ("や", "ya"), ("よ", "yo"), ("ら", "ra"), ("り", "ri"),
+    ("わ", "wa"), ("が", "ga"), ("ご", "go"), ("じ", "ji"), ("ど", "do"), ("ば", "ba"), ("しょう", "shō"),
+    ("きょ", "kyo"), ("ん", "n"), ("あ", "a"), ("い", "i"), ("う", "u"), ("お", "o")
+]
+# (word type share, kana endings, whether meanings read "to ...")
+SYNTHETIC_TYPES = [
+    (0.62, [("", "")], False),
+    (0.22, [("る", "ru"), ("う", "u"), ("く", "ku"), ("す", "su"), ("む", "mu"), ("つ", "tsu"),
+            ("ぶ", "bu"), ("ぐ", "gu"), ("する", "suru")], True),
+    (0.11, [("い", "i"), ("しい", "shii")], False),
+    (0.05, [("な", "na")], False)
+]
+SUITE_SIZES = [4000, 40000, 400000]
+
+def generate_corpus(size: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """
+    Deterministic, API-shaped synthetic word list
+    Level mix, gloss counts and kana endings follow the real data; glosses
+    mix words from the translation table with unknown English words
+    """
+    rng = random.Random(f"{seed}:{size}")
+    known = [key for key in converter.WORD_TRANSLATIONS if " " not in key]
+    with open(CORPUS_FILE, encoding='utf-8') as f:
+        corpus = json.load(f)['words']
+    unknown = sorted({token for w in corpus for gloss in w['español']
+                      for token in re.findall(r"[a-z]+", gloss) if token not in converter.WORD_TRANSLATIONS})
+    kanji = sorted({c for w in corpus for c in w['kanji'] if "\u4e00" <= c <= "\u9fff"})
+
+    levels = rng.choices(list(SYNTHETIC_LEVEL_MIX), weights=list(SYNTHETIC_LEVEL_MIX.values()), k=size)
+    gloss_counts = list(SYNTHETIC_GLOSS_COUNTS)
+    gloss_weights = list(SYNTHETIC_GLOSS_COUNTS.values())
+    type_weights = [share for share, _, _ in SYNTHETIC_TYPES]
+
+    words = []
+    for level in levels:
+        _, endings, verb = rng.choices(SYNTHETIC_TYPES, weights=type_weights)[0]
+        syllables = rng.choices(SYNTHETIC_SYLLABLES, k=rng.randint(1, 4))
+        ending_kana, ending_romaji = rng.choice(endings)
+        furigana = "".join(kana for kana, _ in syllables) + ending_kana
+        romaji = "".join(roman for _, roman in syllables) + ending_romaji
+
+        glosses = []
+        for _ in range(rng.choices(gloss_counts, weights=gloss_weights)[0]):
+            tokens = [rng.choice(known) if rng.random() < 0.6 else rng.choice(unknown)
+                      for _ in range(rng.choices([1, 2, 3], weights=[70, 22, 8])[0])]
+            glosses.append(("to " if verb else "") + " ".join(tokens))
+        words.append({
+            "word": "".join(rng.choices(kanji, k=len(syllables))) + ending_kana if rng.random() < 0.8 else furigana,
+            "furigana": furigana,
+            "romaji": romaji,
+            "meaning": "; ".join(glosses),
+            "level": level
+        })
+    return words
+
+def time_and_memory(func: Callable[[], Any], repeat: int = 3) -> Dict[str, float]:
+    """Best-of-N wall time, then one traced run for the peak allocation"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            func()
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    with contextlib.redirect_stdout(io.StringIO()):
+        func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"seconds": best, "peak_bytes": peak}
+
+def bench_suite(sizes: Optional[List[int]] = None) -> Dict[str, Any]:
+    """Throughput and peak memory of each pipeline stage on synthetic corpora of several sizes"""
+    results = {}
+    for size in sizes or SUITE_SIZES:
+        words = generate_corpus(size)
+        meanings = [w['meaning'] for w in words]
+        # Heavy sizes get fewer repeats so the suite stays in the minutes range
+        repeat = 3 if size <= 40000 else 1
+        with tempfile.TemporaryDirectory() as tmp:
+            source = os.path.join(tmp, "source.json")
+            with open(source, 'w', encoding='utf-8') as f:
+                json.dump(words, f, ensure_ascii=False)
+            output = os.path.join(tmp, "output.json")
+            cases = {
+                "select_words_by_level": (lambda: converter.select_words_by_level(words), size),
+                "process_word_data": (lambda: [converter.process_word_data(w) for w in words], size),
+                "translate_english_to_spanish":
+                    (lambda: [converter.translate_english_to_spanish(m) for m in meanings], size),
+                "determine_word_type":
+                    (lambda: [converter.determine_word_type(w['word'], w['meaning']) for w in words], size),
+                "main": (lambda: converter.main(["--source", source, "--output", output,
+                                                 "--no-cache", "--full-rebuild"]), size),
+            }
+            row = {}
+            for name, (func, count) in cases.items():
+                stats = time_and_memory(func, repeat)
+                row[name] = {"words_per_second": count / stats['seconds'], "peak_bytes": stats['peak_bytes']}
+        print(f"suite: {size:,} synthetic words")
+        for name, stats in row.items():
+            print(f"  {name:30s} {stats['words_per_second']:>12,.0f} words/s, peak {stats['peak_bytes'] / 1e6:8.1f} MB")
+        results[str(size)] = row
+    return results
+
+def flatten_metrics(results: Dict[str, Any], prefix: str = "") -> Dict[str, float]:
+    """Numeric leaves of a results tree keyed by their dotted path"""
+    flat = {}
+    for key, value in results.items():
+        path = f"{prefix}.{key}" if prefix else str(key)
+        if isinstance(value, dict):
+            flat.update(flatten_metrics(value, path))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[path] = float(value)
+    return flat
+
+def failed_checks(results: Dict[str, Any], prefix: str = "") -> List[str]:
+    """Dotted paths of the checks (booleans under a "checks" key) that did not pass"""
+    failed = []
+    for key, value in results.items():
+        path = f"{prefix}.{key}" if prefix else str(key)
+        if key == "checks" and isinstance(value, dict):
+            failed.extend(f"{path}.{name}" for name, ok in value.items() if not ok)
+        elif isinstance(value, dict):
+            failed.extend(failed_checks(value, path))
+    return failed
+
+def compare_results(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float) -> List[str]:
+    """
+    Metrics that got worse than the baseline by more than threshold
+    Throughputs (*per_second, after) should not drop; times and peak
+    memory (*seconds, *bytes) should not grow
+    """
+    old = flatten_metrics(baseline['results'])
+    regressions = []
+    for path, value in flatten_metrics(current['results']).items():
+        before = old.get(path)
+        if not before:
+            continue
+        leaf = path.rsplit(".", 1)[-1]
+        if leaf.endswith("per_second") or leaf == "after":
+            change = (before - value) / before
+        elif leaf.endswith("seconds") or leaf.endswith("bytes"):
+            change = (value - before) / before
+        else:
+            continue
+        if change > threshold:
+            regressions.append(f"{path}: {before:,.4g} -> {value:,.4g} ({change:.0%} worse)")
+    return regressions
+
+def bench_backend() -> Dict[str, Any]:
+    """
+    Remote translation against the local mock API: cold run vs warm translation memory
+    Both runs must write the same bytes as the dictionary run, and the warm
+    one must be answered from the translation memory without any request
+    """
+    server = mock_servers.serve_translation(port=0, latency=0.02)
+    handler = server.RequestHandlerClass
+    url = f"http://127.0.0.1:{server.server_address[1]}/translate"
+    results = {}
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            source = os.path.join(tmp, "source.json")
+            write_source_fixture(source, 1)
+            reference = os.path.join(tmp, "dictionary.json")
+            run_converter_quietly(["--source", source, "--output", reference, "--no-cache", "--full-rebuild"])
+            print("backend: mock API with 20 ms latency per request")
+            for run in ("cold", "warm"):
+                output = os.path.join(tmp, f"{run}.json")
+                requests_before, texts_before = handler.requests_served, handler.texts_served
+                stats = run_converter_quietly(["--source", source, "--output", output, "--cache-dir", tmp,
+                                               "--full-rebuild", "--translator", "http", "--translate-url", url])
+                stats["requests"] = handler.requests_served - requests_before
+                stats["texts"] = handler.texts_served - texts_before
+                same = open(output, 'rb').read() == open(reference, 'rb').read()
+                print(f"  {run}: {stats['seconds']:.2f}s, {stats['requests']} requests for {stats['texts']} meanings,"
+                      f" same output as dictionary: {same}")
+                stats["checks"] = {"same output as the dictionary run": same}
+                if run == "warm":
+                    stats["checks"]["no requests with a warm memory"] = stats["requests"] == 0
+                results[run] = stats
+    finally:
+        server.shutdown()
+        server.server_close()
+    return results
+
+def bench_cache() -> Dict[str, Any]:
+    """
+    Response cache against the local mock source (200 ms per request)
+    Runs the converter on a URL: a first fetch, an ETag revalidation (304),
+    a rebuild inside max-age that does not touch the network and should
+    take under a second, and an --offline run with the server gone. Then
+    checks Last-Modified revalidation, refetching a changed body and LRU
+    eviction under --cache-size on the cache itself; any failed check fails
+    the run
+    """
+    results: Dict[str, Any] = {}
+    checks: Dict[str, bool] = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        fixture = os.path.join(tmp, "source.json")
+        write_source_fixture(fixture, 1)
+        with open(fixture, 'rb') as f:
+            body = f.read()
+        server = mock_servers.serve_source({"/words": body}, latency=0.2)
+        handler = server.RequestHandlerClass
+        url = f"http://127.0.0.1:{server.server_address[1]}/words"
+        cache_dir = os.path.join(tmp, "cache")
+        output = os.path.join(tmp, "output.json")
+
+        def convert(name: str, *extra: str) -> bytes:
+            full, not_modified = handler.full_responses, handler.not_modified
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                converter.main(["--source", url, "--output", output, "--cache-dir", cache_dir, *extra])
+            results[name] = {"seconds": time.perf_counter() - start,
+                             "full_responses": handler.full_responses - full,
+                             "not_modified": handler.not_modified - not_modified}
+            with open(output, 'rb') as f:
+                return f.read()
+
+        try:
+            first = convert("first", "--max-age", "0")
+            checks["first run downloads (200)"] = results["first"]["full_responses"] == 1
+            same = convert("revalidate", "--max-age", "0") == first
+            checks["stale entry revalidated by ETag (304)"] = \
+                same and results["revalidate"] == {**results["revalidate"], "full_responses": 0, "not_modified": 1}
+            same = convert("rebuild") == first
+            checks["max-age skips the network"] = \
+                same and results["rebuild"]["full_responses"] + results["rebuild"]["not_modified"] == 0
+            checks["no-change rebuild under a second"] = results["rebuild"]["seconds"] < 1.0
+
+            cache = http_cache.ResponseCache(cache_dir, max_age=0)
+            handler.set_body("/words", body.replace(b'"level": 1', b'"level": 2', 1))
+            with open(cache.fetch(url), 'rb') as f:
+                checks["changed body refetched"] = f.read() != body
+            handler.set_body("/words", body)
+            cache.fetch(url)
+        finally:
+            server.shutdown()
+            server.server_close()
+        checks["--offline served from the cache"] = convert("offline", "--offline") == first
+        try:
+            http_cache.ResponseCache(cache_dir, offline=True).fetch(url + "?other")
+            checks["--offline miss raises CacheMiss"] = False
+        except http_cache.CacheMiss:
+            checks["--offline miss raises CacheMiss"] = True
+
+        server = mock_servers.serve_source({"/words": body}, etag=False)
+        try:
+            handler = server.RequestHandlerClass
+            url = f"http://127.0.0.1:{server.server_address[1]}/words"
+            cache = http_cache.ResponseCache(os.path.join(tmp, "last-modified"), max_age=0)
+            cache.fetch(url)
+            cache.fetch(url)
+            checks["Last-Modified revalidation (304)"] = (handler.full_responses, handler.not_modified) == (1, 1)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        # Three 400 kB bodies under a 1 MB --cache-size: the least recently used one goes
+        server = mock_servers.serve_source({f"/{name}": name.encode() * 400000 for name in "abc"})
+        try:
+            base = f"http://127.0.0.1:{server.server_address[1]}"
+            lru_dir = os.path.join(tmp, "lru")
+            cache = converter.build_cache(converter.parse_args(["--cache-dir", lru_dir, "--cache-size", "1"]))
+            for name in "abac":
+                cache.fetch(f"{base}/{name}")
+            kept = sorted(url.rsplit("/", 1)[1] for url in cache.index)
+            on_disk = len(os.listdir(os.path.join(lru_dir, "objects")))
+            checks["LRU eviction under --cache-size"] = kept == ["a", "c"] and on_disk == 2
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    results["checks"] = checks
+    print("cache: converter on the mock source (200 ms per request)")
+    for name in ("first", "revalidate", "rebuild", "offline"):
+        run = results[name]
+        print(f"  {name:10s} {run['seconds']:.2f}s, {run['full_responses']} full responses,"
+              f" {run['not_modified']} not modified")
+    for name, ok in checks.items():
+        print(f"  {name}: {ok}")
+    return results
+
+def bench_paged() -> Dict[str, Any]:
+    """
+    Paged fetching against the local mock pages API
+    Checks that words come back level by level in offset order, with and
+    without a reported total, and that a page failing with 503s past its
+    retries is recovered while a 404 page is given up on without retries
+    (any failed check fails the run). Also compares one against several
+    pages in flight with 10 ms latency
+    """
+    pages: Dict[int, List[Dict[str, Any]]] = {}
+    for record in load_source_records(1):
+        pages.setdefault(record['level'], []).append(record)
+    page_size = 100
+    expected = [word for level in paged_fetch.LEVELS for word in pages.get(level, [])]
+    results = {}
+
+    def fetch(concurrency: int = 8, **mock) -> Dict[str, Any]:
+        server = mock_servers.serve_pages(pages, port=0, **mock)
+        try:
+            fetcher = paged_fetch.PagedFetcher(mock_servers.page_url(server), page_size=page_size,
+                                               concurrency=concurrency, retries=2, backoff=0.01)
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                words = fetcher.fetch_all()
+            return {"seconds": time.perf_counter() - start, "words": words, "failures": fetcher.failures,
+                    "requests": fetcher.requests_made, "attempts": dict(server.RequestHandlerClass.attempts)}
+        finally:
+            server.shutdown()
+
+    print(f"paged: {len(expected)} words in pages of {page_size}")
+    for name, mock in (("total", {}), ("probing", {"report_total": False})):
+        run = fetch(latency=0.01, **mock)
+        ordered = run['words'] == expected
+        results[name] = {"seconds": run['seconds'], "requests": run['requests'],
+                         "checks": {"level/offset order": ordered}}
+        print(f"  {name:8s} {run['seconds']:.2f}s, {run['requests']} requests, level/offset order: {ordered}")
+    serial = fetch(concurrency=1, latency=0.01)
+    results["serial"] = {"seconds": serial['seconds'], "requests": serial['requests']}
+    print(f"  serial   {serial['seconds']:.2f}s, {serial['requests']} requests"
+          f" ({serial['seconds'] / results['total']['seconds']:.1f}x the concurrent run)")
+
+    flaky, recovered, slow, missing = (5, 100), (3, 0), (4, 200), (2, 300)
+    run = fetch(latency=0.01, flaky={flaky: 2, recovered: 3}, slow={slow: 0.5}, missing={missing})
+    kept = {level: words[:missing[1]] + words[missing[1] + page_size:] if level == missing[0] else words
+            for level, words in pages.items()}
+    checks = {
+        "order without the 404 page": run['words'] == [word for level in paged_fetch.LEVELS
+                                                       for word in kept.get(level, [])],
+        "only the 404 page failed": [failure[:2] for failure in run['failures']] == [missing],
+        "404 not retried": run['attempts'][missing] == 1,
+        "503 page retried": run['attempts'][flaky] == 3,
+        "recovered in the extra round": run['attempts'][recovered] == 4
+    }
+    results["faults"] = {"seconds": run['seconds'], "requests": run['requests'], "checks": checks}
+    print(f"  faults   {run['seconds']:.2f}s, {run['requests']} requests; "
+          + ", ".join(f"{name}: {ok}" for name, ok in checks.items()))
+    return results
+
+def bench_synonyms() -> Dict[str, Any]:
+    """Precomputed synonym index vs the old per-word synonym map on the bundled corpus"""
+    with open(CORPUS_FILE, encoding='utf-8') as f:
+        translations = [w['español'][0] for w in json.load(f)['words']]
+    table = converter.SYNONYM_MAP
+    index = converter.SYNONYM_INDEX
+
+    def legacy_expand(batch: List[str]) -> List[List[str]]:
+        expanded = []
+        for translation in batch:
+            # The old code rebuilt the synonym_map literal for every word
+            synonym_map = {word: list(synonyms) for word, synonyms in table.items()}
+            expanded.append([translation] + synonym_map.get(translation, []))
+        return expanded
+
+    def hoisted_expand(batch: List[str]) -> List[List[str]]:
+        return [[translation] + table.get(translation, []) for translation in batch]
+
+    results = {}
+    for name, func in (("per-word map", legacy_expand), ("hoisted map", hoisted_expand),
+                       ("synonym index", index.expand_many)):
+        best = float('inf')
+        for _ in range(5):
+            start = time.perf_counter()
+            expanded = func(translations)
+            best = min(best, time.perf_counter() - start)
+        results[name] = {
+            "words_per_second": len(translations) / best,
+            "covered": sum(len(synonyms) > 1 for synonyms in expanded),
+            "synonyms": sum(len(synonyms) - 1 for synonyms in expanded)
+        }
+
+    print(f"synonyms: {len(translations)} corpus translations, {len(table)} table entries"
+          f" -> {len(index.synonyms)} indexed words")
+    for name, stats in results.items():
+        print(f"  {name:14s} {stats['words_per_second']:>12,.0f} words/s, {stats['covered']} words with synonyms,"
+              f" {stats['synonyms']} synonyms added")
+    return results
+
+def bench_sqlite() -> Dict[str, Any]:
+    """SQLite export build time and query latency vs reparsing the JSON for every query"""
+    queries = ["agua", "gakusei", "がく", "estacion", "本", "taberu", "la"]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "vocabulario.db")
+        build = float('inf')
+        for _ in range(3):
+            start = time.perf_counter()
+            counts = sqlite_export.export_files(path)
+            build = min(build, time.perf_counter() - start)
+        size = os.path.getsize(path)
+
+        def json_query(term: str) -> List[Dict[str, Any]]:
+            with open(CORPUS_FILE, encoding='utf-8') as f:
+                words = json.load(f)['words']
+            term = search_index.normalize(term)
+            fields = search_index.JLPT_FIELDS
+            return [w for w in words if term in "\n".join(search_index.field_values(w, fields))][:50]
+
+        def latency(func: Callable[[], Any], repeat: int = 20) -> float:
+            best = float('inf')
+            for _ in range(repeat):
+                start = time.perf_counter()
+                func()
+                best = min(best, time.perf_counter() - start)
+            return best * 1000
+
+        results = {"build_ms": build * 1000, "bytes": size, "queries": {}}
+        with sqlite_export.VocabularyDB(path) as db:
+            same = all([w['kanji'] for w in db.search(term)] == [w['kanji'] for w in json_query(term)]
+                       for term in queries)
+            for term in queries:
+                results["queries"][term] = {
+                    "sqlite_ms": latency(lambda: db.search(term)),
+                    "json_ms": latency(lambda: json_query(term), repeat=3)
+                }
+            results["by_level_ms"] = latency(lambda: db.by_level("N4", "verbo"))
+            results["counts_ms"] = latency(db.counts)
+
+    print(f"sqlite: {counts} built in {build * 1000:.0f} ms, {size / 1024:.0f} KB,"
+          f" same search results as JSON scan: {same}")
+    for term, row in results["queries"].items():
+        print(f"  search {term!r:12s} sqlite {row['sqlite_ms']:7.3f} ms, reparse JSON {row['json_ms']:7.2f} ms")
+    print(f"  by_level N4 verbo  {results['by_level_ms']:.3f} ms, counts {results['counts_ms']:.3f} ms")
+    return results
+
+def bench_distractors(sizes: Optional[List[int]] = None) -> Dict[str, Any]:
+    """
+    Deletion-index distractor build vs brute-force edit distance on synthetic corpora
+    Brute force is timed on a sample of words per level and scaled to the
+    whole corpus; the sample also checks that both pick equally close readings
+    """
+    k = quiz_distractors.DEFAULT_K
+    limit = quiz_distractors.MAX_DISTANCE
+    metric = quiz_distractors.METRICS["levenshtein"]
+    results = {}
+    for size in sizes or SUITE_SIZES:
+        words = [{"kana": w['furigana'], "level": w['level']} for w in generate_corpus(size)]
+        builder = quiz_distractors.DistractorBuilder(k)
+        for word in words:
+            builder.add(word)
+        stats = time_and_memory(builder.build, 3 if size <= 40000 else 1)
+        distractors = builder.build()
+
+        rng = random.Random(0)
+        brute_seconds = 0.0
+        mismatches = 0
+        for readings in builder.partitions.values():
+            keys = list(readings)
+            sample = rng.sample(keys, min(50, len(keys)))
+            start = time.perf_counter()
+            nearest = [sorted(metric(key, other, limit) for other in keys if other != key)[:k] for key in sample]
+            brute_seconds += (time.perf_counter() - start) * len(keys) / len(sample)
+            for key, expected in zip(sample, nearest):
+                chosen = sorted(metric(key, words[i]['kana'], limit) for i in distractors[readings[key][0]])
+                mismatches += [d for d in chosen if d <= limit] != [d for d in expected if d <= limit]
+        results[str(size)] = {
+            "words_per_second": size / stats['seconds'],
+            "peak_bytes": stats['peak_bytes'],
+            "brute_force_words_per_second": size / brute_seconds,
+            "topped_up": builder.topped_up,
+            "sample_mismatches": mismatches
+        }
+        print(f"distractors: {size:,} synthetic words, k={k}: {stats['seconds']:.2f}s"
+              f" ({size / stats['seconds']:,.0f} words/s, peak {stats['peak_bytes'] / 1e6:.1f} MB),"
+              f" brute force ~{brute_seconds:,.0f}s; {builder.topped_up} topped up,"
+              f" {mismatches} sample mismatches")
+    return results
+
+def bench_merge(sizes: Optional[List[int]] = None) -> Dict[str, Any]:
+    """
+    Merge, level attachment and diff on synthetic dataset versions of several sizes
+    The next version drops, edits and adds 5% of the entries each; time per
+    entry should stay flat as the size grows
+    """
+    results = {}
+    for size in sizes or SUITE_SIZES:
+        old = [{"kanji": w['word'], "kana": w['furigana'], "romaji": w['romaji'],
+                "español": w['meaning'].split("; "), "level": f"N{w['level']}"} for w in generate_corpus(size)]
+        rng = random.Random(size)
+        new = []
+        for word in old:
+            roll = rng.random()
+            if roll < 0.05:
+                continue
+            new.append({**word, "español": word['español'] + ["otro"]} if roll < 0.10 else word)
+        new.extend({**word, "kanji": word['kanji'] + "々"} for word in rng.sample(old, size // 20))
+        uchinaguchi = [{"japanese": word['kanji'] if i % 2 else word['kana'], "uchinaguchi": word['kana'],
+                        "español": word['español'], "category": "sintético"} for i, word in enumerate(new)]
+        key = ("kanji", "kana")
+
+        stages = {
+            "merge": lambda: merge_datasets.merge_words([old, new], key),
+            "levels": lambda: merge_datasets.attach_levels(uchinaguchi, merge_datasets.ReadingIndex(old)),
+            "diff": lambda: merge_datasets.diff_words(old, new, key)
+        }
+        results[str(size)] = {}
+        for name, func in stages.items():
+            stats = time_and_memory(func, 3 if size <= 40000 else 1)
+            results[str(size)][name] = {"microseconds_per_entry": stats['seconds'] * 1e6 / size,
+                                        "peak_bytes": stats['peak_bytes']}
+        diff = merge_datasets.diff_words(old, new, key)
+        print(f"merge: {size:,} entries; diff finds {len(diff['added'])} added, {len(diff['removed'])} removed,"
+              f" {len(diff['changed'])} changed")
+        for name, stats in results[str(size)].items():
+            print(f"  {name:7s} {stats['microseconds_per_entry']:6.2f} µs/entry, peak {stats['peak_bytes'] / 1e6:.1f} MB")
+    return results
+
+def naive_study_order(kanji_lists: List[List[str]], ranks: List[int]) -> List[int]:
+    """Reference greedy that rescores every remaining word for each pick"""
+    remaining = sorted(range(len(kanji_lists)), key=lambda i: (ranks[i], i))
+    covered = set()
+    order = []
+    while True:
+        best, best_gain = None, 0
+        for i in remaining:
+            gain = sum(1 for char in kanji_lists[i] if char not in covered)
+            if gain > best_gain:
+                best, best_gain = i, gain
+        if best is None:
+            break
+        order.append(best)
+        covered.update(kanji_lists[best])
+        remaining.remove(best)
+    return order + remaining
+
+def bench_kanji(sizes: Optional[List[int]] = None) -> Dict[str, Any]:
+    """
+    Kanji index build and greedy study order on synthetic corpora of several sizes
+    The lazy heap is checked against the naive rescoring greedy where that
+    one is still quick enough to run
+    """
+    results = {}
+    for size in sizes or SUITE_SIZES:
+        words = [{"kanji": w['word'], "level": f"N{w['level']}"} for w in generate_corpus(size)]
+
+        def build() -> kanji_index.KanjiIndexBuilder:
+            builder = kanji_index.KanjiIndexBuilder()
+            for word in words:
+                builder.add(word)
+            return builder
+
+        builder = build()
+        repeat = 3 if size <= 40000 else 1
+        build_stats = time_and_memory(build, repeat)
+        order_stats = time_and_memory(lambda: kanji_index.study_order(builder.kanji_lists, builder.ranks), repeat)
+        artifact = json.dumps(builder.to_dict(), ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        results[str(size)] = {
+            "kanji": len(builder.postings),
+            "build_microseconds_per_word": build_stats['seconds'] * 1e6 / size,
+            "build_peak_bytes": build_stats['peak_bytes'],
+            "study_order_seconds": order_stats['seconds'],
+            "artifact_bytes": len(artifact)
+        }
+        print(f"kanji: {size:,} words, {len(builder.postings)} kanji, artifact {len(artifact) / 1e6:.1f} MB")
+        print(f"  build       {results[str(size)]['build_microseconds_per_word']:6.2f} µs/word,"
+              f" peak {build_stats['peak_bytes'] / 1e6:.1f} MB")
+        print(f"  study order {order_stats['seconds'] * 1000:8.1f} ms (lazy heap)")
+        if size <= 4000:
+            start = time.perf_counter()
+            naive = naive_study_order(builder.kanji_lists, builder.ranks)
+            naive_seconds = time.perf_counter() - start
+            same = naive == kanji_index.study_order(builder.kanji_lists, builder.ranks)
+            results[str(size)].update({"naive_study_order_seconds": naive_seconds, "naive_same_order": same})
+            print(f"  study order {naive_seconds * 1000:8.1f} ms (rescoring every word per pick),"
+                  f" {'same' if same else 'DIFFERENT'} order")
+    return results
+
+def bench_targets(languages: Optional[List[int]] = None) -> Dict[str, Any]:
+    """
+    Cost of extra output languages in one run against separate runs
+    The source is a synthetic API download of 8000 records. Each extra
+    language reuses the Spanish tables under another code, so it does as
+    much lookup work as a real table set; separate runs would cost
+    (1 + extra) times the Spanish-only run
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "source.json")
+        with open(source, 'w', encoding='utf-8') as f:
+            json.dump(generate_corpus(8000), f, ensure_ascii=False)
+        tables = []
+        for n in range(max(languages or [1, 2, 4, 8])):
+            path = os.path.join(tmp, f"l{n}.json")
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump({"code": f"l{n}", "field": f"glosses{n}", "words": converter.WORD_TRANSLATIONS,
+                           "phrases": converter.PHRASE_TRANSLATIONS, "synonyms": converter.SYNONYM_MAP},
+                          f, ensure_ascii=False)
+            tables.append(path)
+        output = os.path.join(tmp, "output.json")
+        base_argv = ["--source", source, "--output", output, "--no-cache", "--full-rebuild", "--no-search-index"]
+        # Warm-up, so the first measured run does not pay for it
+        time_and_memory(lambda: converter.main(base_argv), 1)
+        base = None
+        for extra in [0] + (languages or [1, 2, 4, 8]):
+            argv = base_argv + [arg for path in tables[:extra] for arg in ("--target", path)]
+            stats = time_and_memory(lambda: converter.main(argv), 5)
+            seconds = stats['seconds']
+            base = base or seconds
+            results[str(extra)] = {"seconds": seconds, "relative": seconds / base,
+                                   "separate_runs_relative": 1.0 + extra, "peak_bytes": stats['peak_bytes']}
+            print(f"targets: {extra} extra languages: {seconds:.2f}s, {seconds / base:.2f}x the Spanish-only run"
+                  f" (separate runs: {1 + extra:.0f}x), peak {stats['peak_bytes'] / 1e6:.1f} MB")
+    return results
+
+def wait_for_lines(path: str, lines: int, process: subprocess.Popen):
+    """Block until path holds at least `lines` lines or the process exits"""
+    while process.poll() is None:
+        try:
+            with open(path, 'rb') as f:
+                if f.read().count(b"\n") >= lines:
+                    return
+        except OSError:
+            pass
+        time.sleep(0.001)
+
+def bench_resume(trials: int = 20) -> Dict[str, Any]:
+    """
+    Kill the converter at random points and --resume it until it finishes
+    Half the kills land at a random time in the run, half right after a
+    random number of checkpointed chunks. Every trial must end with the same
+    bytes as an uninterrupted run, and a killed run must never leave a
+    truncated output file behind
+    """
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "source.json")
+        write_source_fixture(source, 3)
+        command = [sys.executable, "convert_jlpt_to_spanish.py", "--source", source, "--no-cache",
+                   "--full-rebuild", "--no-search-index", "--cache-dir", tmp]
+        reference = os.path.join(tmp, "reference.json")
+        start = time.perf_counter()
+        subprocess.run(command + ["--output", reference], stdout=subprocess.DEVNULL, check=True)
+        duration = time.perf_counter() - start
+        with open(reference, 'rb') as f:
+            expected = f.read()
+
+        output = os.path.join(tmp, "output.json")
+        log = os.path.join(tmp, "checkpoint-output.json.jsonl")
+        chunks = -(-converter.TARGET_WORDS // checkpoint.CHECKPOINT_CHUNK_SIZE)
+        kills = resumed = torn = mismatches = 0
+        for _ in range(trials):
+            for path in (output, log):
+                if os.path.exists(path):
+                    os.remove(path)
+            for attempt in range(4):
+                process = subprocess.Popen(command + ["--output", output, "--resume"],
+                                           stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+                if attempt == 3:
+                    # The last attempt runs to completion
+                    resumed += "Resuming:" in process.communicate()[0]
+                    break
+                if rng.random() < 0.5:
+                    time.sleep(rng.uniform(0, duration))
+                else:
+                    # Header line plus a random number of finished chunks
+                    wait_for_lines(log, 1 + rng.randint(1, chunks - 1), process)
+                if process.poll() is not None:
+                    resumed += "Resuming:" in process.communicate()[0]
+                    break
+                process.kill()
+                process.communicate()
+                kills += 1
+                if os.path.exists(output):
+                    with open(output, 'rb') as f:
+                        torn += f.read() != expected
+            with open(output, 'rb') as f:
+                mismatches += f.read() != expected
+
+    results = {"trials": trials, "kills": kills, "resumed_runs": resumed, "torn_outputs": torn,
+               "mismatches": mismatches, "uninterrupted_seconds": duration,
+               "checks": {"no torn outputs": torn == 0, "same output as the uninterrupted run": mismatches == 0}}
+    print(f"resume: {trials} trials, {kills} kills, {resumed} final runs resumed from a checkpoint;"
+          f" {torn} torn outputs, {mismatches} outputs differing from the uninterrupted run")
+    return results
+
+def bench_service() -> Dict[str, Any]:
+    """Query service throughput and latency under concurrent clients, without and with its LRU cache"""
+    results = {}
+    for name, size in (("uncached", 0), ("cached", load_test_service.query_service.CACHE_SIZE)):
+        print(f"service: {name} (cache size {size})")
+        results[name] = load_test_service.run_load_test([1, 16], duration=2.0, cache_size=size)
+    return results
+
+def regex_chain_kana_to_romaji() -> Callable[[str], str]:
+    """
+    Baseline in the style of index.html's transcribeToKanaBreakdown: one
+    replace per table entry (longest first), then regexes for ん, っ and long vowels
+    """
+    table = dict(transliterate.HIRAGANA_ROMAJI)
+    table.update({transliterate.to_katakana(kana): roman for kana, roman in table.items()})
+    table.update({"ん": "n", "ン": "n"})
+    replaces = [(re.compile(re.escape(kana)), roman)
+                for kana, roman in sorted(table.items(), key=lambda item: -len(item[0]))]
+    syllabic_n = re.compile(r"[んン](?=[あいうえおやゆよアイウエオヤユヨ])")
+    sokuon_ch = re.compile(r"[っッ]ch")
+    sokuon = re.compile(r"[っッ]([bcdfghjkmnprstvwz])")
+    macrons = [(re.compile(pattern), macron) for pattern, macron in
+               [(r"ou|oo|oー", "ō"), (r"uu|uー", "ū"), (r"aー", "ā"), (r"iー", "ī"), (r"eー", "ē")]]
+    punctuation = [(re.compile(re.escape(mark)), ascii) for mark, ascii in transliterate.PUNCTUATION.items()]
+
+    def convert(text: str) -> str:
+        text = syllabic_n.sub("n'", text)
+        for pattern, roman in replaces:
+            text = pattern.sub(roman, text)
+        text = sokuon_ch.sub("tch", text)
+        text = sokuon.sub(r"\1\1", text)
+        for pattern, macron in macrons + punctuation:
+            text = pattern.sub(macron, text)
+        return text
+    return convert
+
+def bench_transliterate() -> Dict[str, Any]:
+    """Longest-match transliteration engine vs a chain of regex replaces on the corpus readings"""
+    with open(CORPUS_FILE, encoding='utf-8') as f:
+        readings = [w['kana'] for w in json.load(f)['words'] if transliterate.is_kana(w['kana'])]
+    engine = transliterate.Transliterator()
+    chain = regex_chain_kana_to_romaji()
+    results = {}
+    outputs = {}
+    for name, func in (("regex chain", lambda: [chain(text) for text in readings]),
+                       ("engine", lambda: [engine.kana_to_romaji(text) for text in readings]),
+                       ("engine batch", lambda: engine.kana_to_romaji_many(readings))):
+        best = float('inf')
+        for _ in range(5):
+            start = time.perf_counter()
+            outputs[name] = func()
+            best = min(best, time.perf_counter() - start)
+        results[name] = {"words_per_second": len(readings) / best}
+
+    spellings = [engine.kana_to_romaji(text) for text in readings]
+    start = time.perf_counter()
+    round_trip = engine.romaji_to_kana_many(spellings)
+    results["romaji to kana"] = {"words_per_second": len(readings) / (time.perf_counter() - start)}
+    same = sum(a == b for a, b in zip(outputs["regex chain"], outputs["engine"]))
+    exact = sum(transliterate.to_hiragana(text) == kana for text, kana in zip(readings, round_trip))
+    results["agreement"] = {"regex_chain_same": same, "round_trip_exact": exact, "words": len(readings)}
+
+    print(f"transliterate: {len(readings)} corpus readings; regex chain gives the same romaji for {same},"
+          f" {exact} survive a kana -> romaji -> kana round trip")
+    for name in ("regex chain", "engine", "engine batch", "romaji to kana"):
+        print(f"  {name:15s} {results[name]['words_per_second']:>12,.0f} words/s")
+    return results
+
+BENCHMARKS = {
+    "translate": bench_translate,
+    "stream": bench_stream,
+    "workers": bench_workers,
+    "select": bench_select,
+    "classify": bench_classify,
+    "search": bench_search,
+    "columnar": bench_columnar,
+    "backend": bench_backend,
+    "paged": bench_paged,
+    "cache": bench_cache,
+    "synonyms": bench_synonyms,
+    "suite": bench_suite,
+    "sqlite": bench_sqlite,
+    "distractors": bench_distractors,
+    "transliterate": bench_transliterate,
+    "merge": bench_merge,
+    "kanji": bench_kanji,
+    "targets": bench_targets,
+    "resume": bench_resume,
+    "service": bench_service,
+}
+
+def main():
+    """Run the named benchmarks (default: all), record results and compare against a baseline"""
+    parser = argparse.ArgumentParser(description="Benchmarks for convert_jlpt_to_spanish.py")
+    parser.add_argument("names", nargs="*", help=f"benchmarks to run (available: {', '.join(BENCHMARKS)})")
+    parser.add_argument("--sizes", type=lambda value: [int(size) for size in value.split(",")],
+                        default=SUITE_SIZES, help="corpus sizes for the suite, distractors, merge and kanji benchmarks, e.g. 4000,40000")
+    parser.add_argument("--results", default=RESULTS_FILE, help=f"results file to write (default: {RESULTS_FILE})")
+    parser.add_argument("--baseline", default=None, help="earlier results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="relative slowdown reported as a regression (default: 0.10)")
+    args = parser.parse_args()
+
+    names = args.names or list(BENCHMARKS)
+    for name in names:
+        if name not in BENCHMARKS:
+            print(f"Unknown benchmark: {name} (available: {', '.join(BENCHMARKS)})")
+            sys.exit(1)
+
+    results = {}
+    for name in names:
+        results[name] = BENCHMARKS[name](args.sizes) if name in ("suite", "distractors", "merge", "kanji") else BENCHMARKS[name]()
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "results": results
+    }
+    with open(args.results, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"Results written to {args.results}")
+
+    failures = failed_checks(results)
+    for path in failures:
+        print(f"FAILED: {path}")
+    if failures:
+        sys.exit(1)
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare_results(baseline, report, args.threshold)
+        print(f"Compared with {args.baseline} ({baseline.get('created', 'unknown date')}):"
+              f" {len(regressions)} regressions over {args.threshold:.0%}")
+        for line in regressions:
+            print(f"  {line}")
+        if regressions:
+            sys.exit(2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Build-time lesson decks for index.html
+The decks the page used to compute in the browser (Spanish words broken
+into kana syllables, number readings, days of the month, ordinals) are
+generated here and written as content-hashed JSON shards plus a manifest,
+so the page fetches each deck only when its submenu or lesson is opened
+"""
+
+import argparse
+import hashlib
+import json
+import os
+from typing import Any, Dict, List
+
+from shard_output import dump_compact
+import transliterate
+
+DECKS_DIR = "decks"
+DECKS_MANIFEST = "manifest.json"
+DECKS_VERSION = 1
+
+VOCABULARY_ES = [
+    "hola", "adios", "gracias", "agua", "casa", "mundo", "nada", "cada", "solo", "mesa", "silla", "libro",
+    "niño", "niña", "mujer", "hombre", "gato", "perro", "verde", "negro", "blanco", "azul", "rojo", "grande",
+    "pequeño", "amigo", "amiga", "padre", "madre", "hermano", "hermana", "lunes", "martes", "miercoles",
+    "jueves", "viernes", "enero", "febrero", "marzo", "abril", "mayo", "comer", "beber", "dormir", "hablar",
+    "vivir", "trabajar", "estudiar", "coche", "barco", "playa", "mar", "cielo", "sol", "luna", "estrella",
+    "ciudad", "pueblo", "calle", "plaza", "arbol", "flor", "ciencia", "tecnologia", "computadora",
+    "telefono", "internet"
+]
+
+# Spanish spellings rewritten towards Japanese sounds, in order; count 1
+# mirrors the page's string (first occurrence only) replaces
+SPANISH_RESPELLINGS = [
+    ("ñ", "ny", 0), ("lle", "re", 0), ("ll", "y", 0), ("ye", "ie", 0),
+    ("di", "ri", 0), ("je", "he", 0), ("du", "ru", 0), ("l", "r", 0), ("v", "b", 0), ("x", "s", 0),
+    ("ca", "ka", 0), ("co", "ko", 0), ("cu", "ku", 0), ("que", "ke", 0), ("qui", "ki", 0),
+    ("ci", "shi", 0), ("ce", "se", 0), ("si", "shi", 0), ("z", "s", 0),
+    ("ja", "ha", 0), ("jo", "ho", 1), ("ju", "hu", 1), ("ge", "he", 0), ("gi", "hi", 0)
+]
+VOWELS = "aeiou"
+
+DIGITS_KANJI = ["", "一", "二", "三", "四", "五", "六", "七", "八", "九"]
+DIGITS_KANA = ["", "いち", "に", "さん", "よん", "ご", "ろく", "なな", "はち", "きゅう"]
+GROUP_KANJI = ["", "万", "億", "兆"]
+GROUP_KANA = ["", "まん", "おく", "ちょう"]
+# (kanji, kana) of the thousands and hundreds, irregular readings included
+THOUSANDS = {1: ("千", "せん"), 3: ("三千", "さんぜん"), 8: ("八千", "はっせん")}
+HUNDREDS = {1: ("百", "ひゃく"), 3: ("三百", "さんびゃく"), 6: ("六百", "ろっぴゃく"), 8: ("八百", "はっぴゃく")}
+
+DAY_KANA = {
+    1: "ついたち", 2: "ふつか", 3: "みっか", 4: "よっか", 5: "いつか", 6: "むいか", 7: "なのか",
+    8: "ようか", 9: "ここのか", 10: "とおか", 14: "じゅうよっか", 20: "はつか", 24: "にじゅうよっか"
+}
+DAY_DIGITS_KANA = ["", "いち", "に", "さん", "よ", "ご", "ろく", "しち", "はち", "きゅう"]
+ORDINAL_DIGITS_KANA = ["", "いち", "に", "さん", "よ", "ご", "ろく", "なな", "はち", "きゅう", "じゅう"]
+
+def transcribe_to_kana_breakdown(word: str) -> List[Dict[str, str]]:
+    """Syllables of a Spanish word as the page's kana cards show them"""
+    s = word.lower().strip()
+    for old, new, count in SPANISH_RESPELLINGS:
+        s = s.replace(old, new, count or -1)
+
+    syllables: List[str] = []
+    i = 0
+    while i < len(s):
+        char, following, after = s[i], s[i + 1:i + 2], s[i + 2:i + 3]
+        if char == "c" and following == "h":
+            if after and after in VOWELS:
+                syllables.append("shi" if after == "i" else "ch" + after)
+                i += 3
+            else:
+                syllables.append("chi")
+                i += 2
+        elif char == "n":
+            if following and following in VOWELS:
+                previous = syllables[-1] if syllables else ""
+                # n closes the syllable before it when another consonant follows
+                if previous[-1:] in tuple(VOWELS) and after and after not in VOWELS and after != "y":
+                    syllables.append("n")
+                    i += 1
+                else:
+                    syllables.append(char + following)
+                    i += 2
+            else:
+                syllables.append("n")
+                i += 1
+        elif char in VOWELS:
+            syllables.append(char)
+            i += 1
+        elif following and following in VOWELS:
+            syllables.append(char + following)
+            i += 2
+        elif following == "y" and after and after in VOWELS:
+            syllables.append(char + following + after)
+            i += 3
+        else:
+            syllables.append(char + "u")
+            i += 1
+    return [kana_part(syllable) for syllable in syllables]
+
+def kana_part(romaji: str) -> Dict[str, str]:
+    """A syllable card, with its hiragana and katakana when the syllable is writable in kana"""
+    part = {"es": romaji, "romaji": romaji}
+    hiragana = transliterate.romaji_to_kana(romaji)
+    if transliterate.is_kana(hiragana):
+        part["hira"] = hiragana
+        part["kata"] = transliterate.to_katakana(hiragana)
+    return part
+
+def whole_card(word: str, kanji: str, kana: str) -> Dict[str, str]:
+    return {"word": word, "jp": f"{kanji}<br><span class='kana-text'>{kana}</span>", "displayMode": "whole"}
+
+def spanish_number(n: int) -> str:
+    """n as es-ES writes it: dot thousands separators, but only from five digits up"""
+    return f"{n:,}".replace(",", ".") if n >= 10000 else str(n)
+
+def format_japanese_number(n: int) -> Dict[str, str]:
+    """Card with the kanji and kana reading of n"""
+    if n == 0:
+        return whole_card("0", "零", "れい")
+    digits = str(n)
+    groups = [digits[max(0, end - 4):end] for end in range(len(digits), 0, -4)]
+    kanji, kana = "", ""
+    # Most significant group (万, 億...) first
+    for position in range(len(groups) - 1, -1, -1):
+        group = int(groups[position])
+        if group == 0:
+            continue
+        thousands, hundreds, tens, units = (int(d) for d in f"{group:04d}")
+        group_kanji, group_kana = "", ""
+        if thousands:
+            k, r = THOUSANDS.get(thousands, (DIGITS_KANJI[thousands] + "千", DIGITS_KANA[thousands] + "せん"))
+            group_kanji, group_kana = group_kanji + k, group_kana + r
+        if hundreds:
+            k, r = HUNDREDS.get(hundreds, (DIGITS_KANJI[hundreds] + "百", DIGITS_KANA[hundreds] + "ひゃく"))
+            group_kanji, group_kana = group_kanji + k, group_kana + r
+        if tens:
+            group_kanji += ("" if tens == 1 else DIGITS_KANJI[tens]) + "十"
+            group_kana += ("" if tens == 1 else DIGITS_KANA[tens]) + "じゅう"
+        group_kanji += DIGITS_KANJI[units]
+        group_kana += DIGITS_KANA[units]
+        kanji += group_kanji + GROUP_KANJI[position]
+        kana += group_kana + GROUP_KANA[position]
+    return whole_card(spanish_number(n), kanji, kana)
+
+def vocabulary_es_deck() -> List[Dict[str, Any]]:
+    return [{"word": word, "displayMode": "syllables", "breakdown": transcribe_to_kana_breakdown(word)}
+            for word in VOCABULARY_ES]
+
+def cardinal_numbers_deck() -> List[Dict[str, str]]:
+    numbers = list(range(0, 21)) + list(range(30, 101, 10))
+    # Irregular readings, then combinations and large scales
+    numbers += [300, 600, 800, 3000, 8000, 1000]
+    numbers += [345, 567, 789, 1000, 1234, 2000, 3000, 5678, 10000, 23456, 100000, 1000000, 12345678]
+    return [format_japanese_number(n) for n in numbers]
+
+def days_of_month_deck() -> List[Dict[str, str]]:
+    cards = []
+    for day in range(1, 32):
+        tens, units = divmod(day, 10)
+        kanji = ("" if tens < 2 else DIGITS_KANJI[tens]) + ("十" if tens else "") + DIGITS_KANJI[units] + "日"
+        kana = DAY_KANA.get(day) or (("" if tens < 2 else DIGITS_KANA[tens]) + "じゅう" +
+                                     DAY_DIGITS_KANA[units] + "にち")
+        cards.append(whole_card(f"{day}日", kanji, kana))
+    return cards
+
+def ordinal_numbers_deck() -> List[Dict[str, str]]:
+    cards = [whole_card(f"{i}º", f"{i}番目", ORDINAL_DIGITS_KANA[i] + "ばんめ") for i in range(1, 11)]
+    cards.append(whole_card("11º", "十一番目", "じゅういちばんめ"))
+    cards.append(whole_card("20º", "二十番目", "にじゅうばんめ"))
+    cards.append(whole_card("100º", "百番目", "ひゃくばんめ"))
+    return cards
+
+# Track name (as passed to startGame) -> (submenu that offers it, builder)
+DECKS: Dict[str, Any] = {
+    "vocab-es": ("vocab-es", vocabulary_es_deck),
+    "nums-normal": ("numbers", cardinal_numbers_deck),
+    "nums-ordinal": ("numbers", ordinal_numbers_deck),
+    "dates-ordinal": ("dates", days_of_month_deck)
+}
+
+def build_decks(directory: str = DECKS_DIR) -> Dict[str, Any]:
+    """
+    Write every deck as a minified shard named after its content hash and
+    the manifest mapping tracks to shards; returns the manifest
+    Shards of earlier builds that the new manifest no longer lists are removed
+    """
+    os.makedirs(directory, exist_ok=True)
+    manifest_path = os.path.join(directory, DECKS_MANIFEST)
+    try:
+        with open(manifest_path, encoding='utf-8') as f:
+            previous = {info['file'] for info in json.load(f).get('decks', {}).values()}
+    except (OSError, ValueError, KeyError):
+        previous = set()
+
+    decks = {}
+    for track, (submenu, builder) in DECKS.items():
+        items = builder()
+        body = dump_compact({"track": track, "version": DECKS_VERSION, "items": items}).encode('utf-8')
+        digest = hashlib.sha256(body).hexdigest()
+        filename = f"{track}.{digest[:12]}.json"
+        with open(os.path.join(directory, filename), 'wb') as f:
+            f.write(body)
+        decks[track] = {"file": filename, "submenu": submenu, "count": len(items),
+                        "bytes": len(body), "sha256": digest}
+
+    manifest = {"version": DECKS_VERSION, "decks": decks}
+    tmp_path = manifest_path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, manifest_path)
+    for filename in previous - {info['file'] for info in decks.values()}:
+        try:
+            os.remove(os.path.join(directory, filename))
+        except OSError:
+            pass
+    return manifest
+
+def main():
+    """Build the lesson deck shards: build_decks.py [--output-dir DIR]"""
+    parser = argparse.ArgumentParser(description="Precompute the index.html lesson decks as static JSON")
+    parser.add_argument("--output-dir", default=DECKS_DIR, help=f"directory for the shards (default: {DECKS_DIR})")
+    args = parser.parse_args()
+    manifest = build_decks(args.output_dir)
+    for track, info in manifest['decks'].items():
+        print(f"  {track}: {info['count']} cards, {info['bytes'] / 1024:.1f} KB -> {info['file']}")
+    print(f"Wrote {len(manifest['decks'])} decks and {DECKS_MANIFEST} to {args.output_dir}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Correctness checks for convert_jlpt_to_spanish.py, for CI
+Runs the benchmarks whose results carry pass/fail checks (output identical
+after kills and resumes, columnar round trips, ...) and exits non-zero when
+any check fails:
+
+    python check_converter.py
+    python check_converter.py resume
+"""
+
+import argparse
+import sys
+
+import benchmark_converter as benchmarks
+
+CHECKS = ["resume", "columnar", "cache", "paged", "backend"]
+
+def main():
+    """Run the named checks (default: all) and exit 1 when any of them fails"""
+    parser = argparse.ArgumentParser(description="Correctness checks for convert_jlpt_to_spanish.py")
+    parser.add_argument("names", nargs="*", help=f"checks to run (available: {', '.join(CHECKS)})")
+    args = parser.parse_args()
+
+    names = args.names or CHECKS
+    for name in names:
+        if name not in CHECKS:
+            print(f"Unknown check: {name} (available: {', '.join(CHECKS)})")
+            sys.exit(1)
+
+    results = {name: benchmarks.BENCHMARKS[name]() for name in names}
+    failures = benchmarks.failed_checks(results)
+    for path in failures:
+        print(f"FAILED: {path}")
+    print(f"{len(names)} benchmarks checked, {len(failures)} checks failed")
+    if failures:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
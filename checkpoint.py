@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Crash-safe building blocks for long converter runs
+atomic_open writes a file through a temporary sibling renamed into place,
+so readers see the old file or the complete new one and never a truncated
+one. ChunkLog is an append-only JSON Lines log of processed chunks that a
+restarted run replays instead of processing those chunks again
+"""
+
+import contextlib
+import json
+import os
+from typing import Any, Dict, IO, Iterator, List, Optional
+
+CHECKPOINT_VERSION = 1
+CHECKPOINT_CHUNK_SIZE = 500
+
+@contextlib.contextmanager
+def atomic_open(path: str, mode: str = 'w', encoding: Optional[str] = 'utf-8') -> Iterator[IO]:
+    """
+    Open a temporary file next to path and rename it over path on success
+    The data is flushed to disk before the rename; on error the temporary
+    file is removed and path is left untouched
+    """
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = os.path.join(directory, f".{os.path.basename(path)}.tmp")
+    f = open(tmp_path, mode, encoding=None if 'b' in mode else encoding)
+    try:
+        with f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(tmp_path)
+        raise
+
+class ChunkLog:
+    """
+    Processed chunks of one run, persisted as they complete
+    The first line names the run by a key derived from its input and tables;
+    each further line holds the outputs of one chunk (null for words that
+    failed), keyed by the position of its first word, and is fsynced before
+    the next chunk starts. A log written for another key is discarded and a
+    line cut short by a crash is ignored, so resuming replays exactly the
+    chunks that were finished
+    """
+
+    def __init__(self, path: str, run_key: str, chunk_size: int = CHECKPOINT_CHUNK_SIZE,
+                 resume: bool = False):
+        self.path = path
+        self.run_key = run_key
+        self.chunk_size = chunk_size
+        self.completed: Dict[int, List[Optional[Dict[str, Any]]]] = {}
+        self.stale = False
+        if resume:
+            self._load()
+        self.resumed_words = sum(len(outputs) for outputs in self.completed.values())
+        # Start over from the intact lines: appending after a torn one would corrupt the next
+        with atomic_open(path) as f:
+            f.write(self._header())
+            for start in sorted(self.completed):
+                f.write(self._line(start, self.completed[start]))
+        self.file = open(path, 'a', encoding='utf-8')
+
+    @staticmethod
+    def _line(start: int, outputs: List[Optional[Dict[str, Any]]]) -> str:
+        return json.dumps({"start": start, "words": outputs}, ensure_ascii=False) + "\n"
+
+    def _header(self) -> str:
+        return json.dumps({"version": CHECKPOINT_VERSION, "run": self.run_key,
+                           "chunk_size": self.chunk_size}) + "\n"
+
+    def _load(self):
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                lines = f.read().split("\n")
+        except OSError:
+            return
+        try:
+            header = json.loads(lines[0])
+        except ValueError:
+            self.stale = True
+            return
+        if header.get('version') != CHECKPOINT_VERSION or header.get('run') != self.run_key \
+                or header.get('chunk_size') != self.chunk_size:
+            self.stale = True
+            return
+        for line in lines[1:]:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                # Torn final line (or the empty string after the last newline)
+                break
+            self.completed[entry['start']] = entry['words']
+
+    def replay(self) -> Dict[int, Optional[Dict[str, Any]]]:
+        """Recorded output per word position of the finished chunks (None where the word failed)"""
+        return {start + offset: output for start, outputs in self.completed.items()
+                for offset, output in enumerate(outputs)}
+
+    def record(self, start: int, outputs: List[Optional[Dict[str, Any]]]):
+        """Persist the outputs of the chunk whose first word is at position start"""
+        self.file.write(self._line(start, outputs))
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.completed[start] = outputs
+
+    def close(self, finished: bool = False):
+        """Close the log, removing it once the run it covers has written its output"""
+        self.file.close()
+        if finished:
+            with contextlib.suppress(OSError):
+                os.remove(self.path)
@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+Compact columnar binary format for vocabulary datasets
+Strings are interned in one table; each column is a flat array of string ids
+(or small category codes), so a reader can memory-map the file and look at a
+single level or field without parsing and allocating every word
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+from checkpoint import atomic_open
+
+MAGIC = b"NVOC"
+FORMAT_VERSION = 1
+# magic, version, header length
+PREAMBLE = struct.Struct("<4sII")
+
+# Column layout of the JLPT dataset: plain strings, string lists and categories
+JLPT_SCHEMA = {
+    "str": ["kanji", "kana", "romaji"],
+    "list": ["español"],
+    "category": ["level", "type"]
+}
+UCHINAGUCHI_SCHEMA = {
+    "str": ["japanese", "uchinaguchi", "romaji"],
+    "list": ["español"],
+    "category": ["category"]
+}
+
+def schema_for(words: Sequence[Dict[str, Any]]) -> Dict[str, List[str]]:
+    """Pick the schema matching a dataset's word shape"""
+    if words and 'uchinaguchi' in words[0]:
+        return UCHINAGUCHI_SCHEMA
+    return JLPT_SCHEMA
+
+# Array typecode of a 4-byte unsigned int ('L' is 8 bytes on 64-bit Linux)
+U32_TYPECODE = next((code for code in "IL" if array(code).itemsize == 4), None)
+if U32_TYPECODE is None:
+    raise ImportError("columnar: no 4-byte unsigned array typecode on this platform")
+
+# Files are little-endian on every host
+def _u32(values: Sequence[int]) -> bytes:
+    data = array(U32_TYPECODE, values)
+    if sys.byteorder != 'little':
+        data.byteswap()
+    return data.tobytes()
+
+def _u32_view(section: memoryview) -> memoryview:
+    """Ids of a section: the mapped bytes themselves, or a byteswapped copy on big-endian hosts"""
+    if sys.byteorder == 'little':
+        return section.cast(U32_TYPECODE)
+    data = array(U32_TYPECODE)
+    data.frombytes(section)
+    data.byteswap()
+    return memoryview(data)
+
+class ColumnarWriter:
+    """Builds the columns word by word (usable as a converter output sink)"""
+
+    def __init__(self, schema: Dict[str, List[str]] = JLPT_SCHEMA):
+        self.schema = schema
+        self.strings: List[str] = []
+        self.string_ids: Dict[str, int] = {}
+        self.columns: Dict[str, List[int]] = {name: [] for names in schema.values() for name in names}
+        self.list_offsets: Dict[str, List[int]] = {name: [0] for name in schema.get("list", [])}
+        self.categories: Dict[str, List[str]] = {name: [] for name in schema.get("category", [])}
+        self.rows = 0
+
+    def intern(self, text: str) -> int:
+        """Id of text in the string table"""
+        string_id = self.string_ids.get(text)
+        if string_id is None:
+            string_id = self.string_ids[text] = len(self.strings)
+            self.strings.append(text)
+        return string_id
+
+    def add(self, word: Dict[str, Any]):
+        """Append one word as a row"""
+        for name in self.schema.get("str", []):
+            self.columns[name].append(self.intern(word.get(name, "")))
+        for name in self.schema.get("list", []):
+            values = word.get(name, [])
+            self.columns[name].extend(self.intern(value) for value in values)
+            self.list_offsets[name].append(len(self.columns[name]))
+        for name in self.schema.get("category", []):
+            value = word.get(name, "")
+            codes = self.categories[name]
+            if value not in codes:
+                if len(codes) == 255:
+                    raise ValueError(f"Too many distinct values for category column {name}")
+                codes.append(value)
+            self.columns[name].append(codes.index(value))
+        self.rows += 1
+
+    def to_bytes(self, metadata: Optional[Dict[str, Any]] = None) -> bytes:
+        """Serialize: preamble, JSON header, then 4-byte aligned sections"""
+        encoded = [text.encode('utf-8') for text in self.strings]
+        string_offsets = [0]
+        for data in encoded:
+            string_offsets.append(string_offsets[-1] + len(data))
+
+        sections = [("strings.offsets", _u32(string_offsets)), ("strings.data", b"".join(encoded))]
+        for name in self.schema.get("str", []):
+            sections.append((name, _u32(self.columns[name])))
+        for name in self.schema.get("list", []):
+            sections.append((name + ".offsets", _u32(self.list_offsets[name])))
+            sections.append((name, _u32(self.columns[name])))
+        for name in self.schema.get("category", []):
+            sections.append((name, bytes(self.columns[name])))
+
+        # Section offsets are relative to the end of the header
+        layout = {}
+        position = 0
+        for name, data in sections:
+            layout[name] = [position, len(data)]
+            position += len(data) + (-len(data) % 4)
+
+        header = {
+            "rows": self.rows,
+            "strings": len(self.strings),
+            "schema": self.schema,
+            "categories": self.categories,
+            "sections": layout,
+            "metadata": metadata or {}
+        }
+        header_bytes = json.dumps(header, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        header_bytes += b" " * (-(PREAMBLE.size + len(header_bytes)) % 4)
+
+        parts = [PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(header_bytes)), header_bytes]
+        for _, data in sections:
+            parts.append(data)
+            parts.append(b"\0" * (-len(data) % 4))
+        return b"".join(parts)
+
+    def write(self, path: str, metadata: Optional[Dict[str, Any]] = None):
+        """Write the file"""
+        with atomic_open(path, 'wb') as f:
+            f.write(self.to_bytes(metadata))
+
+def write_columnar(words: Sequence[Dict[str, Any]], path: str, metadata: Optional[Dict[str, Any]] = None,
+                   schema: Optional[Dict[str, List[str]]] = None):
+    """Write a list of words in columnar form"""
+    writer = ColumnarWriter(schema or schema_for(words))
+    for word in words:
+        writer.add(word)
+    writer.write(path, metadata)
+
+class Row:
+    """Lazy view of one word; fields are decoded only when read"""
+
+    __slots__ = ("_reader", "_index")
+
+    def __init__(self, reader: "ColumnarReader", index: int):
+        self._reader = reader
+        self._index = index
+
+    def __getitem__(self, name: str) -> Any:
+        return self._reader.value(name, self._index)
+
+    def get(self, name: str, default: Any = None) -> Any:
+        """Field value, or default for unknown fields"""
+        if name not in self._reader.fields:
+            return default
+        return self[name]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Materialize the row as a regular word dict"""
+        return {name: self[name] for name in self._reader.fields}
+
+    def __repr__(self) -> str:
+        return f"Row({self._index}, {self.to_dict()!r})"
+
+class ColumnarReader:
+    """
+    Memory-mapped reader
+    Id and code columns are exposed as memoryviews over the mapping (no
+    copy; big-endian hosts get byteswapped copies of the id columns);
+    strings are decoded on access
+    """
+
+    def __init__(self, path: str):
+        self._file = open(path, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, header_length = PREAMBLE.unpack_from(self._map, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"{path} is not a version {FORMAT_VERSION} columnar vocabulary file")
+        start = PREAMBLE.size
+        header = json.loads(bytes(self._map[start:start + header_length]))
+        self.rows = header['rows']
+        self.schema = header['schema']
+        self.categories = header['categories']
+        self.metadata = header['metadata']
+        self.fields = [name for names in self.schema.values() for name in names]
+
+        view = memoryview(self._map)
+        base = start + header_length
+        self._sections = {}
+        for name, (offset, length) in header['sections'].items():
+            section = view[base + offset:base + offset + length]
+            self._sections[name] = section if name == "strings.data" or name in self.categories else _u32_view(section)
+        self._string_offsets = self._sections["strings.offsets"]
+        self._string_data = self._sections["strings.data"]
+        self._string_cache: Dict[int, str] = {}
+
+    def close(self):
+        """Release the mapping (views handed out become invalid)"""
+        self._sections = {}
+        self._string_offsets = self._string_data = None
+        try:
+            self._map.close()
+        except BufferError:
+            # Callers still hold column views; the mapping goes away with them
+            pass
+        self._file.close()
+
+    def __enter__(self) -> "ColumnarReader":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def __getitem__(self, index: int) -> Row:
+        if not -self.rows <= index < self.rows:
+            raise IndexError(index)
+        return Row(self, index % self.rows)
+
+    def __iter__(self) -> Iterator[Row]:
+        return (Row(self, index) for index in range(self.rows))
+
+    def string(self, string_id: int) -> str:
+        """Decode one entry of the string table"""
+        text = self._string_cache.get(string_id)
+        if text is None:
+            start = self._string_offsets[string_id]
+            end = self._string_offsets[string_id + 1]
+            text = str(self._string_data[start:end], 'utf-8')
+            self._string_cache[string_id] = text
+        return text
+
+    def column(self, name: str) -> memoryview:
+        """Raw column: string ids, flattened list ids, or category codes (zero-copy on little-endian hosts)"""
+        return self._sections[name]
+
+    def value(self, name: str, index: int) -> Any:
+        """Decoded value of one cell"""
+        if name in self.categories:
+            return self.categories[name][self._sections[name][index]]
+        if name in self.schema.get("list", []):
+            offsets = self._sections[name + ".offsets"]
+            ids = self._sections[name][offsets[index]:offsets[index + 1]]
+            return [self.string(string_id) for string_id in ids]
+        return self.string(self._sections[name][index])
+
+    def values(self, name: str, start: int = 0, stop: Optional[int] = None) -> List[Any]:
+        """Decoded slice of a column"""
+        stop = self.rows if stop is None else stop
+        return [self.value(name, index) for index in range(start, stop)]
+
+    def where(self, name: str, value: str) -> List[int]:
+        """Row indexes whose category column equals value, scanning only that column"""
+        codes = self.categories[name]
+        if value not in codes:
+            return []
+        code = codes.index(value)
+        column = self._sections[name]
+        return [index for index in range(self.rows) if column[index] == code]
+
+def main():
+    """Convert a dataset: columnar.py DATASET.json OUTPUT.vocab"""
+    if len(sys.argv) != 3:
+        print("Usage: columnar.py DATASET.json OUTPUT.vocab")
+        sys.exit(1)
+    with open(sys.argv[1], encoding='utf-8') as f:
+        data = json.load(f)
+    write_columnar(data['words'], sys.argv[2], data.get('metadata'))
+    print(f"Created {sys.argv[2]} ({os.path.getsize(sys.argv[2]) / 1024:.0f} KB, {len(data['words'])} words)")
+
+if __name__ == "__main__":
+    main()
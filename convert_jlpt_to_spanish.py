@@ -4,17 +4,47 @@ Script to convert JLPT vocabulary data to Spanish format for NihongoApp
 Downloads JLPT vocabulary, translates to Spanish, and creates 4000-word dataset
 """
 
+import argparse
+import codecs
+import concurrent.futures
+import contextlib
+import cProfile
+import hashlib
 import json
+import os
+import pstats
+import random
 import requests
+import shutil
+import tempfile
 import time
 import sys
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple, Iterable, Iterator, Optional
 import re
 
+from checkpoint import ChunkLog, atomic_open
+from http_cache import ResponseCache, DEFAULT_CACHE_DIR, DEFAULT_MAX_AGE, DEFAULT_MAX_SIZE
+import paged_fetch
+import query_service
+from pipeline_metrics import PipelineMetrics
+import translation_backend
+from translation_backend import TranslationService
+from search_index import SearchIndexBuilder, JLPT_FIELDS, index_path_for
+import shard_output
+from columnar import ColumnarWriter, JLPT_SCHEMA
+from shard_output import ShardWriter
+from sqlite_export import SqliteWriter
+import quiz_distractors
+import transliterate
+from kanji_index import KanjiIndexBuilder, kanji_index_path_for
+from quiz_distractors import DistractorBuilder
+
 # Configuration
 API_BASE_URL = "https://jlpt-vocab-api.vercel.app/api/words/all"
 OUTPUT_FILE = "vocabulario-jlpt-4000.json"
 TARGET_WORDS = 4000
+STREAM_CHUNK_SIZE = 64 * 1024
+PROCESS_CHUNK_SIZE = 250
 
 # Level distribution for balanced learning
 LEVEL_DISTRIBUTION = {
@@ -25,6 +55,15 @@ LEVEL_DISTRIBUTION = {
     "N1": 600    # Advanced
 }
 
+LEVELS = ["N5", "N4", "N3", "N2", "N1"]
+JLPT_LEVEL_NAMES = {
+    1: "N1",
+    2: "N2",
+    3: "N3",
+    4: "N4",
+    5: "N5"
+}
+
 # Word type mapping based on patterns
 WORD_TYPE_PATTERNS = {
     "verbo": [r"る$", r"う$", r"く$", r"ぐ$", r"す$", r"つ$", r"ぬ$", r"ぶ$", r"む$"],
@@ -32,561 +71,1078 @@ WORD_TYPE_PATTERNS = {
     "sustantivo": [r".*"]  # Default
 }
 
-def download_jlpt_data() -> List[Dict[str, Any]]:
-    """Download JLPT vocabulary data from API"""
+# Basic English -> Spanish dictionary for common words
+WORD_TRANSLATIONS = {
+    # Nouns
+    "student": "estudiante",
+    "teacher": "profesor", 
+    "school": "escuela",
+    "language": "idioma",
+    "time": "tiempo",
+    "day": "día",
+    "year": "año",
+    "person": "persona",
+    "place": "lugar",
+    "thing": "cosa",
+    "water": "agua",
+    "food": "comida",
+    "house": "casa",
+    "car": "coche",
+    "book": "libro",
+    "friend": "amigo",
+    "family": "familia",
+    "work": "trabajo",
+    "money": "dinero",
+    "problem": "problema",
+    "answer": "respuesta",
+    "question": "pregunta",
+    "idea": "idea",
+    "word": "palabra",
+    "name": "nombre",
+    "number": "número",
+    "color": "color",
+    "size": "tamaño",
+    "shape": "forma",
+    "material": "material",
+    "quality": "calidad",
+    "price": "precio",
+    "value": "valor",
+    "result": "resultado",
+    "reason": "razón",
+    "purpose": "propósito",
+    "method": "método",
+    "way": "camino",
+    "direction": "dirección",
+    "position": "posición",
+    "condition": "condición",
+    "situation": "situación",
+    "moment": "momento",
+    "period": "período",
+    "season": "estación",
+    "weather": "clima",
+    "nature": "naturaleza",
+    "environment": "ambiente",
+    "society": "sociedad",
+    "culture": "cultura",
+    "history": "historia",
+    "future": "futuro",
+    "past": "pasado",
+    "present": "presente",
+    
+    # Verbs
+    "eat": "comer",
+    "drink": "beber", 
+    "sleep": "dormir",
+    "wake up": "despertarse",
+    "work": "trabajar",
+    "study": "estudiar",
+    "learn": "aprender",
+    "teach": "enseñar",
+    "speak": "hablar",
+    "listen": "escuchar",
+    "read": "leer",
+    "write": "escribir",
+    "see": "ver",
+    "watch": "mirar",
+    "look": "mirar",
+    "think": "pensar",
+    "know": "saber",
+    "understand": "entender",
+    "remember": "recordar",
+    "forget": "olvidar",
+    "love": "amar",
+    "like": "gustar",
+    "hate": "odiar",
+    "want": "querer",
+    "need": "necesitar",
+    "have": "tener",
+    "do": "hacer",
+    "make": "hacer",
+    "give": "dar",
+    "take": "tomar",
+    "come": "venir",
+    "go": "ir",
+    "return": "volver",
+    "stop": "parar",
+    "start": "empezar",
+    "continue": "continuar",
+    "finish": "terminar",
+    "help": "ayudar",
+    "try": "intentar",
+    "buy": "comprar",
+    "sell": "vender",
+    "open": "abrir",
+    "close": "cerrar",
+    "turn on": "encender",
+    "turn off": "apagar",
+    "move": "mover",
+    "change": "cambiar",
+    "play": "jugar",
+    "sing": "cantar",
+    "dance": "bailar",
+    "run": "correr",
+    "walk": "caminar",
+    "sit": "sentarse",
+    "stand": "levantarse",
+    
+    # Adjectives
+    "good": "bueno",
+    "bad": "malo",
+    "big": "grande",
+    "small": "pequeño",
+    "long": "largo",
+    "short": "corto",
+    "high": "alto",
+    "low": "bajo",
+    "hot": "caliente",
+    "cold": "frío",
+    "warm": "tibio",
+    "cool": "fresco",
+    "new": "nuevo",
+    "old": "viejo",
+    "young": "joven",
+    "easy": "fácil",
+    "difficult": "difícil",
+    "hard": "duro",
+    "soft": "suave",
+    "heavy": "pesado",
+    "light": "ligero",
+    "fast": "rápido",
+    "slow": "lento",
+    "clean": "limpio",
+    "dirty": "sucio",
+    "beautiful": "hermoso",
+    "ugly": "feo",
+    "expensive": "caro",
+    "cheap": "barato",
+    "important": "importante",
+    "interesting": "interesante",
+    "boring": "aburrido",
+    "happy": "feliz",
+    "sad": "triste",
+    "angry": "enojado",
+    "surprised": "sorprendido",
+    "excited": "emocionado",
+    "tired": "cansado",
+    "sick": "enfermo",
+    "healthy": "saludable",
+    "strong": "fuerte",
+    "weak": "débil",
+    "right": "correcto",
+    "wrong": "incorrecto",
+    "true": "verdadero",
+    "false": "falso",
+    "possible": "posible",
+    "impossible": "imposible",
+    "necessary": "necesario",
+    "available": "disponible",
+    "busy": "ocupado",
+    "free": "libre",
+    "full": "lleno",
+    "empty": "vacío",
+    "red": "rojo",
+    "blue": "azul",
+    "green": "verde",
+    "yellow": "amarillo",
+    "black": "negro",
+    "white": "blanco",
+    "gray": "gris",
+    "brown": "marrón",
+    "pink": "rosa",
+    "purple": "púrpura",
+    "orange": "naranja",
+    
+    # Adverbs
+    "very": "muy",
+    "quite": "bastante",
+    "too": "demasiado",
+    "enough": "suficiente",
+    "always": "siempre",
+    "never": "nunca",
+    "sometimes": "a veces",
+    "often": "a menudo",
+    "rarely": "raramente",
+    "usually": "generalmente",
+    "here": "aquí",
+    "there": "allí",
+    "everywhere": "en todas partes",
+    "now": "ahora",
+    "then": "entonces",
+    "today": "hoy",
+    "tomorrow": "mañana",
+    "yesterday": "ayer",
+    "soon": "pronto",
+    "later": "después",
+    "early": "temprano",
+    "late": "tarde",
+    "well": "bien",
+    "badly": "mal",
+    "quickly": "rápidamente",
+    "slowly": "lentamente",
+    "carefully": "cuidadosamente",
+    "easily": "fácilmente",
+    "hard": "difícilmente",
+    
+    # Prepositions/Conjunctions
+    "and": "y",
+    "or": "o",
+    "but": "pero",
+    "because": "porque",
+    "so": "así que",
+    "if": "si",
+    "when": "cuando",
+    "where": "donde",
+    "how": "cómo",
+    "what": "qué",
+    "who": "quién",
+    "which": "cuál",
+    "why": "por qué",
+    "with": "con",
+    "without": "sin",
+    "for": "para",
+    "from": "de",
+    "to": "a",
+    "at": "en",
+    "on": "en",
+    "in": "en",
+    "by": "por",
+    "about": "acerca de",
+    "over": "sobre",
+    "under": "debajo",
+    "between": "entre",
+    "among": "entre",
+    "through": "a través de",
+    "during": "durante",
+    "before": "antes",
+    "after": "después",
+    
+    # Common phrases
+    "hello": "hola",
+    "goodbye": "adiós",
+    "thank you": "gracias",
+    "please": "por favor",
+    "sorry": "lo siento",
+    "excuse me": "disculpe",
+    "yes": "sí",
+    "no": "no",
+    "maybe": "quizás",
+    "of course": "por supuesto",
+    "I don't know": "no sé",
+    "I understand": "entiendo",
+    "I don't understand": "no entiendo"
+}
+
+# Common phrase cleanup, applied to the word-by-word translation
+PHRASE_TRANSLATIONS = [
+    ("every morning", "cada mañana"),
+    ("good morning", "buenos días"),
+    ("good afternoon", "buenas tardes"),
+    ("good evening", "buenas noches"),
+    ("good night", "buenas noches"),
+    ("thank you", "gracias"),
+    ("excuse me", "disculpe"),
+    ("i see", "entiendo"),
+    ("of course", "por supuesto"),
+    ("for example", "por ejemplo"),
+    ("in general", "en general"),
+    ("at first", "al principio"),
+    ("at last", "finalmente"),
+    ("at least", "al menos"),
+    ("at most", "como máximo"),
+    ("as soon as", "tan pronto como"),
+    ("as long as", "siempre que"),
+    ("as far as", "en cuanto a"),
+    ("as well as", "así como"),
+    ("even if", "incluso si"),
+    ("even though", "aunque"),
+    ("in order to", "para"),
+    ("so that", "para que"),
+    ("such as", "como"),
+    ("instead of", "en lugar de"),
+    ("because of", "debido a"),
+    ("in spite of", "a pesar de"),
+    ("according to", "según"),
+    ("in front of", "delante de"),
+    ("in back of", "detrás de"),
+    ("next to", "al lado de"),
+    ("far from", "lejos de"),
+    ("near to", "cerca de"),
+    ("out of", "fuera de"),
+    ("inside of", "dentro de"),
+    ("on top of", "encima de"),
+    ("underneath of", "debajo de"),
+    ("all right", "bien"),
+    ("no problem", "no hay problema"),
+    ("no way", "de ninguna manera"),
+    ("let's see", "veamos"),
+    ("that's right", "correcto"),
+]
+
+# Common synonyms for basic words, keyed by Spanish translation
+SYNONYM_MAP = {
+    "estudiante": ["alumno"],
+    "profesor": ["maestro"], 
+    "escuela": ["colegio"],
+    "casa": ["hogar"],
+    "coche": ["carro", "automóvil"],
+    "libro": ["tomo"],
+    "trabajo": ["empleo"],
+    "dinero": ["capital"],
+    "problema": ["dificultad"],
+    "respuesta": ["solución"],
+    "pregunta": ["consulta"],
+    "camino": ["ruta", "sendero"],
+    "dirección": ["orientación"],
+    "método": ["técnica"],
+    "razón": ["motivo"],
+    "propósito": ["objetivo"],
+    "momento": ["instante"],
+    "período": ["época"],
+    "estación": ["temporada"],
+    "clima": ["tiempo"],
+    "ambiente": ["entorno"],
+    "sociedad": ["comunidad"],
+    "cultura": ["civilización"],
+    "historia": ["pasado"],
+    "futuro": ["porvenir"],
+    "presente": ["actualidad"],
+    "comer": ["alimentarse"],
+    "beber": ["tomar"],
+    "dormir": ["descansar"],
+    "trabajar": ["laborar"],
+    "estudiar": ["aprender"],
+    "enseñar": ["instruir"],
+    "hablar": ["conversar"],
+    "escuchar": ["oír"],
+    "ver": ["mirar", "observar"],
+    "pensar": ["reflexionar"],
+    "saber": ["conocer"],
+    "entender": ["comprender"],
+    "recordar": ["acordarse"],
+    "querer": ["desear"],
+    "necesitar": ["requerir"],
+    "hacer": ["realizar", "efectuar"],
+    "dar": ["entregar"],
+    "tomar": ["coger"],
+    "venir": ["llegar"],
+    "ir": ["marchar"],
+    "volver": ["regresar"],
+    "parar": ["detener"],
+    "empezar": ["comenzar"],
+    "terminar": ["acabar", "finalizar"],
+    "ayudar": ["asistir"],
+    "intentar": ["tratar"],
+    "comprar": ["adquirir"],
+    "vender": ["comerciar"],
+    "abrir": ["abrirse"],
+    "cerrar": ["cerrarse"],
+    "mover": ["desplazar"],
+    "cambiar": ["modificar"],
+    "jugar": ["jugarse"],
+    "correr": ["correrse"],
+    "caminar": ["andar"],
+    "sentarse": ["sentar"],
+    "levantarse": ["levantar"],
+    "bueno": ["excelente"],
+    "malo": ["pésimo"],
+    "grande": ["enorme"],
+    "pequeño": ["diminuto"],
+    "largo": ["extenso"],
+    "corto": ["breve"],
+    "alto": ["elevado"],
+    "bajo": ["inferior"],
+    "nuevo": ["novedoso"],
+    "viejo": ["anciano"],
+    "fácil": ["sencillo"],
+    "difícil": ["complicado"],
+    "duro": ["rígido"],
+    "suave": ["blando"],
+    "pesado": ["ponderado"],
+    "ligero": ["liviano"],
+    "rápido": ["veloz"],
+    "lento": ["perezoso"],
+    "limpio": ["puro"],
+    "sucio": ["inmundo"],
+    "hermoso": ["bello"],
+    "feo": ["horrible"],
+    "caro": ["costoso"],
+    "barato": ["económico"],
+    "importante": ["relevante"],
+    "interesante": ["fascinante"],
+    "aburrido": ["tedioso"],
+    "feliz": ["contento"],
+    "triste": ["afligido"],
+    "enojado": ["furioso"],
+    "cansado": ["fatigado"],
+    "enfermo": ["enfermo"],
+    "saludable": ["sano"],
+    "fuerte": ["robusto"],
+    "débil": ["frágil"],
+    "correcto": ["adecuado"],
+    "incorrecto": ["equivocado"],
+    "verdadero": ["real"],
+    "falso": ["irreal"],
+    "posible": ["factible"],
+    "imposible": ["inviable"],
+    "necesario": ["esencial"],
+    "disponible": ["accesible"],
+    "ocupado": ["atareado"],
+    "libre": ["gratuito"],
+    "lleno": ["completo"],
+    "vacío": ["hueco"]
+}
+
+def is_remote_source(source: str) -> bool:
+    """Check whether a source is an HTTP URL rather than a local file"""
+    return source.startswith(("http://", "https://"))
+
+def resolve_source(source: str, cache: Optional[ResponseCache] = None) -> str:
+    """Local file to read for a source, going through the response cache for URLs"""
+    if cache is not None and is_remote_source(source):
+        return cache.fetch(source)
+    return source
+
+def download_jlpt_data(source: str = API_BASE_URL,
+                       cache: Optional[ResponseCache] = None) -> List[Dict[str, Any]]:
+    """Download JLPT vocabulary data from API (or load it from a local file)"""
     print("Downloading JLPT vocabulary data...")
     try:
-        response = requests.get(API_BASE_URL, timeout=30)
-        response.raise_for_status()
-        data = response.json()
+        source = resolve_source(source, cache)
+        if is_remote_source(source):
+            response = requests.get(source, timeout=30)
+            response.raise_for_status()
+            data = response.json()
+        else:
+            with open(source, encoding='utf-8') as f:
+                data = json.load(f)
         print(f"Downloaded {len(data)} words")
         return data
     except Exception as e:
         print(f"Error downloading data: {e}")
         return []
 
+def read_source_chunks(source: str = API_BASE_URL,
+                       cache: Optional[ResponseCache] = None) -> Iterator[bytes]:
+    """Yield the raw JSON payload of a source in chunks, without buffering it whole"""
+    source = resolve_source(source, cache)
+    if is_remote_source(source):
+        with requests.get(source, timeout=30, stream=True) as response:
+            response.raise_for_status()
+            yield from response.iter_content(chunk_size=STREAM_CHUNK_SIZE)
+    else:
+        with open(source, 'rb') as f:
+            while True:
+                chunk = f.read(STREAM_CHUNK_SIZE)
+                if not chunk:
+                    break
+                yield chunk
+
+def iter_json_array(chunks: Iterable[bytes]) -> Iterator[Any]:
+    """
+    Incrementally parse a top-level JSON array, yielding one element at a time
+    Only the element currently being decoded is held in memory
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder('utf-8')()
+    chunks = iter(chunks)
+    buffer = ""
+    pos = 0
+    exhausted = False
+    started = False
+
+    def fill() -> bool:
+        nonlocal buffer, pos, exhausted
+        if exhausted:
+            return False
+        chunk = next(chunks, None)
+        if chunk is None:
+            exhausted = True
+            buffer = buffer[pos:] + utf8.decode(b"", final=True)
+        else:
+            buffer = buffer[pos:] + utf8.decode(chunk)
+        pos = 0
+        return True
+
+    while True:
+        # Skip whitespace and separators up to the next value
+        while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+            pos += 1
+        if pos == len(buffer):
+            if not fill():
+                raise ValueError("Unexpected end of JSON array")
+            continue
+
+        if not started:
+            if buffer[pos] != "[":
+                raise ValueError("Expected a JSON array of words")
+            started = True
+            pos += 1
+            continue
+        if buffer[pos] == "]":
+            return
+
+        try:
+            value, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            # Value continues in the next chunk
+            if not fill():
+                raise
+            continue
+        if end == len(buffer) and not exhausted:
+            # A number or literal may be cut short at a chunk boundary
+            fill()
+            continue
+        pos = end
+        yield value
+
+def stream_jlpt_data(source: str = API_BASE_URL,
+                     cache: Optional[ResponseCache] = None) -> Iterator[Dict[str, Any]]:
+    """Stream JLPT vocabulary records one by one from the API or a local file"""
+    print("Streaming JLPT vocabulary data...")
+    count = 0
+    for word in iter_json_array(read_source_chunks(source, cache)):
+        count += 1
+        yield word
+    print(f"Streamed {count} words")
+
+# Phrase rules are matched on whole tokens: runs of word characters or a
+# single non-word character (space, comma, apostrophe...)
+_TOKEN_RE = re.compile(r"\w+|\W")
+_PHRASE_END = None
+
+class Translator:
+    """
+    Dictionary translator compiled once from the word and phrase tables
+    Words are looked up one by one, then phrase rules are applied to the
+    word-by-word result in a single pass over a token trie, always taking
+    the longest phrase that starts at the current token
+    """
+
+    def __init__(self, words: Dict[str, str], phrases: List[Tuple[str, str]]):
+        self.words = dict(words)
+        self.phrases = list(phrases)
+        self._trie: Dict[Any, Any] = {}
+        for phrase, replacement in self.phrases:
+            node = self._trie
+            for token in _TOKEN_RE.findall(phrase):
+                node = node.setdefault(token, {})
+            # Earlier rules win, as with the old chain of replace() calls
+            node.setdefault(_PHRASE_END, replacement)
+
+    def translate(self, english_text: str) -> str:
+        """Translate one English meaning"""
+        if not english_text:
+            return ""
+
+        text = english_text.lower().strip()
+        return self.translate_normalized(text, text.split())
+
+    def translate_normalized(self, text: str, tokens: List[str]) -> str:
+        """Translate a meaning already lowercased, stripped and split on whitespace"""
+        # Handle common patterns
+        translation = self.words.get(text)
+        if translation is not None:
+            return translation
+
+        # Handle multi-word phrases; unknown words are kept as-is
+        words = self.words
+        result = " ".join([words.get(word, word) for word in tokens])
+        return self.apply_phrases(result)
+
+    def apply_phrases(self, text: str) -> str:
+        """Replace phrase rules in text with greedy longest matching"""
+        trie = self._trie
+        tokens = _TOKEN_RE.findall(text)
+        # Most texts contain no phrase at all
+        if trie.keys().isdisjoint(tokens):
+            return text
+
+        output = []
+        i = 0
+        count = len(tokens)
+        while i < count:
+            node = trie.get(tokens[i])
+            if node is None:
+                output.append(tokens[i])
+                i += 1
+                continue
+
+            match_end, replacement = 0, None
+            j = i + 1
+            while True:
+                if _PHRASE_END in node:
+                    match_end, replacement = j, node[_PHRASE_END]
+                if j == count:
+                    break
+                node = node.get(tokens[j])
+                if node is None:
+                    break
+                j += 1
+
+            if replacement is None:
+                output.append(tokens[i])
+                i += 1
+            else:
+                output.append(replacement)
+                i = match_end
+        return "".join(output)
+
+TRANSLATOR = Translator(WORD_TRANSLATIONS, PHRASE_TRANSLATIONS)
+
+# Remote backend (--translator http) and the translations it prefetched for
+# this run, keyed by normalized meaning; None means the dictionary translator
+TRANSLATION_SERVICE: Optional[TranslationService] = None
+TRANSLATION_MEMO: Dict[str, str] = {}
+
 def translate_english_to_spanish(english_text: str) -> str:
     """
     Simple translation using common patterns and dictionary
-    For production, use a proper translation API
-    """
-    # Basic translation dictionary for common words
-    translations = {
-        # Nouns
-        "student": "estudiante",
-        "teacher": "profesor", 
-        "school": "escuela",
-        "language": "idioma",
-        "time": "tiempo",
-        "day": "día",
-        "year": "año",
-        "person": "persona",
-        "place": "lugar",
-        "thing": "cosa",
-        "water": "agua",
-        "food": "comida",
-        "house": "casa",
-        "car": "coche",
-        "book": "libro",
-        "friend": "amigo",
-        "family": "familia",
-        "work": "trabajo",
-        "money": "dinero",
-        "problem": "problema",
-        "answer": "respuesta",
-        "question": "pregunta",
-        "idea": "idea",
-        "word": "palabra",
-        "name": "nombre",
-        "number": "número",
-        "color": "color",
-        "size": "tamaño",
-        "shape": "forma",
-        "material": "material",
-        "quality": "calidad",
-        "price": "precio",
-        "value": "valor",
-        "result": "resultado",
-        "reason": "razón",
-        "purpose": "propósito",
-        "method": "método",
-        "way": "camino",
-        "direction": "dirección",
-        "position": "posición",
-        "condition": "condición",
-        "situation": "situación",
-        "moment": "momento",
-        "period": "período",
-        "season": "estación",
-        "weather": "clima",
-        "nature": "naturaleza",
-        "environment": "ambiente",
-        "society": "sociedad",
-        "culture": "cultura",
-        "history": "historia",
-        "future": "futuro",
-        "past": "pasado",
-        "present": "presente",
-        
-        # Verbs
-        "eat": "comer",
-        "drink": "beber", 
-        "sleep": "dormir",
-        "wake up": "despertarse",
-        "work": "trabajar",
-        "study": "estudiar",
-        "learn": "aprender",
-        "teach": "enseñar",
-        "speak": "hablar",
-        "listen": "escuchar",
-        "read": "leer",
-        "write": "escribir",
-        "see": "ver",
-        "watch": "mirar",
-        "look": "mirar",
-        "think": "pensar",
-        "know": "saber",
-        "understand": "entender",
-        "remember": "recordar",
-        "forget": "olvidar",
-        "love": "amar",
-        "like": "gustar",
-        "hate": "odiar",
-        "want": "querer",
-        "need": "necesitar",
-        "have": "tener",
-        "do": "hacer",
-        "make": "hacer",
-        "give": "dar",
-        "take": "tomar",
-        "come": "venir",
-        "go": "ir",
-        "return": "volver",
-        "stop": "parar",
-        "start": "empezar",
-        "continue": "continuar",
-        "finish": "terminar",
-        "help": "ayudar",
-        "try": "intentar",
-        "buy": "comprar",
-        "sell": "vender",
-        "open": "abrir",
-        "close": "cerrar",
-        "turn on": "encender",
-        "turn off": "apagar",
-        "move": "mover",
-        "change": "cambiar",
-        "play": "jugar",
-        "sing": "cantar",
-        "dance": "bailar",
-        "run": "correr",
-        "walk": "caminar",
-        "sit": "sentarse",
-        "stand": "levantarse",
-        
-        # Adjectives
-        "good": "bueno",
-        "bad": "malo",
-        "big": "grande",
-        "small": "pequeño",
-        "long": "largo",
-        "short": "corto",
-        "high": "alto",
-        "low": "bajo",
-        "hot": "caliente",
-        "cold": "frío",
-        "warm": "tibio",
-        "cool": "fresco",
-        "new": "nuevo",
-        "old": "viejo",
-        "young": "joven",
-        "easy": "fácil",
-        "difficult": "difícil",
-        "hard": "duro",
-        "soft": "suave",
-        "heavy": "pesado",
-        "light": "ligero",
-        "fast": "rápido",
-        "slow": "lento",
-        "clean": "limpio",
-        "dirty": "sucio",
-        "beautiful": "hermoso",
-        "ugly": "feo",
-        "expensive": "caro",
-        "cheap": "barato",
-        "important": "importante",
-        "interesting": "interesante",
-        "boring": "aburrido",
-        "happy": "feliz",
-        "sad": "triste",
-        "angry": "enojado",
-        "surprised": "sorprendido",
-        "excited": "emocionado",
-        "tired": "cansado",
-        "sick": "enfermo",
-        "healthy": "saludable",
-        "strong": "fuerte",
-        "weak": "débil",
-        "right": "correcto",
-        "wrong": "incorrecto",
-        "true": "verdadero",
-        "false": "falso",
-        "possible": "posible",
-        "impossible": "imposible",
-        "necessary": "necesario",
-        "available": "disponible",
-        "busy": "ocupado",
-        "free": "libre",
-        "full": "lleno",
-        "empty": "vacío",
-        "red": "rojo",
-        "blue": "azul",
-        "green": "verde",
-        "yellow": "amarillo",
-        "black": "negro",
-        "white": "blanco",
-        "gray": "gris",
-        "brown": "marrón",
-        "pink": "rosa",
-        "purple": "púrpura",
-        "orange": "naranja",
-        
-        # Adverbs
-        "very": "muy",
-        "quite": "bastante",
-        "too": "demasiado",
-        "enough": "suficiente",
-        "always": "siempre",
-        "never": "nunca",
-        "sometimes": "a veces",
-        "often": "a menudo",
-        "rarely": "raramente",
-        "usually": "generalmente",
-        "here": "aquí",
-        "there": "allí",
-        "everywhere": "en todas partes",
-        "now": "ahora",
-        "then": "entonces",
-        "today": "hoy",
-        "tomorrow": "mañana",
-        "yesterday": "ayer",
-        "soon": "pronto",
-        "later": "después",
-        "early": "temprano",
-        "late": "tarde",
-        "well": "bien",
-        "badly": "mal",
-        "quickly": "rápidamente",
-        "slowly": "lentamente",
-        "carefully": "cuidadosamente",
-        "easily": "fácilmente",
-        "hard": "difícilmente",
-        
-        # Prepositions/Conjunctions
-        "and": "y",
-        "or": "o",
-        "but": "pero",
-        "because": "porque",
-        "so": "así que",
-        "if": "si",
-        "when": "cuando",
-        "where": "donde",
-        "how": "cómo",
-        "what": "qué",
-        "who": "quién",
-        "which": "cuál",
-        "why": "por qué",
-        "with": "con",
-        "without": "sin",
-        "for": "para",
-        "from": "de",
-        "to": "a",
-        "at": "en",
-        "on": "en",
-        "in": "en",
-        "by": "por",
-        "about": "acerca de",
-        "over": "sobre",
-        "under": "debajo",
-        "between": "entre",
-        "among": "entre",
-        "through": "a través de",
-        "during": "durante",
-        "before": "antes",
-        "after": "después",
-        
-        # Common phrases
-        "hello": "hola",
-        "goodbye": "adiós",
-        "thank you": "gracias",
-        "please": "por favor",
-        "sorry": "lo siento",
-        "excuse me": "disculpe",
-        "yes": "sí",
-        "no": "no",
-        "maybe": "quizás",
-        "of course": "por supuesto",
-        "I don't know": "no sé",
-        "I understand": "entiendo",
-        "I don't understand": "no entiendo"
-    }
-    
-    # Clean the input text
-    if not english_text:
-        return ""
-    
-    text = english_text.lower().strip()
-    
-    # Handle common patterns
-    if text in translations:
-        return translations[text]
-    
-    # Handle multi-word phrases
-    words = text.split()
-    translated_words = []
-    for word in words:
-        if word in translations:
-            translated_words.append(translations[word])
-        else:
-            # For unknown words, return as-is (could be improved with proper API)
-            translated_words.append(word)
-    
-    result = " ".join(translated_words)
-    
-    # Common patterns cleanup
-    result = result.replace("every morning", "cada mañana")
-    result = result.replace("good morning", "buenos días") 
-    result = result.replace("good afternoon", "buenas tardes")
-    result = result.replace("good evening", "buenas noches")
-    result = result.replace("good night", "buenas noches")
-    result = result.replace("thank you", "gracias")
-    result = result.replace("excuse me", "disculpe")
-    result = result.replace("i see", "entiendo")
-    result = result.replace("of course", "por supuesto")
-    result = result.replace("for example", "por ejemplo")
-    result = result.replace("in general", "en general")
-    result = result.replace("at first", "al principio")
-    result = result.replace("at last", "finalmente")
-    result = result.replace("at least", "al menos")
-    result = result.replace("at most", "como máximo")
-    result = result.replace("as soon as", "tan pronto como")
-    result = result.replace("as long as", "siempre que")
-    result = result.replace("as far as", "en cuanto a")
-    result = result.replace("as well as", "así como")
-    result = result.replace("even if", "incluso si")
-    result = result.replace("even though", "aunque")
-    result = result.replace("in order to", "para")
-    result = result.replace("so that", "para que")
-    result = result.replace("such as", "como")
-    result = result.replace("instead of", "en lugar de")
-    result = result.replace("because of", "debido a")
-    result = result.replace("in spite of", "a pesar de")
-    result = result.replace("according to", "según")
-    result = result.replace("in front of", "delante de")
-    result = result.replace("in back of", "detrás de")
-    result = result.replace("next to", "al lado de")
-    result = result.replace("far from", "lejos de")
-    result = result.replace("near to", "cerca de")
-    result = result.replace("out of", "fuera de")
-    result = result.replace("inside of", "dentro de")
-    result = result.replace("on top of", "encima de")
-    result = result.replace("underneath of", "debajo de")
-    result = result.replace("all right", "bien")
-    result = result.replace("no problem", "no hay problema")
-    result = result.replace("no way", "de ninguna manera")
-    result = result.replace("let's see", "veamos")
-    result = result.replace("that's right", "correcto")
-    
-    return result
+    Meanings prefetched from a translation backend take precedence
+    """
+    if TRANSLATION_MEMO:
+        translation = TRANSLATION_MEMO.get(translation_backend.normalize_text(english_text))
+        if translation is not None:
+            return translation
+    return TRANSLATOR.translate(english_text)
+
+_MEANING_TOKEN_RE = re.compile(r"[^\W\d_]+")
+
+def untranslated_tokens(english_text: str, spanish_text: str) -> Tuple[int, int]:
+    """
+    Word tokens of an English meaning, and how many of them were carried
+    over unchanged into its translation (i.e. were not translated)
+    """
+    tokens = _MEANING_TOKEN_RE.findall(english_text.lower())
+    if not tokens:
+        return 0, 0
+    kept = set(_MEANING_TOKEN_RE.findall(spanish_text.lower()))
+    return len(tokens), sum(token in kept for token in tokens)
+
+def prefetch_translations(words: List[Dict[str, Any]]):
+    """Translate the meanings of words in deduplicated batches through TRANSLATION_SERVICE"""
+    if TRANSLATION_SERVICE is None or not words:
+        return
+    TRANSLATION_MEMO.update(TRANSLATION_SERVICE.translate_many(word.get('meaning') or '' for word in words))
+
+def used_fallback_translation(word: Dict[str, Any]) -> bool:
+    """
+    Whether the word's meaning came from the dictionary fallback because its
+    backend batch failed; such output must not be remembered as the backend's
+    """
+    if TRANSLATION_SERVICE is None or not TRANSLATION_SERVICE.fallback_keys:
+        return False
+    return translation_backend.normalize_text(word.get('meaning') or '') in TRANSLATION_SERVICE.fallback_keys
+
+class WordTypeClassifier:
+    """
+    Part-of-speech guesser compiled once from WORD_TYPE_PATTERNS
+    Patterns of the form "<kana>$" become a suffix table looked up with the
+    word's ending; ".*" is the default. With use_gloss, an English meaning
+    starting with "to " marks a verb, and a verb-like ending without one
+    (nouns ending in る, う, ...) falls back to the default
+    """
+
+    def __init__(self, patterns: Dict[str, List[str]] = WORD_TYPE_PATTERNS, use_gloss: bool = False):
+        self.use_gloss = use_gloss
+        self.default = "sustantivo"
+        self.suffixes: Dict[str, str] = {}
+        for word_type, type_patterns in patterns.items():
+            for pattern in type_patterns:
+                if pattern == r".*":
+                    self.default = word_type
+                elif pattern.endswith("$") and pattern[:-1] and re.escape(pattern[:-1]) == pattern[:-1]:
+                    # Earlier types win, as with the old pattern loop
+                    self.suffixes.setdefault(pattern[:-1], word_type)
+                else:
+                    raise ValueError(f"Unsupported word type pattern: {pattern!r}")
+        self.suffix_lengths = sorted({len(suffix) for suffix in self.suffixes}, reverse=True)
+
+    def classify(self, japanese_word: str, meaning: str = "") -> str:
+        """Word type for one word"""
+        suffixes = self.suffixes
+        word_type = self.default
+        for length in self.suffix_lengths:
+            found = suffixes.get(japanese_word[-length:])
+            if found is not None:
+                word_type = found
+                break
+
+        if self.use_gloss and meaning:
+            if meaning.lstrip().lower().startswith("to "):
+                return "verbo"
+            if word_type == "verbo":
+                return self.default
+        return word_type
+
+    def classify_many(self, words: Iterable[Tuple[str, str]]) -> List[str]:
+        """Word types for (japanese_word, meaning) pairs"""
+        classify = self.classify
+        return [classify(japanese_word, meaning) for japanese_word, meaning in words]
+
+WORD_TYPE_CLASSIFIER = WordTypeClassifier()
 
 def determine_word_type(japanese_word: str, meaning: str) -> str:
     """Determine word type based on patterns"""
-    japanese_lower = japanese_word.lower()
-    
-    # Check verb patterns
-    for pattern in WORD_TYPE_PATTERNS["verbo"]:
-        if re.search(pattern, japanese_lower):
-            return "verbo"
-    
-    # Check adjective patterns  
-    for pattern in WORD_TYPE_PATTERNS["adjetivo"]:
-        if re.search(pattern, japanese_lower):
-            return "adjetivo"
-    
-    # Default to noun
-    return "sustantivo"
+    return WORD_TYPE_CLASSIFIER.classify(japanese_word, meaning)
+
+_GLOSS_SEPARATOR_RE = re.compile(r"\s*[,;/]\s*")
+
+class SynonymIndex:
+    """
+    Synonym lookups precomputed from SYNONYM_MAP
+    The table is closed under symmetry (alumno -> estudiante) and
+    transitivity (carro -> coche -> automóvil) once, so each gloss is a
+    single dict lookup. Direct synonyms come first, in table order
+    """
+
+    def __init__(self, table: Dict[str, List[str]]):
+        graph: Dict[str, List[str]] = {}
+
+        def link(word: str, synonym: str):
+            neighbours = graph.setdefault(word, [])
+            if synonym != word and synonym not in neighbours:
+                neighbours.append(synonym)
+
+        for word, synonyms in table.items():
+            for synonym in synonyms:
+                link(word, synonym)
+        for word, synonyms in table.items():
+            for synonym in synonyms:
+                link(synonym, word)
+
+        # Breadth-first, so nearer synonyms are listed before farther ones
+        self.synonyms: Dict[str, Tuple[str, ...]] = {}
+        for word in graph:
+            seen = {word}
+            order = []
+            queue = [word]
+            for current in queue:
+                for neighbour in graph[current]:
+                    if neighbour not in seen:
+                        seen.add(neighbour)
+                        order.append(neighbour)
+                        queue.append(neighbour)
+            self.synonyms[word] = tuple(order)
+
+    @staticmethod
+    def glosses(translation: str) -> List[str]:
+        """Split a multi-gloss translation ("estudiante, alumno") into its glosses"""
+        return [gloss for gloss in _GLOSS_SEPARATOR_RE.split(translation) if gloss]
+
+    def expand(self, translation: str, source: str = "") -> List[str]:
+        """
+        The translation followed by the synonyms of each of its glosses
+        Glosses copied unchanged from the English source ("sword, saber")
+        are untranslated words, not Spanish, and get no synonyms
+        """
+        synonyms = self.synonyms.get(translation)
+        if synonyms is not None:
+            return [translation, *synonyms]
+
+        result = [translation]
+        if "," not in translation and ";" not in translation and "/" not in translation:
+            return result
+        glosses = self.glosses(translation)
+        if self.synonyms.keys().isdisjoint(glosses):
+            return result
+        seen = set(glosses)
+        untranslated = set(self.glosses(source.lower())) if source else set()
+        for gloss in glosses:
+            if gloss in untranslated:
+                continue
+            for synonym in self.synonyms.get(gloss, ()):
+                if synonym not in seen:
+                    seen.add(synonym)
+                    result.append(synonym)
+        return result
+
+    def expand_many(self, translations: Iterable[str], sources: Optional[Iterable[str]] = None) -> List[List[str]]:
+        """Batch form of expand"""
+        if sources is None:
+            return [self.expand(translation) for translation in translations]
+        return [self.expand(translation, source) for translation, source in zip(translations, sources)]
+
+SYNONYM_INDEX = SynonymIndex(SYNONYM_MAP)
+
+# Output languages besides Spanish (--target). process_word_data carries
+# their glosses under TARGETS_KEY until the outputs are split per language
+TARGETS_KEY = "_targets"
+
+class TargetLanguage:
+    """
+    Table set for one more output language
+    Compiled once like the Spanish tables: a Translator over its word and
+    phrase tables, a SynonymIndex over its synonym table, plus names for the
+    word types (which the classifier gives in Spanish)
+    """
+
+    def __init__(self, code: str, field: str, words: Dict[str, str], phrases: List[Tuple[str, str]] = (),
+                 synonyms: Optional[Dict[str, List[str]]] = None, type_names: Optional[Dict[str, str]] = None,
+                 name: str = "", description: str = ""):
+        self.code = code
+        self.field = field
+        self.name = name or code
+        self.description = description or f"{{total_words}} JLPT N5-N1 words by level with {self.name} translations"
+        self.translator = Translator(words, [tuple(rule) for rule in phrases])
+        self.synonym_table = dict(synonyms or {})
+        self.synonym_index = SynonymIndex(self.synonym_table)
+        self.type_names = dict(type_names or {})
+
+    def tables(self) -> List[Any]:
+        """Everything this language's output depends on, for fingerprints"""
+        return [self.code, self.field, self.translator.words, self.translator.phrases,
+                self.synonym_table, self.type_names]
+
+    def project(self, word: Dict[str, Any]) -> Dict[str, Any]:
+        """A processed word as this language's entry: its glosses in place of the Spanish ones"""
+        entry = {}
+        for key, value in word.items():
+            if key == "español":
+                entry[self.field] = word[TARGETS_KEY][self.code]
+            elif key == "type":
+                entry[key] = self.type_names.get(value, value)
+            elif key != TARGETS_KEY:
+                entry[key] = value
+        return entry
+
+def load_target_language(path: str) -> TargetLanguage:
+    """
+    Read a table set from JSON:
+    {"code": "pt", "field": "português", "words": {"water": "água", ...},
+     "phrases": [["to eat", "comer"], ...], "synonyms": {"carro": ["automóvel"]},
+     "type_names": {"sustantivo": "substantivo", ...}, "name": "Portuguese",
+     "description": "{total_words} palavras JLPT ..."}
+    Only code, field and words are required
+    """
+    with open(path, encoding='utf-8') as f:
+        tables = json.load(f)
+    missing = [key for key in ("code", "field", "words") if key not in tables]
+    if missing:
+        raise ValueError(f"missing {', '.join(missing)}")
+    return TargetLanguage(tables['code'], tables['field'], tables['words'], tables.get('phrases', []),
+                          tables.get('synonyms'), tables.get('type_names'), tables.get('name', ""),
+                          tables.get('description', ""))
+
+TARGET_LANGUAGES: List[TargetLanguage] = []
+
+def strip_targets(word: Dict[str, Any]) -> Dict[str, Any]:
+    """The Spanish entry of a processed word, without the other languages' glosses"""
+    if TARGETS_KEY not in word:
+        return word
+    return {key: value for key, value in word.items() if key != TARGETS_KEY}
 
 def convert_jlpt_level(level: int) -> str:
     """Convert numeric level to JLPT format"""
-    level_mapping = {
-        1: "N1",
-        2: "N2", 
-        3: "N3",
-        4: "N4",
-        5: "N5"
-    }
-    return level_mapping.get(level, "N5")
+    return JLPT_LEVEL_NAMES.get(level, "N5")
 
-def select_words_by_level(words: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-    """Select words according to level distribution"""
-    selected_words = []
-    words_by_level = {}
-    
-    # Group words by level
-    for word in words:
-        level = convert_jlpt_level(word.get('level', 5))
-        if level not in words_by_level:
-            words_by_level[level] = []
-        words_by_level[level].append(word)
-    
-    # Select words according to distribution
-    for level, target_count in LEVEL_DISTRIBUTION.items():
-        level_words = words_by_level.get(level, [])
-        available = min(len(level_words), target_count)
-        
-        # Take first N words from each level
-        selected_words.extend(level_words[:available])
-        print(f"Selected {available} words for level {level}")
-    
-    # If we have fewer than TARGET_WORDS, add more from available levels
-    if len(selected_words) < TARGET_WORDS:
-        remaining_needed = TARGET_WORDS - len(selected_words)
-        print(f"Need {remaining_needed} more words to reach target...")
-        
-        # Add more words from levels that have availability
-        for level in ["N5", "N4", "N3", "N2", "N1"]:
-            level_words = words_by_level.get(level, [])
-            already_selected = len([w for w in selected_words if convert_jlpt_level(w.get('level', 5)) == level])
-            available_more = min(len(level_words) - already_selected, remaining_needed)
-            
-            if available_more > 0:
-                start_index = already_selected
-                end_index = start_index + available_more
-                selected_words.extend(level_words[start_index:end_index])
-                remaining_needed -= available_more
-                print(f"Added {available_more} more words for level {level}")
-                
-                if remaining_needed <= 0:
-                    break
-    
-    return selected_words
+def level_quotas(distribution: str, level_counts: Dict[str, int], target: int = TARGET_WORDS,
+                 weights: Optional[Dict[str, float]] = None) -> Dict[str, int]:
+    """
+    Number of words to take from each level, in LEVELS order
+    fixed uses LEVEL_DISTRIBUTION as-is; proportional follows how many words
+    each level has; weighted splits target by the given weights
+    """
+    if distribution == "fixed":
+        return {level: LEVEL_DISTRIBUTION.get(level, 0) for level in LEVELS}
+    if distribution == "proportional":
+        shares = {level: level_counts.get(level, 0) for level in LEVELS}
+    elif distribution == "weighted":
+        shares = {level: (weights or LEVEL_DISTRIBUTION).get(level, 0) for level in LEVELS}
+    else:
+        raise ValueError(f"Unknown distribution: {distribution}")
+
+    total = sum(shares.values())
+    if total <= 0:
+        return {level: 0 for level in LEVELS}
+    # Largest remainder rounding so the quotas add up to target exactly
+    exact = {level: target * share / total for level, share in shares.items()}
+    quotas = {level: int(value) for level, value in exact.items()}
+    leftover = target - sum(quotas.values())
+    for level in sorted(LEVELS, key=lambda level: quotas[level] - exact[level])[:leftover]:
+        quotas[level] += 1
+    return quotas
+
+class LevelSelector:
+    """
+    Single-pass word selection by JLPT level
+    Words are fed one at a time; each level keeps only the candidates that
+    selection can reach (no level ever contributes more than target words),
+    either the first ones or a seeded reservoir sample, plus its full count.
+    select() then fills the per-level quotas and tops up short levels using
+    per-level cursors, without rescanning what was already selected
+    """
+
+    def __init__(self, target: int = TARGET_WORDS, distribution: str = "fixed",
+                 sample: str = "first", seed: Optional[int] = None,
+                 weights: Optional[Dict[str, float]] = None):
+        if sample not in ("first", "random"):
+            raise ValueError(f"Unknown sampling mode: {sample}")
+        self.target = target
+        self.distribution = distribution
+        self.sample = sample
+        self.weights = weights
+        self.capacity = max([target] + list(LEVEL_DISTRIBUTION.values()))
+        self.counts = {level: 0 for level in LEVELS}
+        self.candidates: Dict[str, List[Dict[str, Any]]] = {level: [] for level in LEVELS}
+        # One generator per level, so a level's sample only depends on its own words
+        self.rngs = {level: random.Random(f"{seed}:{level}") for level in LEVELS}
+
+    def add(self, word: Dict[str, Any]):
+        """Feed one source word"""
+        level = JLPT_LEVEL_NAMES.get(word.get('level', 5), "N5")
+        seen = self.counts[level]
+        self.counts[level] = seen + 1
+        candidates = self.candidates[level]
+        if seen < self.capacity:
+            candidates.append(word)
+        elif self.sample == "random":
+            slot = self.rngs[level].randrange(seen + 1)
+            if slot < self.capacity:
+                candidates[slot] = word
+
+    def extend(self, words: Iterable[Dict[str, Any]]):
+        """Feed many source words (same as add() per word, with lookups hoisted)"""
+        counts = self.counts
+        candidates = self.candidates
+        capacity = self.capacity
+        level_names = JLPT_LEVEL_NAMES
+        for word in words:
+            level = level_names.get(word.get('level', 5), "N5")
+            seen = counts[level]
+            counts[level] = seen + 1
+            if seen < capacity:
+                candidates[level].append(word)
+            elif self.sample == "random":
+                slot = self.rngs[level].randrange(seen + 1)
+                if slot < capacity:
+                    candidates[level][slot] = word
+
+    def select(self) -> List[Dict[str, Any]]:
+        """Selected words: each level's quota in LEVELS order, then top-ups"""
+        if self.sample == "random":
+            for level in LEVELS:
+                self.rngs[level].shuffle(self.candidates[level])
+
+        quotas = level_quotas(self.distribution, self.counts, self.target, self.weights)
+        selected_words = []
+        taken = {}
+
+        # Select words according to distribution
+        for level in LEVELS:
+            available = min(len(self.candidates[level]), quotas[level])
+            selected_words.extend(self.candidates[level][:available])
+            taken[level] = available
+            print(f"Selected {available} words for level {level}")
+
+        # If we have fewer than target, add more from levels that have availability
+        if len(selected_words) < self.target:
+            remaining_needed = self.target - len(selected_words)
+            print(f"Need {remaining_needed} more words to reach target...")
+
+            for level in LEVELS:
+                start_index = taken[level]
+                available_more = min(len(self.candidates[level]) - start_index, remaining_needed)
+
+                if available_more > 0:
+                    selected_words.extend(self.candidates[level][start_index:start_index + available_more])
+                    taken[level] += available_more
+                    remaining_needed -= available_more
+                    print(f"Added {available_more} more words for level {level}")
+
+                    if remaining_needed <= 0:
+                        break
+
+        return selected_words
+
+def select_words_by_level(words: Iterable[Dict[str, Any]], **options) -> List[Dict[str, Any]]:
+    """Select words according to level distribution (see LevelSelector for options)"""
+    selector = LevelSelector(**options)
+    selector.extend(words)
+    return selector.select()
+
+def select_words_streaming(words: Iterable[Dict[str, Any]], **options) -> List[Dict[str, Any]]:
+    """
+    Select words from a stream according to level distribution
+    LevelSelector is single-pass and bounded, so this is the same selection
+    """
+    return select_words_by_level(words, **options)
+
+def source_kana(word: Dict[str, Any]) -> Optional[str]:
+    """The source's kana reading of a word: its furigana, or the word itself when written in kana"""
+    for reading in (word.get('furigana'), word.get('word')):
+        if reading and transliterate.is_kana(reading):
+            return reading
+    return None
+
+def complete_readings(words: List[Dict[str, Any]],
+                      metrics: Optional[PipelineMetrics] = None) -> List[Dict[str, Any]]:
+    """
+    Fill in missing kana and romaji of the selected words and cross-check the rest
+    Furigana that is missing or not kana (the API sometimes repeats the
+    romaji there) is replaced by the source's kana, or else transliterated
+    from the romaji, in one batch pass per direction. Records that change
+    are copies
+    """
+    metrics = metrics or PipelineMetrics()
+    transliterator = transliterate.TRANSLITERATOR
+    completed = list(words)
+    readings = [source_kana(word) for word in words]
+
+    needs_kana = [i for i, reading in enumerate(readings) if reading is None and words[i].get('romaji')]
+    for i, reading in zip(needs_kana, transliterator.romaji_to_kana_many(words[i]['romaji'] for i in needs_kana)):
+        readings[i] = reading
+    needs_romaji = [i for i, reading in enumerate(readings) if reading and not words[i].get('romaji')]
+    romaji = dict(zip(needs_romaji, transliterator.kana_to_romaji_many(readings[i] for i in needs_romaji)))
+
+    filled_kana = 0
+    for i, (word, reading) in enumerate(zip(words, readings)):
+        if reading and (reading != word.get('furigana') or i in romaji):
+            filled_kana += reading != word.get('furigana')
+            completed[i] = {**word, 'furigana': reading, 'romaji': romaji.get(i, word.get('romaji'))}
 
-def process_word_data(word: Dict[str, Any]) -> Dict[str, Any]:
-    """Process individual word data to target format"""
+    # Only readings that came with the source can disagree with its romaji
+    given = [i for i in range(len(words)) if i not in romaji and readings[i] and i not in needs_kana]
+    derived = transliterator.kana_to_romaji_many(readings[i] for i in given)
+    mismatches = [(readings[i], words[i]['romaji'], spelling) for i, spelling in zip(given, derived)
+                  if transliterate.fold_romaji(spelling) != transliterate.fold_romaji(words[i]['romaji'])]
+
+    metrics.count("kana_filled", filled_kana)
+    metrics.count("romaji_filled", len(romaji))
+    metrics.count("reading_mismatches", len(mismatches))
+    print(f"Readings: filled {filled_kana} kana and {len(romaji)} romaji,"
+          f" {len(mismatches)} kana/romaji pairs disagree")
+    for reading, given_romaji, spelling in list(dict.fromkeys(mismatches))[:5]:
+        print(f"  {reading}: source romaji {given_romaji!r}, kana reads {spelling!r}")
+    return completed
+
+def process_word_data(word: Dict[str, Any], targets: Optional[List[TargetLanguage]] = None) -> Dict[str, Any]:
+    """
+    Process individual word data to target format
+    The record is parsed, its meaning normalized and tokenized and its type
+    classified once; each extra language in targets (TARGET_LANGUAGES by
+    default) only adds its own table lookups, kept under TARGETS_KEY
+    """
     # Get basic information
     kanji = word.get('word', '')
     kana = word.get('furigana', '') or word.get('romaji', '')
     romaji = word.get('romaji', '')
     english_meaning = word.get('meaning', '')
     level = convert_jlpt_level(word.get('level', 5))
-    
-    # Translate to Spanish
-    spanish_meaning = translate_english_to_spanish(english_meaning)
-    
-    # Create Spanish translations array (add synonyms if possible)
-    spanish_translations = [spanish_meaning]
-    
-    # Add some common synonyms for basic words
-    synonym_map = {
-        "estudiante": ["alumno"],
-        "profesor": ["maestro"], 
-        "escuela": ["colegio"],
-        "casa": ["hogar"],
-        "coche": ["carro", "automóvil"],
-        "libro": ["tomo"],
-        "trabajo": ["empleo"],
-        "dinero": ["capital"],
-        "problema": ["dificultad"],
-        "respuesta": ["solución"],
-        "pregunta": ["consulta"],
-        "camino": ["ruta", "sendero"],
-        "dirección": ["orientación"],
-        "método": ["técnica"],
-        "razón": ["motivo"],
-        "propósito": ["objetivo"],
-        "momento": ["instante"],
-        "período": ["época"],
-        "estación": ["temporada"],
-        "clima": ["tiempo"],
-        "ambiente": ["entorno"],
-        "sociedad": ["comunidad"],
-        "cultura": ["civilización"],
-        "historia": ["pasado"],
-        "futuro": ["porvenir"],
-        "presente": ["actualidad"],
-        "comer": ["alimentarse"],
-        "beber": ["tomar"],
-        "dormir": ["descansar"],
-        "trabajar": ["laborar"],
-        "estudiar": ["aprender"],
-        "enseñar": ["instruir"],
-        "hablar": ["conversar"],
-        "escuchar": ["oír"],
-        "ver": ["mirar", "observar"],
-        "pensar": ["reflexionar"],
-        "saber": ["conocer"],
-        "entender": ["comprender"],
-        "recordar": ["acordarse"],
-        "querer": ["desear"],
-        "necesitar": ["requerir"],
-        "hacer": ["realizar", "efectuar"],
-        "dar": ["entregar"],
-        "tomar": ["coger"],
-        "venir": ["llegar"],
-        "ir": ["marchar"],
-        "volver": ["regresar"],
-        "parar": ["detener"],
-        "empezar": ["comenzar"],
-        "terminar": ["acabar", "finalizar"],
-        "ayudar": ["asistir"],
-        "intentar": ["tratar"],
-        "comprar": ["adquirir"],
-        "vender": ["comerciar"],
-        "abrir": ["abrirse"],
-        "cerrar": ["cerrarse"],
-        "mover": ["desplazar"],
-        "cambiar": ["modificar"],
-        "jugar": ["jugarse"],
-        "correr": ["correrse"],
-        "caminar": ["andar"],
-        "sentarse": ["sentar"],
-        "levantarse": ["levantar"],
-        "bueno": ["excelente"],
-        "malo": ["pésimo"],
-        "grande": ["enorme"],
-        "pequeño": ["diminuto"],
-        "largo": ["extenso"],
-        "corto": ["breve"],
-        "alto": ["elevado"],
-        "bajo": ["inferior"],
-        "nuevo": ["novedoso"],
-        "viejo": ["anciano"],
-        "fácil": ["sencillo"],
-        "difícil": ["complicado"],
-        "duro": ["rígido"],
-        "suave": ["blando"],
-        "pesado": ["ponderado"],
-        "ligero": ["liviano"],
-        "rápido": ["veloz"],
-        "lento": ["perezoso"],
-        "limpio": ["puro"],
-        "sucio": ["inmundo"],
-        "hermoso": ["bello"],
-        "feo": ["horrible"],
-        "caro": ["costoso"],
-        "barato": ["económico"],
-        "importante": ["relevante"],
-        "interesante": ["fascinante"],
-        "aburrido": ["tedioso"],
-        "feliz": ["contento"],
-        "triste": ["afligido"],
-        "enojado": ["furioso"],
-        "cansado": ["fatigado"],
-        "enfermo": ["enfermo"],
-        "saludable": ["sano"],
-        "fuerte": ["robusto"],
-        "débil": ["frágil"],
-        "correcto": ["adecuado"],
-        "incorrecto": ["equivocado"],
-        "verdadero": ["real"],
-        "falso": ["irreal"],
-        "posible": ["factible"],
-        "imposible": ["inviable"],
-        "necesario": ["esencial"],
-        "disponible": ["accesible"],
-        "ocupado": ["atareado"],
-        "libre": ["gratuito"],
-        "lleno": ["completo"],
-        "vacío": ["hueco"]
-    }
-    
-    if spanish_meaning in synonym_map:
-        spanish_translations.extend(synonym_map[spanish_meaning])
-    
+    text = (english_meaning or '').lower().strip()
+    tokens = text.split()
+
+    # Translate to Spanish (meanings prefetched from a backend take precedence)
+    spanish_meaning = TRANSLATION_MEMO.get(text) if TRANSLATION_MEMO else None
+    if spanish_meaning is None:
+        spanish_meaning = TRANSLATOR.translate_normalized(text, tokens)
+
+    # Create Spanish translations array, adding synonyms of each gloss
+    spanish_translations = SYNONYM_INDEX.expand(spanish_meaning, english_meaning)
+
     # Determine word type
     word_type = determine_word_type(kanji, english_meaning)
-    
-    return {
+
+    processed_word = {
         "kanji": kanji,
         "kana": kana,
         "romaji": romaji,
@@ -594,74 +1150,815 @@ def process_word_data(word: Dict[str, Any]) -> Dict[str, Any]:
         "level": level,
         "type": word_type
     }
+    targets = TARGET_LANGUAGES if targets is None else targets
+    if targets:
+        processed_word[TARGETS_KEY] = {
+            target.code: target.synonym_index.expand(target.translator.translate_normalized(text, tokens),
+                                                     english_meaning)
+            for target in targets
+        }
+    return processed_word
 
-def main():
-    """Main processing function"""
+def _hash_json(value: Any) -> str:
+    payload = json.dumps(value, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+class BuildManifest:
+    """
+    Persisted map from source record to processed output
+    Each entry is fingerprinted by the hash of its source record plus the hash
+    of the table entries it used: the word-table keys its meaning looks up,
+    the synonym sets of its translation's glosses, and the (small) phrase and word type
+    tables as a whole. Editing a table only invalidates the words that use
+    the edited entries
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        backend = TRANSLATION_SERVICE.backend.name if TRANSLATION_SERVICE else "dictionary"
+        self.shared_tables_hash = _hash_json([PHRASE_TRANSLATIONS, WORD_TYPE_PATTERNS,
+                                              WORD_TYPE_CLASSIFIER.use_gloss, backend,
+                                              *[[target.code, target.field, target.translator.phrases,
+                                                 target.type_names] for target in TARGET_LANGUAGES]])
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.used: Dict[str, Dict[str, Any]] = {}
+        self.reused = 0
+        self.recomputed = 0
+        try:
+            with open(path, encoding='utf-8') as f:
+                self.entries = json.load(f).get('entries', {})
+        except (OSError, ValueError):
+            pass
+
+    def tables_hash(self, word: Dict[str, Any], processed_word: Dict[str, Any]) -> str:
+        """Hash of the translation table entries a word's output depends on"""
+        text = (word.get('meaning') or '').lower().strip()
+        lookups = [text] + text.split()
+        translation = processed_word['español'][0]
+        glosses = [translation] + SYNONYM_INDEX.glosses(translation)
+        parts = [
+            self.shared_tables_hash,
+            [WORD_TRANSLATIONS.get(key) for key in lookups],
+            [SYNONYM_INDEX.synonyms.get(gloss) for gloss in glosses]
+        ]
+        # Same entries of each extra language's tables
+        targets = processed_word.get(TARGETS_KEY, {})
+        for target in TARGET_LANGUAGES:
+            translation = targets.get(target.code, [""])[0]
+            glosses = [translation] + SynonymIndex.glosses(translation)
+            parts.append([[target.translator.words.get(key) for key in lookups],
+                          [target.synonym_index.synonyms.get(gloss) for gloss in glosses]])
+        return _hash_json(parts)
+
+    def lookup(self, word: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Cached output for word, or None when its fingerprint changed"""
+        record_hash = _hash_json(word)
+        entry = self.entries.get(record_hash)
+        if entry is None or entry['tables'] != self.tables_hash(word, entry['output']):
+            return None
+        self.reused += 1
+        self.used[record_hash] = entry
+        return entry['output']
+
+    def store(self, word: Dict[str, Any], processed_word: Dict[str, Any], fresh: bool = True):
+        """Record output for word: freshly computed, or carried over from an interrupted run"""
+        self.recomputed += fresh
+        self.used[_hash_json(word)] = {"tables": self.tables_hash(word, processed_word), "output": processed_word}
+
+    def save(self):
+        """Persist the entries used by this run, dropping stale ones"""
+        with atomic_open(self.path) as f:
+            json.dump({"entries": self.used}, f, ensure_ascii=False)
+
+def _init_worker(words: Dict[str, str], phrases: List[Tuple[str, str]], use_gloss: bool,
+                 memo: Dict[str, str], targets: List[TargetLanguage]):
+    """Build the translator and word type classifier once per worker process"""
+    global TRANSLATOR, WORD_TYPE_CLASSIFIER, TARGET_LANGUAGES
+    TRANSLATOR = Translator(words, phrases)
+    WORD_TYPE_CLASSIFIER = WordTypeClassifier(WORD_TYPE_PATTERNS, use_gloss)
+    TRANSLATION_MEMO.update(memo)
+    TARGET_LANGUAGES = targets
+
+def _process_chunk(chunk: List[Dict[str, Any]]) -> List[Tuple[Optional[Dict[str, Any]], Optional[str]]]:
+    """Process a chunk of words in a worker, returning (output, error) per word"""
+    results = []
+    for word in chunk:
+        try:
+            results.append((process_word_data(word), None))
+        except Exception as e:
+            results.append((None, str(e)))
+    return results
+
+def _process_serial(words: List[Dict[str, Any]]) -> Iterator[Tuple[Optional[Dict[str, Any]], Optional[str]]]:
+    for word in words:
+        try:
+            yield process_word_data(word), None
+        except Exception as e:
+            yield None, str(e)
+
+def _process_parallel(words: List[Dict[str, Any]], workers: int,
+                      chunk_size: int) -> Iterator[Tuple[Optional[Dict[str, Any]], Optional[str]]]:
+    chunks = [words[start:start + chunk_size] for start in range(0, len(words), chunk_size)]
+    with concurrent.futures.ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker,
+            initargs=(TRANSLATOR.words, TRANSLATOR.phrases, WORD_TYPE_CLASSIFIER.use_gloss,
+                      TRANSLATION_MEMO, TARGET_LANGUAGES)) as executor:
+        # map() hands results back in submission order
+        for results in executor.map(_process_chunk, chunks):
+            yield from results
+
+def process_words(words: List[Dict[str, Any]], manifest: Optional[BuildManifest] = None,
+                  workers: int = 1, chunk_size: int = PROCESS_CHUNK_SIZE,
+                  metrics: Optional[PipelineMetrics] = None,
+                  checkpoint: Optional[ChunkLog] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Process selected words lazily, reporting progress and skipping failures
+    With workers > 1 the words missing from the manifest are processed in
+    chunks on a process pool; output order is the same as the serial path.
+    With a checkpoint log every finished chunk is recorded, and the chunks
+    it already holds from an interrupted run are replayed, not processed.
+    Words translated by the fallback after a failed backend batch are
+    neither stored in the manifest nor checkpointed
+    """
+    metrics = metrics or PipelineMetrics()
+    replayed = checkpoint.replay() if checkpoint is not None else {}
+    cached = [None if manifest is None or i in replayed else manifest.lookup(word)
+              for i, word in enumerate(words)]
+    pending = [word for i, (word, output) in enumerate(zip(words, cached)) if output is None and i not in replayed]
+    prefetch_translations(pending)
+    if workers > 1 and len(pending) > chunk_size:
+        results = _process_parallel(pending, workers, chunk_size)
+    else:
+        results = _process_serial(pending)
+
+    chunk_outputs: List[Optional[Dict[str, Any]]] = []
+    chunk_provisional = False
+    for i, (word, processed_word) in enumerate(zip(words, cached)):
+        error = None
+        if i in replayed:
+            processed_word = replayed[i]
+            if processed_word is None:
+                error = "failed before the run was interrupted"
+            elif manifest is not None:
+                manifest.store(word, processed_word, fresh=False)
+            metrics.count("resumed_words")
+        elif processed_word is None:
+            processed_word, error = next(results)
+            if error is None:
+                metrics.count("recomputed_words")
+            if error is None and used_fallback_translation(word):
+                # Not stored, so the next run asks the backend again
+                chunk_provisional = True
+                metrics.count("fallback_words")
+            elif error is None and manifest is not None:
+                manifest.store(word, processed_word)
+        else:
+            metrics.count("reused_words")
+
+        if checkpoint is not None and i not in replayed:
+            chunk_outputs.append(None if error is not None else processed_word)
+            if (i + 1) % checkpoint.chunk_size == 0 or i + 1 == len(words):
+                # A chunk holding fallback translations is processed again on resume
+                if not chunk_provisional:
+                    checkpoint.record(i + 1 - len(chunk_outputs), chunk_outputs)
+                chunk_outputs = []
+                chunk_provisional = False
+        if error is not None:
+            print(f"Error processing word {i}: {error}")
+            metrics.count("failed_words")
+            continue
+
+        tokens, untranslated = untranslated_tokens(word.get('meaning') or '', processed_word['español'][0])
+        metrics.count("meaning_tokens", tokens)
+        metrics.count("untranslated_tokens", untranslated)
+        metrics.count("processed_words")
+
+        # Progress indicator
+        if (i + 1) % 100 == 0:
+            print(f"Processed {i + 1}/{len(words)} words...")
+
+        yield processed_word
+
+def build_metadata(total_words: int, target: Optional[TargetLanguage] = None) -> Dict[str, Any]:
+    """Metadata block for the generated vocabulary file (or for one extra language's file)"""
+    metadata = {
+        "total_words": total_words,
+        "description": f"{total_words} palabras JLPT N5-N1 organizadas por nivel con traducciones al español",
+        "levels": ["N5", "N4", "N3", "N2", "N1"],
+        "last_updated": "2026-01-27",
+        "source": "JLPT Vocabulary API with Spanish translations"
+    }
+    if target is not None:
+        metadata.update({
+            "description": target.description.format(total_words=total_words),
+            "source": f"JLPT Vocabulary API with {target.name} translations",
+            "language": target.code
+        })
+    return metadata
+
+def write_output(path: str, processed_words: List[Dict[str, Any]]):
+    """Write the whole vocabulary file at once"""
+    final_data = {
+        "metadata": build_metadata(len(processed_words)),
+        "words": processed_words
+    }
+    with atomic_open(path) as f:
+        json.dump(final_data, f, ensure_ascii=False, indent=2)
+
+# JSON string literal without escaping non-ASCII, as ensure_ascii=False writes it (the C encoder)
+_encode_string = json.encoder.encode_basestring
+
+def format_entry(word: Dict[str, Any], indent: str = "    ") -> str:
+    """
+    json.dumps(word, ensure_ascii=False, indent=2) for a word nested at indent
+    Words are flat (strings and lists of strings, with the odd number), so
+    strings are escaped by the C encoder and only the layout is built here,
+    much faster than the pure-Python encoder indent=2 falls back to. Any
+    other value goes through json.dumps as before
+    """
+    if not word or not all(type(key) is str for key in word):
+        return json.dumps(word, ensure_ascii=False, indent=2).replace("\n", "\n" + indent)
+    inner = indent + "  "
+    item_indent = ",\n" + inner + "  "
+    lines = []
+    for key, value in word.items():
+        if type(value) is str:
+            text = _encode_string(value)
+        elif type(value) is list and value and all(type(item) is str for item in value):
+            text = "[\n" + inner + "  " + item_indent.join(map(_encode_string, value)) + "\n" + inner + "]"
+        else:
+            text = json.dumps(value, ensure_ascii=False, indent=2).replace("\n", "\n" + inner)
+        lines.append(inner + _encode_string(key) + ": " + text)
+    return "{\n" + ",\n".join(lines) + "\n" + indent + "}"
+
+class VocabularyWriter:
+    """
+    Vocabulary file written incrementally, one word at a time
+    Produces the same bytes as write_output; words are spooled to a temporary
+    file first because the metadata, which comes first, needs the final count.
+    Like write_output, path is only replaced once the file is complete. With
+    a target language it writes that language's entries, so it can follow
+    the processed words as an output sink
+    """
+
+    def __init__(self, path: str, target: Optional[TargetLanguage] = None):
+        self.path = path
+        self.target = target
+        self.count = 0
+        self.spool = tempfile.TemporaryFile('w+', encoding='utf-8')
+
+    def add(self, word: Dict[str, Any]):
+        if self.target is not None:
+            word = self.target.project(word)
+        self.spool.write((",\n    " if self.count else "\n    ") + format_entry(word))
+        self.count += 1
+
+    def close(self) -> int:
+        """Write the file and return its word count"""
+        with self.spool:
+            metadata = json.dumps(build_metadata(self.count, self.target), ensure_ascii=False, indent=2)
+            with atomic_open(self.path) as f:
+                f.write('{\n  "metadata": ' + metadata.replace("\n", "\n  ") + ',\n  "words": [')
+                self.spool.seek(0)
+                shutil.copyfileobj(self.spool, f)
+                f.write("\n  ]\n}" if self.count else "]\n}")
+        return self.count
+
+def write_output_stream(path: str, processed_words: Iterable[Dict[str, Any]]) -> int:
+    """Write the vocabulary file incrementally (see VocabularyWriter)"""
+    writer = VocabularyWriter(path)
+    try:
+        for word in processed_words:
+            writer.add(word)
+    except BaseException:
+        writer.spool.close()
+        raise
+    return writer.close()
+
+def count_words(words: Iterable[Dict[str, Any]], level_counts: Dict[str, int],
+                type_counts: Dict[str, int]) -> Iterator[Dict[str, Any]]:
+    """Pass words through while tallying levels and types"""
+    for word in words:
+        level_counts[word['level']] = level_counts.get(word['level'], 0) + 1
+        type_counts[word['type']] = type_counts.get(word['type'], 0) + 1
+        yield word
+
+def tap_words(words: Iterable[Dict[str, Any]], *sinks: Any) -> Iterator[Dict[str, Any]]:
+    """Pass words through while feeding them to extra outputs (index, shards...)"""
+    sinks = [sink for sink in sinks if sink is not None]
+    for word in words:
+        for sink in sinks:
+            sink.add(word)
+        yield word
+
+def build_search_index(args: argparse.Namespace) -> Optional[SearchIndexBuilder]:
+    """Search index builder for the output file, unless disabled"""
+    if args.no_search_index:
+        return None
+    return SearchIndexBuilder(JLPT_FIELDS, "level", os.path.basename(args.output))
+
+def save_search_index(args: argparse.Namespace, builder: Optional[SearchIndexBuilder]):
+    """Write the companion search index next to the output file"""
+    if builder is None:
+        return
+    index_path = index_path_for(args.output)
+    builder.write(index_path)
+    print(f"Created search index {index_path}")
+
+def build_shard_writer(args: argparse.Namespace) -> Optional[ShardWriter]:
+    """Per-level shard writer, when --shards is given"""
+    if not args.shards:
+        return None
+    return ShardWriter(args.shards, compress=not args.no_compress)
+
+def save_shards(writer: Optional[ShardWriter], total_words: int):
+    """Write shards, compressed variants and their manifest"""
+    if writer is None:
+        return
+    manifest = writer.close(build_metadata(total_words))
+    for level, info in manifest['shards'].items():
+        print(f"Created shard {level}: {info['count']} words, {info['bytes'] / 1024:.1f} KB")
+    if writer.compress and shard_output.brotli is None:
+        print("brotli module not installed, .br shards were not written")
+
+def build_columnar_writer(args: argparse.Namespace) -> Optional[ColumnarWriter]:
+    """Columnar binary writer, when --columnar is given"""
+    if not args.columnar:
+        return None
+    return ColumnarWriter(JLPT_SCHEMA)
+
+def save_columnar(args: argparse.Namespace, writer: Optional[ColumnarWriter], total_words: int):
+    """Write the columnar binary copy of the output"""
+    if writer is None:
+        return
+    writer.write(args.columnar, build_metadata(total_words))
+    print(f"Created columnar file {args.columnar} ({writer.rows} words, {len(writer.strings)} strings)")
+
+def build_sqlite_writer(args: argparse.Namespace) -> Optional[SqliteWriter]:
+    """SQLite exporter, when --sqlite is given"""
+    if not args.sqlite:
+        return None
+    return SqliteWriter(args.sqlite)
+
+def save_sqlite(args: argparse.Namespace, writer: Optional[SqliteWriter], total_words: int):
+    """Write the SQLite database (output words plus the uchinaguchi file)"""
+    if writer is None:
+        return
+    counts = writer.close(build_metadata(total_words))
+    summary = ", ".join(f"{count} {name.replace('_', ' ')}" for name, count in counts.items())
+    print(f"Created SQLite database {args.sqlite} ({summary})")
+
+def build_distractors(args: argparse.Namespace) -> Optional[DistractorBuilder]:
+    """Quiz distractor builder, when --distractors is given"""
+    if not args.distractors:
+        return None
+    return DistractorBuilder(args.distractors, args.distractor_key, args.distractor_metric,
+                             args.distractor_max_distance, source=os.path.basename(args.output))
+
+def save_distractors(args: argparse.Namespace, builder: Optional[DistractorBuilder]):
+    """Write the companion .distractors.json next to the output file"""
+    if builder is None:
+        return
+    path = quiz_distractors.distractors_path_for(args.output)
+    builder.write(path)
+    print(f"Created quiz distractors {path} ({builder.topped_up} words topped up with alphabetical neighbours)")
+
+def build_kanji_index(args: argparse.Namespace) -> Optional[KanjiIndexBuilder]:
+    """Kanji inverted index builder, when --kanji-index is given"""
+    if not args.kanji_index:
+        return None
+    return KanjiIndexBuilder(source=os.path.basename(args.output))
+
+def save_kanji_index(args: argparse.Namespace, builder: Optional[KanjiIndexBuilder]):
+    """Write the companion .kanji.json next to the output file"""
+    if builder is None:
+        return
+    path = kanji_index_path_for(args.output)
+    builder.write(path)
+    print(f"Created kanji index {path} ({len(builder.postings)} kanji)")
+
+def target_output_path(output_path: str, code: str) -> str:
+    """Output file of an extra language: vocabulario-x.json -> vocabulario-x.pt.json"""
+    root, ext = os.path.splitext(output_path)
+    return f"{root}.{code}{ext or '.json'}"
+
+def build_target_writers(args: argparse.Namespace) -> List[VocabularyWriter]:
+    """One output writer per --target language"""
+    return [VocabularyWriter(target_output_path(args.output, target.code), target) for target in TARGET_LANGUAGES]
+
+def save_target_outputs(writers: List[VocabularyWriter]):
+    """Write the extra languages' vocabulary files"""
+    for writer in writers:
+        total = writer.close()
+        print(f"Created {writer.path} with {total} words ({writer.target.name})")
+
+def primary_words(words: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    """Pass words through as their Spanish entries"""
+    for word in words:
+        yield strip_targets(word)
+
+def print_statistics(level_counts: Dict[str, int], type_counts: Dict[str, int]):
+    """Print level and type statistics"""
+    print("\n=== STATISTICS ===")
+    print("Words by level:")
+    for level in sorted(level_counts.keys()):
+        print(f"  {level}: {level_counts[level]} words")
+
+    print("\nWords by type:")
+    for word_type in sorted(type_counts.keys()):
+        print(f"  {word_type}: {type_counts[word_type]} words")
+
+def validate_output(args: argparse.Namespace):
+    """Quality gate on the written output (--validate); a failed check ends the run with status 1"""
+    if not args.validate:
+        return
+    import validate_dataset
+    report = validate_dataset.validate_file(args.output)
+    validate_dataset.print_report(report)
+    if not report.ok:
+        sys.exit(1)
+
+def report_metrics(args: argparse.Namespace, metrics: PipelineMetrics):
+    """Print stage timings and write the JSON metrics report if requested"""
+    print("\n=== TIMING ===")
+    for line in metrics.summary():
+        print(line)
+    if args.metrics:
+        metrics.write(args.metrics)
+        print(f"Metrics report written to {args.metrics}")
+
+@contextlib.contextmanager
+def profiled(path: Optional[str]) -> Iterator[None]:
+    """Run the block under cProfile and save pstats data to path (no-op without a path)"""
+    if not path:
+        yield
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        profiler.dump_stats(path)
+        print(f"Profile written to {path} (python -m pstats {path})")
+        pstats.Stats(profiler).sort_stats("cumulative").print_stats(15)
+
+def parse_level_weights(value: str) -> Dict[str, float]:
+    """Parse N5=3,N4=2,... into a weights dict"""
+    weights = {}
+    for item in value.split(","):
+        level, _, weight = item.partition("=")
+        level = level.strip().upper()
+        if level not in LEVELS:
+            raise argparse.ArgumentTypeError(f"unknown level {level!r}")
+        try:
+            weights[level] = float(weight)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"invalid weight for {level}: {weight!r}")
+    return weights
+
+def selection_options(args: argparse.Namespace) -> Dict[str, Any]:
+    """LevelSelector options from command line options"""
+    return {
+        "distribution": args.distribution,
+        "sample": args.sample,
+        "seed": args.seed,
+        "weights": args.level_weights
+    }
+
+def parse_args(argv=None) -> argparse.Namespace:
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Convert JLPT vocabulary data to Spanish format for NihongoApp")
+    parser.add_argument("--source", default=API_BASE_URL,
+                        help="URL or local JSON file with the word list (default: JLPT Vocabulary API)")
+    parser.add_argument("--output", default=OUTPUT_FILE, help=f"output file (default: {OUTPUT_FILE})")
+    parser.add_argument("--paged", action="store_true",
+                        help="fetch per-level pages concurrently instead of the single /all request")
+    parser.add_argument("--page-url", default=paged_fetch.PAGE_URL,
+                        help="page URL template with {level}, {offset} and {limit} placeholders")
+    parser.add_argument("--page-size", type=int, default=paged_fetch.PAGE_SIZE, help="words per page request")
+    parser.add_argument("--concurrency", type=int, default=paged_fetch.CONCURRENCY,
+                        help="maximum page requests in flight")
+    parser.add_argument("--retries", type=int, default=paged_fetch.RETRIES,
+                        help="retries per page, with jittered exponential backoff")
+    parser.add_argument("--stream", action="store_true",
+                        help="parse, process and write words incrementally to keep memory flat")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR,
+                        help=f"directory for cached API responses (default: {DEFAULT_CACHE_DIR})")
+    parser.add_argument("--no-cache", action="store_true", help="always download, bypassing the response cache")
+    parser.add_argument("--max-age", type=float, default=DEFAULT_MAX_AGE,
+                        help="seconds a cached response is used before revalidating it")
+    parser.add_argument("--cache-size", type=float, default=DEFAULT_MAX_SIZE / (1024 * 1024),
+                        help="maximum cache size in MB; least recently used entries are evicted")
+    parser.add_argument("--offline", action="store_true", help="use only cached responses, never the network")
+    parser.add_argument("--distribution", choices=["fixed", "proportional", "weighted"], default="fixed",
+                        help="how TARGET_WORDS is split across levels (default: fixed LEVEL_DISTRIBUTION)")
+    parser.add_argument("--level-weights", type=parse_level_weights, default=None,
+                        help="weights for --distribution weighted, e.g. N5=3,N4=3,N3=2,N2=1,N1=1")
+    parser.add_argument("--sample", choices=["first", "random"], default="first",
+                        help="take the first words of each level or a random sample (default: first)")
+    parser.add_argument("--seed", type=int, default=None, help="seed for --sample random")
+    parser.add_argument("--gloss-types", action="store_true",
+                        help="use the English meaning to tell \"to ...\" verbs from nouns with verb-like endings")
+    parser.add_argument("--shards", metavar="DIR", default=None,
+                        help="also write one minified shard per level (+ .gz/.br and manifest.json) to DIR")
+    parser.add_argument("--no-compress", action="store_true", help="skip the .gz/.br copies of --shards")
+    parser.add_argument("--columnar", metavar="PATH", default=None,
+                        help="also write the words in the columnar binary format (see columnar.py) to PATH")
+    parser.add_argument("--sqlite", metavar="PATH", default=None,
+                        help="also export the words (and the uchinaguchi file) to a SQLite database with FTS5 search")
+    parser.add_argument("--distractors", metavar="K", type=int, default=0,
+                        help="also write K precomputed quiz distractors per word to .distractors.json")
+    parser.add_argument("--distractor-key", choices=quiz_distractors.KEYS, default="kana",
+                        help="field compared when picking distractors (default: kana)")
+    parser.add_argument("--distractor-metric", choices=list(quiz_distractors.METRICS), default="levenshtein",
+                        help="edit distance for distractors; osa also counts adjacent swaps as one edit")
+    parser.add_argument("--distractor-max-distance", type=int, default=quiz_distractors.MAX_DISTANCE,
+                        help="largest edit distance searched for distractors before topping up")
+    parser.add_argument("--target", metavar="TABLES", action="append", default=[],
+                        help="also translate into the language of this JSON table set (see load_target_language)"
+                             " and write it to OUTPUT.<code>.json in the same run; repeatable")
+    parser.add_argument("--kanji-index", action="store_true",
+                        help="also write a kanji inverted index with frequencies and a study order to .kanji.json")
+    parser.add_argument("--no-search-index", action="store_true",
+                        help="do not write the companion .index.json search index")
+    parser.add_argument("--translator", choices=["dictionary", "http"], default="dictionary",
+                        help="translation backend: the built-in dictionary (default, offline) or an HTTP API")
+    parser.add_argument("--translate-url", default=None,
+                        help="endpoint for --translator http (POST {\"q\": [...]} -> {\"translations\": [...]})")
+    parser.add_argument("--translate-batch-size", type=int, default=translation_backend.BATCH_SIZE,
+                        help="meanings per translation request")
+    parser.add_argument("--translate-concurrency", type=int, default=translation_backend.CONCURRENCY,
+                        help="maximum translation requests in flight")
+    parser.add_argument("--translation-memory", default=None,
+                        help=f"SQLite translation memory (default: {translation_backend.MEMORY_FILE}"
+                             " in the cache directory)")
+    parser.add_argument("--validate", action="store_true",
+                        help="run validate_dataset.py's quality gate on the output and exit 1 if it fails")
+    parser.add_argument("--metrics", metavar="PATH", default=None,
+                        help="write per-stage timings, counters and histograms as a JSON report to PATH")
+    parser.add_argument("--profile", metavar="PATH", default=None,
+                        help="profile the run with cProfile and save pstats data to PATH (main process only)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="process words on a pool of N worker processes (default: 1, serial)")
+    parser.add_argument("--manifest", default=None,
+                        help="incremental build manifest (default: build-manifest.json in the cache directory)")
+    parser.add_argument("--full-rebuild", action="store_true",
+                        help="reprocess every word instead of reusing unchanged entries")
+    parser.add_argument("--resume", action="store_true",
+                        help="continue an interrupted run from its last completed chunk")
+    parser.add_argument("--serve", action="store_true",
+                        help="instead of converting, serve queries over OUTPUT (and the uchinaguchi file) via HTTP")
+    parser.add_argument("--serve-port", type=int, default=query_service.SERVICE_PORT,
+                        help=f"port for --serve (default: {query_service.SERVICE_PORT})")
+    parser.add_argument("--serve-cache-size", type=int, default=query_service.CACHE_SIZE,
+                        help="responses kept in the --serve LRU cache (0 disables it)")
+    parser.add_argument("--checkpoint", default=None,
+                        help="chunk checkpoint log (default: checkpoint-OUTPUT.jsonl in the cache directory)")
+    args = parser.parse_args(argv)
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.concurrency < 1 or args.page_size < 1 or args.retries < 0:
+        parser.error("--concurrency and --page-size must be positive, --retries non-negative")
+    if args.translator == "http" and not args.translate_url:
+        parser.error("--translator http needs --translate-url")
+    if args.translate_batch_size < 1 or args.translate_concurrency < 1:
+        parser.error("--translate-batch-size and --translate-concurrency must be positive")
+    if args.distractors < 0 or args.distractor_max_distance < 1:
+        parser.error("--distractors must be non-negative and --distractor-max-distance positive")
+    if args.offline and args.no_cache:
+        parser.error("--offline needs the cache, it cannot be combined with --no-cache")
+    args.targets = []
+    for path in args.target:
+        try:
+            args.targets.append(load_target_language(path))
+        except (OSError, ValueError) as e:
+            parser.error(f"--target {path}: {e}")
+    codes = [target.code for target in args.targets]
+    if len(set(codes)) != len(codes) or "es" in codes:
+        parser.error("--target languages need distinct codes other than es")
+    return args
+
+def build_manifest(args: argparse.Namespace) -> Optional[BuildManifest]:
+    """Incremental build manifest configured from command line options"""
+    if args.full_rebuild:
+        return None
+    return BuildManifest(args.manifest or os.path.join(args.cache_dir, "build-manifest.json"))
+
+def report_manifest(manifest: Optional[BuildManifest]):
+    """Save the manifest and report how much work it saved"""
+    if manifest is None:
+        return
+    manifest.save()
+    print(f"Incremental build: reused {manifest.reused} entries, recomputed {manifest.recomputed}")
+
+def build_checkpoint(args: argparse.Namespace, words: List[Dict[str, Any]]) -> ChunkLog:
+    """
+    Chunk log for this run's selected words
+    The run key covers the words and every table their output depends on,
+    so --resume only replays a log left by an identical run
+    """
+    backend = TRANSLATION_SERVICE.backend.name if TRANSLATION_SERVICE else "dictionary"
+    run_key = _hash_json([words, WORD_TRANSLATIONS, PHRASE_TRANSLATIONS, SYNONYM_MAP, WORD_TYPE_PATTERNS,
+                          WORD_TYPE_CLASSIFIER.use_gloss, backend,
+                          *[target.tables() for target in TARGET_LANGUAGES]])
+    path = args.checkpoint or os.path.join(args.cache_dir, f"checkpoint-{os.path.basename(args.output)}.jsonl")
+    log = ChunkLog(path, run_key, resume=args.resume)
+    if log.resumed_words:
+        print(f"Resuming: {log.resumed_words} of {len(words)} words already processed ({path})")
+    elif args.resume:
+        reason = "it belongs to a different run" if log.stale else "none was found"
+        print(f"Nothing to resume from {path}: {reason}; starting from the beginning")
+    return log
+
+def fetch_paged(args: argparse.Namespace, cache: Optional[ResponseCache]) -> List[Dict[str, Any]]:
+    """Download all levels as concurrent page requests"""
+    print("Downloading JLPT vocabulary data page by page...")
+    try:
+        return paged_fetch.fetch_jlpt_pages(args.page_url, cache, page_size=args.page_size,
+                                            concurrency=args.concurrency, retries=args.retries)
+    except Exception as e:
+        print(f"Error downloading data: {e}")
+        return []
+
+def build_translation_service(args: argparse.Namespace) -> Optional[TranslationService]:
+    """Remote translation service configured from command line options, None for the dictionary"""
+    if args.translator == "dictionary":
+        return None
+    memory = translation_backend.TranslationMemory(
+        args.translation_memory or os.path.join(args.cache_dir, translation_backend.MEMORY_FILE))
+    backend = translation_backend.HTTPBackend(args.translate_url, pool_size=args.translate_concurrency)
+    return TranslationService(backend, memory, batch_size=args.translate_batch_size,
+                              concurrency=args.translate_concurrency, fallback=TRANSLATOR.translate)
+
+def report_translations(service: Optional[TranslationService]):
+    """Report where this run's translations came from"""
+    if service is not None:
+        print(service.report())
+        service.close()
+
+def build_cache(args: argparse.Namespace) -> Optional[ResponseCache]:
+    """Response cache configured from command line options"""
+    if args.no_cache:
+        return None
+    return ResponseCache(args.cache_dir, max_age=args.max_age,
+                         max_size=int(args.cache_size * 1024 * 1024), offline=args.offline)
+
+def run(args: argparse.Namespace, metrics: PipelineMetrics):
+    """Download, select, process and write the dataset, timing each stage"""
+    global WORD_TYPE_CLASSIFIER, TRANSLATION_SERVICE, TARGET_LANGUAGES
     print("Starting JLPT vocabulary conversion to Spanish...")
-    
+    WORD_TYPE_CLASSIFIER = WordTypeClassifier(WORD_TYPE_PATTERNS, use_gloss=args.gloss_types)
+    TARGET_LANGUAGES = args.targets
+    if TARGET_LANGUAGES:
+        print(f"Also translating into: {', '.join(target.name for target in TARGET_LANGUAGES)}")
+    TRANSLATION_SERVICE = build_translation_service(args)
+    TRANSLATION_MEMO.clear()
+    cache = build_cache(args)
+    manifest = build_manifest(args)
+    index_builder = build_search_index(args)
+    shard_writer = build_shard_writer(args)
+    columnar_writer = build_columnar_writer(args)
+    sqlite_writer = build_sqlite_writer(args)
+    distractor_builder = build_distractors(args)
+    kanji_builder = build_kanji_index(args)
+    target_writers = build_target_writers(args)
+
+    level_counts = metrics.histograms.setdefault("level", {})
+    type_counts = metrics.histograms.setdefault("type", {})
+
+    if args.stream:
+        try:
+            if args.paged:
+                with metrics.stage("download"):
+                    source_words = fetch_paged(args, cache)
+            else:
+                # Parsing is interleaved with selection; timed() tells them apart
+                source_words = metrics.timed("download", stream_jlpt_data(args.source, cache))
+            with metrics.stage("select"):
+                selected_words = select_words_streaming(source_words, **selection_options(args))
+        except Exception as e:
+            print(f"Error downloading data: {e}")
+            selected_words = []
+        if not selected_words:
+            print("Failed to download data. Exiting.")
+            return
+        print(f"Selected {len(selected_words)} total words")
+        metrics.count("selected_words", len(selected_words))
+        with metrics.stage("readings"):
+            selected_words = complete_readings(selected_words, metrics)
+        checkpoint = build_checkpoint(args, selected_words)
+
+        try:
+            with metrics.stage("serialize"):
+                words = metrics.timed("process", process_words(selected_words, manifest, args.workers,
+                                                               metrics=metrics, checkpoint=checkpoint))
+                words = count_words(words, level_counts, type_counts)
+                words = primary_words(tap_words(words, *target_writers))
+                total = write_output_stream(args.output, tap_words(words, index_builder, shard_writer,
+                                                                   columnar_writer, sqlite_writer,
+                                                                   distractor_builder, kanji_builder))
+            print(f"Successfully created {args.output} with {total} words")
+            with metrics.stage("outputs"):
+                save_search_index(args, index_builder)
+                save_shards(shard_writer, total)
+                save_columnar(args, columnar_writer, total)
+                save_sqlite(args, sqlite_writer, total)
+                save_distractors(args, distractor_builder)
+                save_kanji_index(args, kanji_builder)
+                save_target_outputs(target_writers)
+            checkpoint.close(finished=True)
+            metrics.count("output_words", total)
+            report_manifest(manifest)
+            report_translations(TRANSLATION_SERVICE)
+            print_statistics(level_counts, type_counts)
+            report_metrics(args, metrics)
+            validate_output(args)
+        except Exception as e:
+            print(f"Error saving file: {e}")
+        finally:
+            checkpoint.close()
+        return
+
     # Download data
-    raw_data = download_jlpt_data()
+    with metrics.stage("download"):
+        raw_data = fetch_paged(args, cache) if args.paged else download_jlpt_data(args.source, cache)
     if not raw_data:
         print("Failed to download data. Exiting.")
         return
+    metrics.count("source_words", len(raw_data))
     
     # Select words according to level distribution
-    selected_words = select_words_by_level(raw_data)
+    with metrics.stage("select"):
+        selected_words = select_words_by_level(raw_data, **selection_options(args))
     print(f"Selected {len(selected_words)} total words")
+    metrics.count("selected_words", len(selected_words))
+
+    # Fill in missing readings
+    with metrics.stage("readings"):
+        selected_words = complete_readings(selected_words, metrics)
     
-    # Process words to target format
-    processed_words = []
-    for i, word in enumerate(selected_words):
+    # Process words to target format, checkpointing each finished chunk
+    checkpoint = build_checkpoint(args, selected_words)
+    with metrics.stage("process"):
         try:
-            processed_word = process_word_data(word)
-            processed_words.append(processed_word)
-            
-            # Progress indicator
-            if (i + 1) % 100 == 0:
-                print(f"Processed {i + 1}/{len(selected_words)} words...")
-                
-        except Exception as e:
-            print(f"Error processing word {i}: {e}")
-            continue
-    
-    # Create final JSON structure
-    final_data = {
-        "metadata": {
-            "total_words": len(processed_words),
-            "description": f"{len(processed_words)} palabras JLPT N5-N1 organizadas por nivel con traducciones al español",
-            "levels": ["N5", "N4", "N3", "N2", "N1"],
-            "last_updated": "2026-01-27",
-            "source": "JLPT Vocabulary API with Spanish translations"
-        },
-        "words": processed_words
-    }
+            processed_words = list(process_words(selected_words, manifest, args.workers, metrics=metrics,
+                                                 checkpoint=checkpoint))
+        finally:
+            checkpoint.close()
     
-    # Save to file
+    # Save to file; the other languages' glosses go to their own files
+    combined_words = processed_words
+    processed_words = list(primary_words(combined_words))
     try:
-        with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
-            json.dump(final_data, f, ensure_ascii=False, indent=2)
-        print(f"Successfully created {OUTPUT_FILE} with {len(processed_words)} words")
+        with metrics.stage("serialize"):
+            write_output(args.output, processed_words)
+        print(f"Successfully created {args.output} with {len(processed_words)} words")
+        with metrics.stage("outputs"):
+            for _ in tap_words(processed_words, index_builder, shard_writer, columnar_writer, sqlite_writer,
+                               distractor_builder, kanji_builder):
+                pass
+            save_search_index(args, index_builder)
+            save_shards(shard_writer, len(processed_words))
+            save_columnar(args, columnar_writer, len(processed_words))
+            save_sqlite(args, sqlite_writer, len(processed_words))
+            save_distractors(args, distractor_builder)
+            save_kanji_index(args, kanji_builder)
+            for _ in tap_words(combined_words, *target_writers):
+                pass
+            save_target_outputs(target_writers)
+        checkpoint.close(finished=True)
+        metrics.count("output_words", len(processed_words))
+        report_manifest(manifest)
+        report_translations(TRANSLATION_SERVICE)
         
         # Print statistics
-        level_counts = {}
-        type_counts = {}
-        for word in processed_words:
-            level = word['level']
-            word_type = word['type']
-            level_counts[level] = level_counts.get(level, 0) + 1
-            type_counts[word_type] = type_counts.get(word_type, 0) + 1
-        
-        print("\n=== STATISTICS ===")
-        print("Words by level:")
-        for level in sorted(level_counts.keys()):
-            print(f"  {level}: {level_counts[level]} words")
-        
-        print("\nWords by type:")
-        for word_type in sorted(type_counts.keys()):
-            print(f"  {word_type}: {type_counts[word_type]} words")
+        for _ in count_words(processed_words, level_counts, type_counts):
+            pass
+        print_statistics(level_counts, type_counts)
+        report_metrics(args, metrics)
+        validate_output(args)
             
     except Exception as e:
         print(f"Error saving file: {e}")
 
+def main(argv=None):
+    """Main processing function"""
+    args = parse_args(argv)
+    if args.serve:
+        query_service.serve(args.output, port=args.serve_port, cache_size=args.serve_cache_size)
+        return
+    metrics = PipelineMetrics()
+    metrics.info = {
+        "source": args.source,
+        "paged": args.paged,
+        "stream": args.stream,
+        "workers": args.workers,
+        "translator": args.translator,
+        "incremental": not args.full_rebuild
+    }
+    with profiled(args.profile):
+        run(args, metrics)
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
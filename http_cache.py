@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+On-disk HTTP response cache for the NihongoApp converters
+Bodies are stored content-addressed by SHA-256 and revalidated with ETag/Last-Modified
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import requests
+
+DEFAULT_CACHE_DIR = ".jlpt-cache"
+DEFAULT_MAX_AGE = 24 * 60 * 60           # seconds before a cached response is revalidated
+DEFAULT_MAX_SIZE = 200 * 1024 * 1024     # bytes kept on disk before evicting old entries
+CHUNK_SIZE = 64 * 1024
+
+class CacheMiss(Exception):
+    """Raised when an offline lookup finds nothing in the cache"""
+
+class ResponseCache:
+    """
+    Content-addressed cache of HTTP GET bodies
+    index.json maps each URL to its body hash and validators; bodies live in
+    objects/<sha256> so identical payloads are stored once
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_age: float = DEFAULT_MAX_AGE,
+                 max_size: int = DEFAULT_MAX_SIZE, offline: bool = False, timeout: float = 30,
+                 session: Optional[requests.Session] = None):
+        self.cache_dir = cache_dir
+        self.max_age = max_age
+        self.max_size = max_size
+        self.offline = offline
+        self.timeout = timeout
+        self.session = session
+        # fetch() may be called from several threads sharing one cache
+        self.lock = threading.RLock()
+        self.objects_dir = os.path.join(cache_dir, "objects")
+        self.index_path = os.path.join(cache_dir, "index.json")
+        self.index = self._load_index()
+
+    def _load_index(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.index_path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_index(self):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(self.index, f, indent=2)
+        os.replace(tmp_path, self.index_path)
+
+    def object_path(self, digest: str) -> str:
+        """Path of a cached body by its SHA-256"""
+        return os.path.join(self.objects_dir, digest)
+
+    def lookup(self, url: str) -> Optional[Dict[str, Any]]:
+        """Cache entry for url, if its body is still on disk"""
+        entry = self.index.get(url)
+        if entry and os.path.exists(self.object_path(entry['sha256'])):
+            return entry
+        return None
+
+    def fetch(self, url: str) -> str:
+        """
+        Return the path of a local file holding the body of url
+        Fresh entries are used as-is, stale ones are revalidated with a
+        conditional GET, and offline mode never touches the network
+        """
+        entry = self.lookup(url)
+        if self.offline:
+            if entry is None:
+                raise CacheMiss(f"{url} is not cached (offline mode)")
+            return self._touch(url, entry)
+
+        if entry is not None and time.time() - entry['fetched_at'] < self.max_age:
+            return self._touch(url, entry)
+
+        headers = {}
+        if entry is not None:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+
+        try:
+            http = self.session or requests
+            with http.get(url, headers=headers, timeout=self.timeout, stream=True) as response:
+                if response.status_code == 304 and entry is not None:
+                    with self.lock:
+                        entry['fetched_at'] = time.time()
+                    return self._touch(url, entry)
+                response.raise_for_status()
+                entry = self._store(url, response)
+        except requests.RequestException as e:
+            if entry is None:
+                raise
+            print(f"Warning: could not revalidate {url} ({e}), using cached copy")
+            return self._touch(url, entry)
+
+        self.evict(keep=url)
+        return self.object_path(entry['sha256'])
+
+    def _store(self, url: str, response: requests.Response) -> Dict[str, Any]:
+        """Stream a response body into the object store"""
+        os.makedirs(self.objects_dir, exist_ok=True)
+        digest = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=self.objects_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                    digest.update(chunk)
+                    size += len(chunk)
+                    f.write(chunk)
+            os.replace(tmp_path, self.object_path(digest.hexdigest()))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+        now = time.time()
+        entry = {
+            "sha256": digest.hexdigest(),
+            "size": size,
+            "etag": response.headers.get('ETag'),
+            "last_modified": response.headers.get('Last-Modified'),
+            "fetched_at": now,
+            "used_at": now
+        }
+        with self.lock:
+            self.index[url] = entry
+            self._save_index()
+        return entry
+
+    def _touch(self, url: str, entry: Dict[str, Any]) -> str:
+        with self.lock:
+            entry['used_at'] = time.time()
+            self.index[url] = entry
+            self._save_index()
+        return self.object_path(entry['sha256'])
+
+    def evict(self, keep: Optional[str] = None):
+        """Drop least recently used entries until the cache fits in max_size"""
+        with self.lock:
+            self._evict(keep)
+
+    def _evict(self, keep: Optional[str]):
+        sizes = {entry['sha256']: entry['size'] for entry in self.index.values()}
+        total = sum(sizes.values())
+        if total <= self.max_size:
+            return
+
+        for url, entry in sorted(self.index.items(), key=lambda item: item[1]['used_at']):
+            if total <= self.max_size:
+                break
+            if url == keep:
+                continue
+            del self.index[url]
+            digest = entry['sha256']
+            if any(other['sha256'] == digest for other in self.index.values()):
+                continue
+            total -= sizes[digest]
+            try:
+                os.remove(self.object_path(digest))
+            except OSError:
+                pass
+        self._save_index()
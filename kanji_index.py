@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Kanji inverted index and coverage study order for the vocabulary files
+One pass over the words maps every kanji to the ids of the words written
+with it, counting its words per level, the easiest level it appears at and
+the kanji it shares words with. The greedy study order puts first the
+words that teach the most kanji not covered yet
+"""
+
+import argparse
+import heapq
+import json
+import os
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from checkpoint import atomic_open
+
+KANJI_INDEX_VERSION = 1
+# Study order of the levels (the converter's LEVELS; imported from there it would be circular)
+LEVELS = ["N5", "N4", "N3", "N2", "N1"]
+
+def is_kanji(char: str) -> bool:
+    """CJK unified ideographs (and extension A); kana and 々 are not counted"""
+    return "一" <= char <= "鿿" or "㐀" <= char <= "䶿"
+
+def word_kanji(text: str) -> List[str]:
+    """Distinct kanji of a written form, in order of appearance"""
+    return list(dict.fromkeys(char for char in text if is_kanji(char)))
+
+def level_rank(level: str) -> int:
+    """Study position of a level (N5 first); unknown levels go last"""
+    return LEVELS.index(level) if level in LEVELS else len(LEVELS)
+
+def study_order(kanji_lists: List[List[str]], ranks: List[int], per_level: bool = False) -> List[int]:
+    """
+    Greedy max-new-coverage order of word ids
+    Repeatedly takes the word with the most kanji not covered yet (ties go
+    to the easier level, then to dataset order). A word's gain only shrinks
+    as kanji get covered, so a heap of possibly stale gains is re-checked
+    lazily when an entry reaches the top: O(k log n) for k kanji occurrences
+    instead of rescoring every word per pick. Words that add no new kanji
+    follow in level and dataset order. With per_level the levels are studied
+    in order, the greedy running inside each with coverage carried over
+    """
+    ids = sorted(range(len(kanji_lists)), key=lambda i: (ranks[i], i))
+    if per_level:
+        groups: Dict[int, List[int]] = {}
+        for i in ids:
+            groups.setdefault(ranks[i], []).append(i)
+        blocks = [groups[rank] for rank in sorted(groups)]
+    else:
+        blocks = [ids]
+
+    covered = set()
+    order = []
+    for block in blocks:
+        heap = [(-len(kanji_lists[i]), ranks[i], i) for i in block if kanji_lists[i]]
+        heapq.heapify(heap)
+        taken = set()
+        while heap:
+            stale_gain, rank, i = heap[0]
+            gain = sum(1 for char in kanji_lists[i] if char not in covered)
+            if gain == 0:
+                heapq.heappop(heap)
+            elif gain < -stale_gain:
+                heapq.heapreplace(heap, (-gain, rank, i))
+            else:
+                heapq.heappop(heap)
+                order.append(i)
+                taken.add(i)
+                covered.update(kanji_lists[i])
+        order.extend(i for i in block if i not in taken)
+    return order
+
+class KanjiIndexBuilder:
+    """
+    Collects words (it can follow a streamed output, like the search index)
+    Ids are positions in the dataset's words array
+    """
+
+    def __init__(self, field: str = "kanji", partition_key: str = "level", source: str = ""):
+        self.field = field
+        self.partition_key = partition_key
+        self.source = source
+        self.count = 0
+        self.postings: Dict[str, List[int]] = {}
+        self.levels: Dict[str, Dict[str, int]] = {}
+        self.cooccurrence: Dict[str, Dict[str, int]] = {}
+        # Per word, for the study order
+        self.kanji_lists: List[List[str]] = []
+        self.ranks: List[int] = []
+
+    def add(self, word: Dict[str, Any]):
+        """Index the next word's kanji"""
+        word_id = self.count
+        self.count += 1
+        chars = word_kanji(str(word.get(self.field, "")))
+        level = str(word.get(self.partition_key, ""))
+        self.kanji_lists.append(chars)
+        self.ranks.append(level_rank(level))
+        for char in chars:
+            self.postings.setdefault(char, []).append(word_id)
+            counts = self.levels.setdefault(char, {})
+            counts[level] = counts.get(level, 0) + 1
+        if len(chars) > 1:
+            for char in chars:
+                row = self.cooccurrence.setdefault(char, {})
+                for other in chars:
+                    if other != char:
+                        row[other] = row.get(other, 0) + 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Index with delta-encoded word ids, kanji from most to least used"""
+        kanji = {}
+        for char in sorted(self.postings, key=lambda c: (-len(self.postings[c]), c)):
+            ids = self.postings[char]
+            counts = self.levels[char]
+            kanji[char] = {
+                "ids": [ids[0]] + [b - a for a, b in zip(ids, ids[1:])],
+                "levels": counts,
+                "first_level": min(counts, key=level_rank),
+                "cooccurs": dict(sorted(self.cooccurrence.get(char, {}).items(), key=lambda item: (-item[1], item[0])))
+            }
+        return {
+            "version": KANJI_INDEX_VERSION,
+            "source": self.source,
+            "field": self.field,
+            "partition_key": self.partition_key,
+            "count": self.count,
+            "kanji": kanji,
+            "study_order": {
+                "coverage": study_order(self.kanji_lists, self.ranks),
+                "by_level": study_order(self.kanji_lists, self.ranks, per_level=True)
+            }
+        }
+
+    def write(self, path: str):
+        """Write the index as compact JSON"""
+        with atomic_open(path) as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, separators=(',', ':'))
+
+class KanjiIndex:
+    """Lookup side of a written kanji index"""
+
+    def __init__(self, data: Dict[str, Any]):
+        self.data = data
+        self.kanji: Dict[str, Dict[str, Any]] = data['kanji']
+        self._decoded: Dict[str, List[int]] = {}
+
+    @classmethod
+    def load(cls, path: str) -> "KanjiIndex":
+        with open(path, encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def words(self, char: str) -> List[int]:
+        """Ids of the words written with char"""
+        ids = self._decoded.get(char)
+        if ids is None:
+            ids = []
+            total = 0
+            for delta in self.kanji.get(char, {}).get('ids', []):
+                total += delta
+                ids.append(total)
+            self._decoded[char] = ids
+        return ids
+
+    def frequency(self, char: str, level: Optional[str] = None) -> int:
+        """Number of words using char, in one level or in all"""
+        counts = self.kanji.get(char, {}).get('levels', {})
+        return counts.get(level, 0) if level is not None else sum(counts.values())
+
+    def first_level(self, char: str) -> Optional[str]:
+        """Easiest level with a word using char"""
+        return self.kanji.get(char, {}).get('first_level')
+
+    def cooccurring(self, char: str, k: int = 10) -> List[Tuple[str, int]]:
+        """Kanji most often written in the same word as char, with their shared word counts"""
+        return list(self.kanji.get(char, {}).get('cooccurs', {}).items())[:k]
+
+    def most_frequent(self, k: int = 10, level: Optional[str] = None) -> List[Tuple[str, int]]:
+        """The k kanji used by the most words (of a level)"""
+        if level is None:
+            return [(char, self.frequency(char)) for char in list(self.kanji)[:k]]
+        counts = ((char, self.frequency(char, level)) for char in self.kanji)
+        return heapq.nlargest(k, (item for item in counts if item[1]), key=lambda item: item[1])
+
+    def study_order(self, per_level: bool = False) -> List[int]:
+        """Precomputed greedy coverage order of word ids"""
+        return self.data['study_order']['by_level' if per_level else 'coverage']
+
+    def coverage(self, ids: Iterable[int]) -> int:
+        """Distinct kanji taught by the given words"""
+        wanted = set(ids)
+        return sum(1 for char in self.kanji if any(i in wanted for i in self.words(char)))
+
+def kanji_index_path_for(dataset_path: str) -> str:
+    """Companion index file name: vocabulario-x.json -> vocabulario-x.kanji.json"""
+    root, _ = os.path.splitext(dataset_path)
+    return root + ".kanji.json"
+
+def build_kanji_index_for_file(dataset_path: str, output_path: Optional[str] = None) -> KanjiIndexBuilder:
+    """Build and write the kanji index of an existing vocabulary file"""
+    with open(dataset_path, encoding='utf-8') as f:
+        words = json.load(f)['words']
+    builder = KanjiIndexBuilder(source=os.path.basename(dataset_path))
+    for word in words:
+        builder.add(word)
+    builder.write(output_path or kanji_index_path_for(dataset_path))
+    return builder
+
+def main():
+    """Build a kanji index, or look characters up in one: kanji_index.py DATASET [--lookup CHARS]"""
+    parser = argparse.ArgumentParser(description="Kanji inverted index and study order for a vocabulary file")
+    parser.add_argument("dataset", help="vocabulary JSON file (JLPT shape)")
+    parser.add_argument("--output", default=None, help="index file (default: DATASET.kanji.json)")
+    parser.add_argument("--lookup", metavar="CHARS", default=None,
+                        help="print the words, levels and companions of these kanji from an existing index")
+    parser.add_argument("--top", type=int, default=0, help="print the K most used kanji")
+    args = parser.parse_args()
+    path = args.output or kanji_index_path_for(args.dataset)
+
+    if not args.lookup and not args.top:
+        builder = build_kanji_index_for_file(args.dataset, path)
+        print(f"Created {path}: {len(builder.postings)} kanji in {builder.count} words")
+        return
+
+    index = KanjiIndex.load(path)
+    with open(args.dataset, encoding='utf-8') as f:
+        words = json.load(f)['words']
+    for char, count in index.most_frequent(args.top):
+        print(f"{char}: {count} words, first in {index.first_level(char)}")
+    for char in word_kanji(args.lookup or ""):
+        ids = index.words(char)
+        if not ids:
+            print(f"{char}: not in the index")
+            continue
+        companions = " ".join(f"{other}×{count}" for other, count in index.cooccurring(char, 5))
+        print(f"{char}: {len(ids)} words, first in {index.first_level(char)}; with {companions or '-'}")
+        print("  " + ", ".join(words[i][index.data['field']] for i in ids[:10]) + (" ..." if len(ids) > 10 else ""))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Load test for query_service.py
+Starts the service in a subprocess (or targets --url), then runs concurrent
+keep-alive clients issuing a skewed mix of search, level, type and random
+queries for a fixed time, and reports p50/p90/p99 latency and requests per
+second. Clients and server share the machine, so on few cores the numbers
+include the clients' own CPU use:
+
+    python load_test_service.py --clients 1,8,32 --duration 5
+    python load_test_service.py --compare-cache
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import quote, urlsplit
+
+import query_service
+
+QUERY_POOL = 500
+ZIPF_EXPONENT = 1.1
+DEFAULT_CLIENTS = [1, 8, 32]
+DEFAULT_DURATION = 5.0
+
+def build_queries(path: str = query_service.JLPT_FILE, count: int = QUERY_POOL, seed: int = 0) -> List[str]:
+    """
+    Request targets drawn from the dataset: searches for glosses, kana and
+    romaji fragments, level and type pages, seeded and unseeded samples
+    """
+    rng = random.Random(seed)
+    with open(path, encoding='utf-8') as f:
+        words = json.load(f)['words']
+    levels = sorted({w['level'] for w in words})
+    types = sorted({w['type'] for w in words})
+    queries = []
+    for _ in range(count):
+        word = rng.choice(words)
+        kind = rng.random()
+        if kind < 0.5:
+            term = rng.choice([rng.choice(word['español']).split(" ")[0], word['kana'][:2], word['romaji'][:3]])
+            level = f"&level={word['level']}" if rng.random() < 0.3 else ""
+            queries.append(f"/search?q={quote(term)}{level}&limit=20")
+        elif kind < 0.7:
+            queries.append(f"/level/{rng.choice(levels)}?type={rng.choice(types)}&offset={rng.randrange(0, 100, 20)}&limit=20")
+        elif kind < 0.8:
+            queries.append(f"/type/{rng.choice(types)}?level={rng.choice(levels)}&limit=20")
+        elif kind < 0.9:
+            queries.append(f"/random?n=10&level={rng.choice(levels)}&seed={rng.randrange(50)}")
+        else:
+            queries.append(f"/random?n=10&level={rng.choice(levels)}")
+    return queries
+
+def zipf_weights(count: int, exponent: float = ZIPF_EXPONENT) -> List[float]:
+    """Popularity of the n-th query: a few hot queries and a long tail"""
+    return [1 / (rank ** exponent) for rank in range(1, count + 1)]
+
+async def client(host: str, port: int, targets: List[str], deadline: float,
+                 latencies: List[float], errors: List[int]):
+    """One keep-alive connection issuing requests back to back until the deadline"""
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for target in targets:
+            if time.perf_counter() >= deadline:
+                break
+            start = time.perf_counter()
+            writer.write(f"GET {target} HTTP/1.1\r\nHost: {host}\r\n\r\n".encode('latin-1'))
+            await writer.drain()
+            status = int((await reader.readline()).split()[1])
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b""):
+                    break
+                name, _, value = line.decode('latin-1').partition(":")
+                if name.lower() == "content-length":
+                    length = int(value)
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - start)
+            if status != 200:
+                errors.append(status)
+    finally:
+        writer.close()
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of sorted values"""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+async def run_load(host: str, port: int, queries: List[str], clients: int, duration: float,
+                   seed: int = 0) -> Dict[str, Any]:
+    """Run `clients` concurrent clients for `duration` seconds and summarize their latencies"""
+    rng = random.Random(seed)
+    weights = zipf_weights(len(queries))
+    latencies: List[float] = []
+    errors: List[int] = []
+    start = time.perf_counter()
+    deadline = start + duration
+    # Each client gets its own long enough stream of targets, drawn up front
+    streams = [rng.choices(queries, weights=weights, k=int(duration * 20000)) for _ in range(clients)]
+    await asyncio.gather(*(client(host, port, stream, deadline, latencies, errors) for stream in streams))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "clients": clients,
+        "requests": len(latencies),
+        "errors": len(errors),
+        "requests_per_second": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p90_ms": percentile(latencies, 0.90) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "max_ms": (latencies[-1] if latencies else 0.0) * 1000
+    }
+
+def start_service(dataset: str, cache_size: int) -> Tuple[subprocess.Popen, str, int]:
+    """Start query_service.py on a free port and wait until it listens"""
+    process = subprocess.Popen([sys.executable, "query_service.py", "--dataset", dataset, "--port", "0",
+                                "--cache-size", str(cache_size)], stdout=subprocess.PIPE, text=True)
+    line = process.stdout.readline()
+    if not line.startswith("Serving"):
+        process.kill()
+        raise RuntimeError(f"query service did not start: {line!r}")
+    address = urlsplit(line.rsplit(" ", 1)[1].strip())
+    return process, address.hostname, address.port
+
+def fetch_stats(host: str, port: int) -> Dict[str, Any]:
+    async def get() -> Dict[str, Any]:
+        reader, writer = await asyncio.open_connection(host, port)
+        writer.write(f"GET /stats HTTP/1.1\r\nHost: {host}\r\nConnection: close\r\n\r\n".encode('latin-1'))
+        response = await reader.read()
+        writer.close()
+        return json.loads(response.split(b"\r\n\r\n", 1)[1])
+    return asyncio.run(get())
+
+def run_load_test(clients: Optional[List[int]] = None, duration: float = DEFAULT_DURATION,
+                  cache_size: int = query_service.CACHE_SIZE, dataset: str = query_service.JLPT_FILE,
+                  url: Optional[str] = None) -> Dict[str, Any]:
+    """Load the service at each client count; starts its own service unless url is given"""
+    queries = build_queries(dataset)
+    process = None
+    if url:
+        address = urlsplit(url)
+        host, port = address.hostname, address.port
+    else:
+        process, host, port = start_service(dataset, cache_size)
+    results = {}
+    try:
+        for count in clients or DEFAULT_CLIENTS:
+            stats = asyncio.run(run_load(host, port, queries, count, duration))
+            results[str(count)] = stats
+            print(f"  {count:3d} clients: {stats['requests_per_second']:8,.0f} req/s,"
+                  f" p50 {stats['p50_ms']:6.2f} ms, p90 {stats['p90_ms']:6.2f} ms,"
+                  f" p99 {stats['p99_ms']:6.2f} ms, {stats['errors']} errors")
+        cache = fetch_stats(host, port)["cache"]
+        total = cache["hits"] + cache["misses"]
+        results["cache"] = {**cache, "hit_rate": cache["hits"] / total if total else 0.0}
+        print(f"  cache: {cache['hits']} hits, {cache['misses']} misses, {cache['size']} entries")
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+    return results
+
+def main():
+    """Run the load test and optionally write the results as JSON"""
+    parser = argparse.ArgumentParser(description="Load test for the vocabulary query service")
+    parser.add_argument("--clients", type=lambda value: [int(n) for n in value.split(",")], default=DEFAULT_CLIENTS,
+                        help="concurrent client counts to run, e.g. 1,8,32")
+    parser.add_argument("--duration", type=float, default=DEFAULT_DURATION, help="seconds per client count")
+    parser.add_argument("--dataset", default=query_service.JLPT_FILE, help="vocabulary file to serve and query")
+    parser.add_argument("--cache-size", type=int, default=query_service.CACHE_SIZE,
+                        help="LRU cache size of the started service (0 disables it)")
+    parser.add_argument("--compare-cache", action="store_true", help="run once without and once with the cache")
+    parser.add_argument("--url", default=None, help="load an already running service instead of starting one")
+    parser.add_argument("--json", metavar="PATH", default=None, help="write the results as JSON")
+    args = parser.parse_args()
+
+    results = {}
+    if args.compare_cache:
+        for name, size in (("uncached", 0), ("cached", args.cache_size)):
+            print(f"{name} (cache size {size}):")
+            results[name] = run_load_test(args.clients, args.duration, size, args.dataset)
+    else:
+        target = args.url or f"a new service (cache size {args.cache_size})"
+        print(f"Load testing {target} for {args.duration:g}s per client count:")
+        results = run_load_test(args.clients, args.duration, args.cache_size, args.dataset, args.url)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"Results written to {args.json}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Merge and diff the vocabulary datasets
+Entries are matched on their key, (kanji, kana) for the JLPT files and
+(japanese, uchinaguchi) for the Uchinaguchi file, through hash indexes
+built in one pass, so merging, attaching JLPT levels and diffing two
+versions of a file all stay linear in the number of entries
+"""
+
+import argparse
+import json
+import os
+import sys
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from convert_jlpt_to_spanish import LEVELS
+from validate_dataset import shape_for
+
+MAX_EXAMPLES = 5
+LEVEL_RANK = {level: rank for rank, level in enumerate(LEVELS)}
+# Merged and diffed gloss by gloss rather than as a single value
+GLOSS_FIELD = "español"
+
+Key = Tuple[str, ...]
+
+def word_key(word: Dict[str, Any], key_fields: Tuple[str, ...]) -> Key:
+    return tuple(str(word.get(field, "")) for field in key_fields)
+
+def merge_glosses(glosses: List[str], more: Iterable[str]) -> List[str]:
+    """glosses followed by the ones in more it does not have yet, order preserved"""
+    merged = list(glosses)
+    seen = set(merged)
+    for gloss in more:
+        if gloss not in seen:
+            seen.add(gloss)
+            merged.append(gloss)
+    return merged
+
+class MergeReport:
+    """What a merge did: entries read, duplicates folded and conflicting fields"""
+
+    def __init__(self):
+        self.read = 0
+        self.merged = 0
+        self.conflicts: Dict[str, int] = {}
+        self.examples: List[str] = []
+
+    def conflict(self, field: str, key: Key, kept: Any, dropped: Any):
+        self.conflicts[field] = self.conflicts.get(field, 0) + 1
+        if len(self.examples) < MAX_EXAMPLES:
+            self.examples.append(f"{' / '.join(key)}: {field} {kept!r} kept, {dropped!r} dropped")
+
+def merge_words(word_lists: Iterable[List[Dict[str, Any]]],
+                key_fields: Tuple[str, ...]) -> Tuple[List[Dict[str, Any]], MergeReport]:
+    """
+    Union of the lists keyed on key_fields, in first-seen order
+    The first entry with a key wins its fields; later ones add their glosses
+    and fill fields it lacks, and any other differing field is reported as a
+    conflict. Merging a single list dedupes it
+    """
+    report = MergeReport()
+    merged: List[Dict[str, Any]] = []
+    positions: Dict[Key, int] = {}
+    for words in word_lists:
+        for word in words:
+            report.read += 1
+            key = word_key(word, key_fields)
+            position = positions.get(key)
+            if position is None:
+                positions[key] = len(merged)
+                merged.append(dict(word))
+                continue
+            report.merged += 1
+            entry = merged[position]
+            for field, value in word.items():
+                if field == GLOSS_FIELD:
+                    entry[field] = merge_glosses(entry.get(field, []), value)
+                elif entry.get(field) in (None, ""):
+                    entry[field] = value
+                elif entry[field] != value:
+                    report.conflict(field, key, entry[field], value)
+    return merged, report
+
+class ReadingIndex:
+    """JLPT entries by written form and by reading, for looking up a bare Japanese word"""
+
+    def __init__(self, words: Iterable[Dict[str, Any]]):
+        self.by_kanji: Dict[str, Dict[str, Any]] = {}
+        self.by_kana: Dict[str, Dict[str, Any]] = {}
+        for word in words:
+            self._keep_easiest(self.by_kanji, word.get('kanji'), word)
+            self._keep_easiest(self.by_kana, word.get('kana'), word)
+
+    @staticmethod
+    def _keep_easiest(index: Dict[str, Dict[str, Any]], text: Optional[str], word: Dict[str, Any]):
+        # A word listed at several levels is learnt at the easiest of them
+        if not text:
+            return
+        current = index.get(text)
+        if current is None or LEVEL_RANK.get(word.get('level'), len(LEVELS)) < \
+                LEVEL_RANK.get(current.get('level'), len(LEVELS)):
+            index[text] = word
+
+    def lookup(self, text: str) -> Optional[Dict[str, Any]]:
+        """Entry written as text, else one read as text"""
+        return self.by_kanji.get(text) or self.by_kana.get(text)
+
+def attach_levels(words: List[Dict[str, Any]], index: ReadingIndex) -> Tuple[List[Dict[str, Any]], int]:
+    """Copies of Uchinaguchi entries with the JLPT level of their Japanese word; returns them and the match count"""
+    attached = []
+    matched = 0
+    for word in words:
+        entry = index.lookup(word.get('japanese', ''))
+        if entry is not None and entry.get('level'):
+            word = {**word, "level": entry['level']}
+            matched += 1
+        attached.append(word)
+    return attached, matched
+
+def diff_words(old: List[Dict[str, Any]], new: List[Dict[str, Any]],
+               key_fields: Tuple[str, ...]) -> Dict[str, Any]:
+    """
+    Structural diff of two versions of a dataset
+    Entries are paired by key (and by occurrence, for keys listed more than
+    once); paired entries report glosses added and removed and any other
+    field whose value changed
+    """
+    def keyed(words: List[Dict[str, Any]]) -> Dict[Tuple[Key, int], Dict[str, Any]]:
+        occurrences: Dict[Key, int] = {}
+        result = {}
+        for word in words:
+            key = word_key(word, key_fields)
+            occurrence = occurrences.get(key, 0)
+            occurrences[key] = occurrence + 1
+            result[(key, occurrence)] = word
+        return result
+
+    old_entries = keyed(old)
+    new_entries = keyed(new)
+    added = [word for key, word in new_entries.items() if key not in old_entries]
+    removed = [word for key, word in old_entries.items() if key not in new_entries]
+    changed = []
+    for key, before in old_entries.items():
+        after = new_entries.get(key)
+        if after is None or after == before:
+            continue
+        old_glosses = before.get(GLOSS_FIELD, [])
+        new_glosses = after.get(GLOSS_FIELD, [])
+        old_set, new_set = set(old_glosses), set(new_glosses)
+        fields = {field: [before.get(field), after.get(field)]
+                  for field in dict.fromkeys([*before, *after])
+                  if field != GLOSS_FIELD and before.get(field) != after.get(field)}
+        changed.append({
+            "key": list(key[0]),
+            "glosses_added": [gloss for gloss in new_glosses if gloss not in old_set],
+            "glosses_removed": [gloss for gloss in old_glosses if gloss not in new_set],
+            # Same glosses in another order
+            "glosses_reordered": old_glosses != new_glosses and old_set == new_set,
+            "fields": fields
+        })
+    return {
+        "key": list(key_fields),
+        "old_count": len(old),
+        "new_count": len(new),
+        "added": added,
+        "removed": removed,
+        "changed": changed,
+        "unchanged": len(old_entries) - len(removed) - len(changed)
+    }
+
+def load_dataset(path: str) -> Dict[str, Any]:
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+def write_dataset(path: str, metadata: Dict[str, Any], words: List[Dict[str, Any]], sources: List[str]):
+    """Write a dataset with metadata carried over from its first source"""
+    metadata = {**metadata, "total_words": len(words), "merged_from": [os.path.basename(s) for s in sources]}
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({"metadata": metadata, "words": words}, f, ensure_ascii=False, indent=2)
+
+def print_merge_report(report: MergeReport, count: int):
+    print(f"{report.read} entries read, {report.merged} merged into existing ones, {count} written")
+    for field, conflicts in sorted(report.conflicts.items()):
+        print(f"  {field}: {conflicts} conflicting values (first source kept)")
+    for example in report.examples:
+        print(f"    {example}")
+
+def cmd_merge(args: argparse.Namespace) -> int:
+    datasets = [load_dataset(path) for path in args.files]
+    words_lists = [data['words'] for data in datasets]
+    key_fields = shape_for(words_lists[0])["key"]
+    merged, report = merge_words(words_lists, key_fields)
+    write_dataset(args.output, datasets[0].get('metadata', {}), merged, args.files)
+    print_merge_report(report, len(merged))
+    print(f"Created {args.output}")
+    return 0
+
+def cmd_levels(args: argparse.Namespace) -> int:
+    data = load_dataset(args.uchinaguchi)
+    words, report = merge_words([data['words']], shape_for(data['words'])["key"])
+    index = ReadingIndex(word for path in args.jlpt for word in load_dataset(path)['words'])
+    words, matched = attach_levels(words, index)
+    write_dataset(args.output, data.get('metadata', {}), words, [args.uchinaguchi])
+    print_merge_report(report, len(words))
+    print(f"JLPT level attached to {matched} of {len(words)} entries")
+    print(f"Created {args.output}")
+    return 0
+
+def cmd_diff(args: argparse.Namespace) -> int:
+    old = load_dataset(args.old)['words']
+    new = load_dataset(args.new)['words']
+    diff = diff_words(old, new, shape_for(old or new)["key"])
+    print(f"{args.old} -> {args.new}: {len(diff['added'])} added, {len(diff['removed'])} removed,"
+          f" {len(diff['changed'])} changed, {diff['unchanged']} unchanged")
+    if args.verbose:
+        for word in diff['added'][:MAX_EXAMPLES]:
+            print(f"  + {' / '.join(word_key(word, tuple(diff['key'])))}")
+        for word in diff['removed'][:MAX_EXAMPLES]:
+            print(f"  - {' / '.join(word_key(word, tuple(diff['key'])))}")
+        for change in diff['changed'][:MAX_EXAMPLES]:
+            details = [f"+{gloss}" for gloss in change['glosses_added']]
+            details += [f"-{gloss}" for gloss in change['glosses_removed']]
+            details += [f"{field}: {before!r} -> {after!r}" for field, (before, after) in change['fields'].items()]
+            print(f"  ~ {' / '.join(change['key'])}: {', '.join(details) or 'glosses reordered'}")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(diff, f, ensure_ascii=False, indent=2)
+        print(f"Diff written to {args.json}")
+    return 1 if args.exit_code and (diff['added'] or diff['removed'] or diff['changed']) else 0
+
+def parse_args(argv=None) -> argparse.Namespace:
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Merge and diff vocabulary dataset files")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    merge = commands.add_parser("merge", help="union of datasets of the same shape, deduped by key")
+    merge.add_argument("files", nargs="+", help="datasets, in priority order")
+    merge.add_argument("--output", required=True, help="merged dataset file")
+    merge.set_defaults(func=cmd_merge)
+
+    levels = commands.add_parser("levels", help="dedupe the Uchinaguchi file and attach JLPT levels")
+    levels.add_argument("uchinaguchi", help="Uchinaguchi dataset")
+    levels.add_argument("jlpt", nargs="+", help="JLPT datasets to take levels from")
+    levels.add_argument("--output", required=True, help="Uchinaguchi dataset with levels")
+    levels.set_defaults(func=cmd_levels)
+
+    diff = commands.add_parser("diff", help="added, removed and changed entries between two versions")
+    diff.add_argument("old", help="earlier version")
+    diff.add_argument("new", help="later version")
+    diff.add_argument("--json", metavar="PATH", default=None, help="also write the full diff as JSON")
+    diff.add_argument("--verbose", "-v", action="store_true", help="show the first few entries of each kind")
+    diff.add_argument("--exit-code", action="store_true", help="exit with status 1 when the versions differ")
+    diff.set_defaults(func=cmd_diff)
+    return parser.parse_args(argv)
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    return args.func(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
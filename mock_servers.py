@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Local stand-ins for the remote services, for the benchmarks and checks only
+Each server runs on a background thread with its own handler class (fresh
+counters and settings per server) and counts what it served, so callers
+can tell cache hits and retries from real requests. Nothing here is
+imported by the converters
+"""
+
+import argparse
+import hashlib
+import json
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from convert_jlpt_to_spanish import translate_english_to_spanish
+from translation_backend import normalize_text
+
+TRANSLATION_PORT = 8770
+PAGES_PORT = 8772
+
+class MockSourceHandler(BaseHTTPRequestHandler):
+    """
+    Local stand-in for the word list API, for exercising the cache
+    Serves bodies by path with an ETag and a Last-Modified date (either can
+    be turned off) and answers matching conditional requests with 304.
+    set_body replaces a body, giving it a new ETag and date
+    """
+
+    bodies: Dict[str, bytes] = {}
+    validators: Dict[str, Dict[str, str]] = {}
+    latency = 0.0
+    send_etag = True
+    send_last_modified = True
+    full_responses = 0
+    not_modified = 0
+    lock = threading.Lock()
+
+    @classmethod
+    def set_body(cls, path: str, body: bytes):
+        with cls.lock:
+            cls.bodies[path] = body
+            cls.validators[path] = {"etag": '"' + hashlib.sha256(body).hexdigest()[:16] + '"',
+                                    "last_modified": formatdate(time.time(), usegmt=True)}
+
+    def do_GET(self):
+        cls = type(self)
+        body = cls.bodies.get(self.path)
+        if body is None:
+            self.send_error(404, "no such resource")
+            return
+        if self.latency:
+            time.sleep(self.latency)
+        validators = cls.validators[self.path]
+        etag = validators['etag'] if cls.send_etag else None
+        last_modified = validators['last_modified'] if cls.send_last_modified else None
+        if (etag and self.headers.get('If-None-Match') == etag) or \
+                (last_modified and not etag and self.headers.get('If-Modified-Since') == last_modified):
+            with cls.lock:
+                cls.not_modified += 1
+            self.send_response(304)
+            self.end_headers()
+            return
+        with cls.lock:
+            cls.full_responses += 1
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        if etag:
+            self.send_header('ETag', etag)
+        if last_modified:
+            self.send_header('Last-Modified', last_modified)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def serve_source(bodies: Dict[str, bytes], port: int = 0, latency: float = 0.0, etag: bool = True,
+               last_modified: bool = True) -> ThreadingHTTPServer:
+    """Start the mock word list source on a background thread (see MockSourceHandler)"""
+    handler = type("Handler", (MockSourceHandler,), {
+        "bodies": {},
+        "validators": {},
+        "latency": latency,
+        "send_etag": etag,
+        "send_last_modified": last_modified,
+        "full_responses": 0,
+        "not_modified": 0,
+        "lock": threading.Lock()
+    })
+    for path, body in bodies.items():
+        handler.set_body(path, body)
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+class MockTranslationHandler(BaseHTTPRequestHandler):
+    """Local stand-in for a translation API, answering from a translate function"""
+
+    translate: Callable[[str], str] = staticmethod(normalize_text)
+    latency = 0.0
+    requests_served = 0
+    texts_served = 0
+    lock = threading.Lock()
+
+    def do_POST(self):
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            texts = json.loads(self.rfile.read(length))['q']
+        except (ValueError, KeyError):
+            self.send_error(400, "expected {\"q\": [...]}")
+            return
+        if self.latency:
+            time.sleep(self.latency)
+        cls = type(self)
+        with cls.lock:
+            cls.requests_served += 1
+            cls.texts_served += len(texts)
+        body = json.dumps({"translations": [cls.translate(text) for text in texts]},
+                          ensure_ascii=False).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def serve_translation(port: int = TRANSLATION_PORT, latency: float = 0.0) -> ThreadingHTTPServer:
+    """Start the mock translation API on a background thread, answering with the dictionary translator"""
+    handler = type("Handler", (MockTranslationHandler,), {
+        "translate": staticmethod(translate_english_to_spanish),
+        "latency": latency,
+        "requests_served": 0,
+        "texts_served": 0,
+        "lock": threading.Lock()
+    })
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+class MockPageHandler(BaseHTTPRequestHandler):
+    """
+    Local stand-in for the paged words API, with injected faults
+    Serves GET ?level=&offset=&limit= slices of pages (level -> words), as
+    {"words", "total"} or, without report_total, as a bare list. flaky maps
+    (level, offset) to how many requests for that page get a 503 before it
+    succeeds, slow to extra seconds for that page, and missing pages always
+    get a 404
+    """
+
+    pages: Dict[int, List[Dict[str, Any]]] = {}
+    latency = 0.0
+    report_total = True
+    flaky: Dict[Tuple[int, int], int] = {}
+    slow: Dict[Tuple[int, int], float] = {}
+    missing: Set[Tuple[int, int]] = set()
+    attempts: Dict[Tuple[int, int], int] = {}
+    requests_served = 0
+    lock = threading.Lock()
+
+    def do_GET(self):
+        query = parse_qs(urlsplit(self.path).query)
+        try:
+            level, offset, limit = (int(query[name][0]) for name in ("level", "offset", "limit"))
+        except (KeyError, ValueError):
+            self.send_error(400, "expected level, offset and limit")
+            return
+        cls = type(self)
+        key = (level, offset)
+        with cls.lock:
+            cls.requests_served += 1
+            cls.attempts[key] = attempt = cls.attempts.get(key, 0) + 1
+        time.sleep(self.latency + self.slow.get(key, 0.0))
+        if key in self.missing:
+            self.send_error(404, "no such page")
+            return
+        if attempt <= self.flaky.get(key, 0):
+            self.send_error(503, "try again")
+            return
+        words = self.pages.get(level, [])
+        page = words[offset:offset + limit]
+        payload = {"words": page, "total": len(words)} if self.report_total else page
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def serve_pages(pages: Dict[int, List[Dict[str, Any]]], port: int = PAGES_PORT, latency: float = 0.0,
+                report_total: bool = True, flaky: Optional[Dict[Tuple[int, int], int]] = None,
+                slow: Optional[Dict[Tuple[int, int], float]] = None,
+                missing: Optional[Set[Tuple[int, int]]] = None) -> ThreadingHTTPServer:
+    """Start the mock pages API on a background thread (see MockPageHandler)"""
+    handler = type("Handler", (MockPageHandler,), {
+        "pages": pages,
+        "latency": latency,
+        "report_total": report_total,
+        "flaky": dict(flaky or {}),
+        "slow": dict(slow or {}),
+        "missing": set(missing or ()),
+        "attempts": {},
+        "requests_served": 0,
+        "lock": threading.Lock()
+    })
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def page_url(server: ThreadingHTTPServer) -> str:
+    """page_url template pointing at a mock server"""
+    return f"http://127.0.0.1:{server.server_address[1]}/api/words?level={{level}}&offset={{offset}}&limit={{limit}}"
+
+def pages_from_dataset(path: str) -> Dict[int, List[Dict[str, Any]]]:
+    """API-shaped words per numeric level from a converted vocabulary file"""
+    with open(path, encoding='utf-8') as f:
+        words = json.load(f)['words']
+    pages: Dict[int, List[Dict[str, Any]]] = {}
+    for w in words:
+        pages.setdefault(int(w['level'][1]), []).append(
+            {"word": w['kanji'], "furigana": w['kana'], "romaji": w['romaji'],
+             "meaning": w['español'][0], "level": int(w['level'][1])})
+    return pages
+
+def serve_until_interrupted(server: ThreadingHTTPServer):
+    """Keep a mock server up until Ctrl+C, then report what it served"""
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        print(f"Served {server.RequestHandlerClass.requests_served} requests")
+        server.shutdown()
+
+def main():
+    """
+    Run a mock service until Ctrl+C:
+    mock_servers.py translate [--port N] [--latency SECONDS]
+    mock_servers.py pages [--dataset FILE] [--port N] [--latency SECONDS] [--no-total]
+    """
+    parser = argparse.ArgumentParser(description="Local stand-ins for the remote services")
+    services = parser.add_subparsers(dest="service", required=True)
+    translate = services.add_parser("translate", help="translation API backed by the dictionary translator")
+    translate.add_argument("--port", type=int, default=TRANSLATION_PORT)
+    translate.add_argument("--latency", type=float, default=0.0, help="seconds added to every request")
+    pages = services.add_parser("pages", help="paged words API for --paged runs")
+    pages.add_argument("--dataset", default="vocabulario-jlpt-4000.json", help="vocabulary file to serve")
+    pages.add_argument("--port", type=int, default=PAGES_PORT)
+    pages.add_argument("--latency", type=float, default=0.0, help="seconds added to every request")
+    pages.add_argument("--no-total", action="store_true", help="serve bare lists, so clients have to probe")
+    args = parser.parse_args()
+
+    if args.service == "translate":
+        server = serve_translation(args.port, args.latency)
+        print(f"Mock translation API on http://127.0.0.1:{server.server_address[1]}/translate (Ctrl+C to stop)")
+    else:
+        server = serve_pages(pages_from_dataset(args.dataset), args.port, args.latency, not args.no_total)
+        print(f"Mock pages API on {page_url(server)} (Ctrl+C to stop)")
+    serve_until_interrupted(server)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Concurrent fetching of per-level JLPT word pages
+Pulls paginated slices over one pooled requests.Session with bounded
+concurrency, retries failed pages with jittered exponential backoff, and
+keeps whatever succeeded when some pages cannot be fetched
+"""
+
+import concurrent.futures
+import json
+import random
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from http_cache import CacheMiss, ResponseCache
+
+PAGE_URL = "https://jlpt-vocab-api.vercel.app/api/words?level={level}&offset={offset}&limit={limit}"
+PAGE_SIZE = 500
+CONCURRENCY = 8
+RETRIES = 4
+BACKOFF_BASE = 0.5      # seconds; attempt n waits up to BACKOFF_BASE * 2**n
+PAGE_TIMEOUT = 15
+LEVELS = [5, 4, 3, 2, 1]
+
+# Status codes worth retrying; anything else fails the page immediately
+RETRY_STATUSES = {408, 425, 429, 500, 502, 503, 504}
+
+RECOVERY_ROUNDS = 1
+
+class PageError(Exception):
+    """A page that still failed after all retries"""
+
+    def __init__(self, message: str, transient: bool = True):
+        super().__init__(message)
+        self.transient = transient
+
+class PagedFetcher:
+    """
+    Fetches every level's pages concurrently
+    The first page of each level gives the total (when the API reports it),
+    after which the remaining offsets are fetched in parallel. Without a
+    total, pages are probed in waves until one comes back short
+    """
+
+    def __init__(self, page_url: str = PAGE_URL, page_size: int = PAGE_SIZE,
+                 concurrency: int = CONCURRENCY, retries: int = RETRIES,
+                 backoff: float = BACKOFF_BASE, timeout: float = PAGE_TIMEOUT,
+                 recovery_rounds: int = RECOVERY_ROUNDS,
+                 cache: Optional[ResponseCache] = None, session: Optional[requests.Session] = None):
+        self.page_url = page_url
+        self.page_size = page_size
+        self.concurrency = concurrency
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.recovery_rounds = recovery_rounds
+        self.cache = cache
+        self.session = session or requests.Session()
+        adapter = HTTPAdapter(pool_connections=concurrency, pool_maxsize=concurrency)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        if cache is not None and cache.session is None:
+            cache.session = self.session
+        self.failures: List[Tuple[int, int, str]] = []
+        self.requests_made = 0
+        self._counter_lock = threading.Lock()
+
+    def page(self, level: int, offset: int) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        """One page of words and the level total if reported, retrying transient errors"""
+        url = self.page_url.format(level=level, offset=offset, limit=self.page_size)
+        for attempt in range(self.retries + 1):
+            with self._counter_lock:
+                self.requests_made += 1
+            try:
+                return parse_page(self._get(url))
+            except CacheMiss as e:
+                raise PageError(f"level {level} offset {offset}: {e}", transient=False) from e
+            except (requests.RequestException, ValueError) as e:
+                status = getattr(getattr(e, 'response', None), 'status_code', None)
+                transient = status is None or status in RETRY_STATUSES
+                if attempt == self.retries or not transient:
+                    raise PageError(f"level {level} offset {offset}: {e}", transient) from e
+                # Full jitter keeps concurrent retries from hitting the server in lockstep
+                time.sleep(random.uniform(0, self.backoff * 2 ** attempt))
+        raise AssertionError("unreachable")
+
+    def _get(self, url: str) -> Any:
+        if self.cache is not None:
+            with open(self.cache.fetch(url), encoding='utf-8') as f:
+                return json.load(f)
+        response = self.session.get(url, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def fetch_all(self, levels: List[int] = LEVELS) -> List[Dict[str, Any]]:
+        """
+        All words of the given levels, level by level in offset order
+        Pages that failed transiently get recovery_rounds more attempts once
+        everything else has finished, in case the server has recovered
+        """
+        pages: Dict[Tuple[int, int], List[Dict[str, Any]]] = {}
+        failed: List[Tuple[int, int, PageError]] = []
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            def submit(level: int, offset: int) -> concurrent.futures.Future:
+                future = executor.submit(self.page, level, offset)
+                futures[future] = (level, offset)
+                return future
+
+            futures: Dict[concurrent.futures.Future, Tuple[int, int]] = {}
+            # Levels without a reported total: next offset to probe
+            probing: Dict[int, int] = {}
+            for level in levels:
+                submit(level, 0)
+            rounds_left = self.recovery_rounds
+
+            while futures:
+                done, _ = concurrent.futures.wait(futures, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    level, offset = futures.pop(future)
+                    try:
+                        words, total = future.result()
+                    except PageError as e:
+                        failed.append((level, offset, e))
+                        continue
+                    pages[(level, offset)] = words
+
+                    if offset == 0 and total is not None:
+                        for next_offset in range(self.page_size, total, self.page_size):
+                            submit(level, next_offset)
+                    elif total is None and len(words) == self.page_size:
+                        # Keep a window of probes in flight until a short page shows up
+                        start = max(probing.get(level, self.page_size), offset + self.page_size)
+                        stop = offset + self.page_size * (self.concurrency + 1)
+                        for next_offset in range(start, stop, self.page_size):
+                            submit(level, next_offset)
+                        probing[level] = max(start, stop)
+
+                if not futures and rounds_left and any(e.transient for _, _, e in failed):
+                    rounds_left -= 1
+                    retry = [(level, offset) for level, offset, e in failed if e.transient]
+                    failed = [(level, offset, e) for level, offset, e in failed if not e.transient]
+                    print(f"Retrying {len(retry)} failed pages...")
+                    for level, offset in retry:
+                        submit(level, offset)
+
+        self.failures = [(level, offset, str(e)) for level, offset, e in sorted(failed, key=lambda f: f[:2])]
+        for _, _, message in self.failures:
+            print(f"Warning: giving up on page {message}")
+
+        words = []
+        for level in levels:
+            offsets = sorted(offset for page_level, offset in pages if page_level == level)
+            for offset in offsets:
+                words.extend(pages[(level, offset)])
+        return words
+
+def parse_page(payload: Any) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+    """Accept either a bare list or a {"words": [...], "total": n} page"""
+    if isinstance(payload, list):
+        return payload, None
+    if isinstance(payload, dict) and isinstance(payload.get('words'), list):
+        total = payload.get('total')
+        return payload['words'], total if isinstance(total, int) else None
+    raise ValueError("Unexpected page format")
+
+def fetch_jlpt_pages(page_url: str = PAGE_URL, cache: Optional[ResponseCache] = None,
+                     **options) -> List[Dict[str, Any]]:
+    """Fetch all levels page by page and report what failed"""
+    fetcher = PagedFetcher(page_url, cache=cache, **options)
+    start = time.perf_counter()
+    words = fetcher.fetch_all()
+    print(f"Fetched {len(words)} words in {fetcher.requests_made} requests"
+          f" ({time.perf_counter() - start:.1f}s)")
+    if fetcher.failures:
+        print(f"Warning: {len(fetcher.failures)} pages failed; continuing with the words that were fetched")
+    return words
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Run metrics for the converter pipeline
+Stages record exclusive wall and CPU time (time spent in a nested stage is
+charged to that stage only), counters and histograms are plain dicts, and
+the whole report is written as JSON so runs can be compared
+"""
+
+import json
+import sys
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from checkpoint import atomic_open
+
+REPORT_VERSION = 1
+
+class PipelineMetrics:
+    """Stage timers, counters and histograms of one run"""
+
+    def __init__(self):
+        self.stages: Dict[str, Dict[str, float]] = {}
+        self.counters: Dict[str, int] = {}
+        self.histograms: Dict[str, Dict[str, int]] = {}
+        self.info: Dict[str, Any] = {}
+        # Open stages: [name, wall mark, cpu mark]; only the innermost is charged
+        self._stack: List[List[Any]] = []
+        self._started = (time.perf_counter(), time.process_time())
+
+    def _charge(self, frame: List[Any], wall: float, cpu: float):
+        totals = self.stages.setdefault(frame[0], {"wall_seconds": 0.0, "cpu_seconds": 0.0})
+        totals["wall_seconds"] += wall - frame[1]
+        totals["cpu_seconds"] += cpu - frame[2]
+        frame[1], frame[2] = wall, cpu
+
+    def _enter(self, name: str):
+        wall, cpu = time.perf_counter(), time.process_time()
+        if self._stack:
+            self._charge(self._stack[-1], wall, cpu)
+        self._stack.append([name, wall, cpu])
+
+    def _exit(self):
+        wall, cpu = time.perf_counter(), time.process_time()
+        self._charge(self._stack.pop(), wall, cpu)
+        if self._stack:
+            self._stack[-1][1:] = [wall, cpu]
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Time a block as stage name"""
+        self._enter(name)
+        try:
+            yield
+        finally:
+            self._exit()
+
+    def timed(self, name: str, iterable: Iterable[Any]) -> Iterator[Any]:
+        """
+        Charge the time spent producing each item of a lazy iterable to stage name
+        Lets interleaved streaming stages (parse inside select, process
+        inside serialize) be told apart
+        """
+        iterator = iter(iterable)
+        while True:
+            self._enter(name)
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                self._exit()
+            yield item
+
+    def count(self, name: str, amount: int = 1):
+        """Add to a counter"""
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def observe(self, histogram: str, value: str, amount: int = 1):
+        """Add to one bucket of a histogram"""
+        buckets = self.histograms.setdefault(histogram, {})
+        buckets[value] = buckets.get(value, 0) + amount
+
+    def rate(self, numerator: str, denominator: str) -> Optional[float]:
+        """Ratio of two counters, None when the denominator is zero"""
+        total = self.counters.get(denominator, 0)
+        return self.counters.get(numerator, 0) / total if total else None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The machine-readable report"""
+        wall = time.perf_counter() - self._started[0]
+        cpu = time.process_time() - self._started[1]
+        process_wall = self.stages.get("process", {}).get("wall_seconds", 0.0)
+        # Words reused from the manifest or checkpoint cost next to nothing;
+        # counting them would inflate the rate of an incremental run
+        recomputed = self.counters.get("recomputed_words", 0)
+        return {
+            "version": REPORT_VERSION,
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "info": self.info,
+            "total": {"wall_seconds": wall, "cpu_seconds": cpu},
+            "stages": self.stages,
+            "counters": self.counters,
+            "rates": {
+                "words_per_second": recomputed / process_wall if process_wall and recomputed else None,
+                "untranslated_token_rate": self.rate("untranslated_tokens", "meaning_tokens")
+            },
+            "histograms": self.histograms
+        }
+
+    def write(self, path: str):
+        """Write the report as JSON"""
+        with atomic_open(path) as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+
+    def summary(self) -> List[str]:
+        """Human-readable lines for the end of a run"""
+        report = self.to_dict()
+        lines = []
+        for name, totals in report["stages"].items():
+            lines.append(f"  {name}: {totals['wall_seconds']:.2f}s wall, {totals['cpu_seconds']:.2f}s CPU")
+        lines.append(f"  total: {report['total']['wall_seconds']:.2f}s wall, {report['total']['cpu_seconds']:.2f}s CPU")
+        rates = report["rates"]
+        if rates["words_per_second"] is not None:
+            lines.append(f"  {rates['words_per_second']:,.0f} words/s recomputed")
+        if rates["untranslated_token_rate"] is not None:
+            lines.append(f"  {rates['untranslated_token_rate']:.1%} of meaning tokens left untranslated")
+        return lines
+
+def compare_reports(old: Dict[str, Any], new: Dict[str, Any]) -> List[str]:
+    """Stage-by-stage wall time and rate changes between two reports"""
+    lines = []
+    for name in list(dict.fromkeys([*old["stages"], *new["stages"]])):
+        before = old["stages"].get(name, {}).get("wall_seconds")
+        after = new["stages"].get(name, {}).get("wall_seconds")
+        if before is None or after is None:
+            lines.append(f"  {name}: only in {'new' if before is None else 'old'} report")
+            continue
+        change = (after - before) / before if before else 0.0
+        lines.append(f"  {name}: {before:.3f}s -> {after:.3f}s ({change:+.1%})")
+    for name in ("words_per_second", "untranslated_token_rate"):
+        before, after = old["rates"].get(name), new["rates"].get(name)
+        if before is not None and after is not None:
+            lines.append(f"  {name}: {before:.4g} -> {after:.4g}")
+    return lines
+
+def main():
+    """Compare two metrics reports: pipeline_metrics.py OLD.json NEW.json"""
+    if len(sys.argv) != 3:
+        print("Usage: pipeline_metrics.py OLD.json NEW.json")
+        sys.exit(1)
+    reports = []
+    for path in sys.argv[1:]:
+        with open(path, encoding='utf-8') as f:
+            reports.append(json.load(f))
+    print(f"{sys.argv[1]} -> {sys.argv[2]}")
+    for line in compare_reports(*reports):
+        print(line)
+
+if __name__ == "__main__":
+    main()
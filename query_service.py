@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+Local HTTP query service over the vocabulary datasets
+Loads the JLPT and Uchinaguchi files once into in-memory indexes (the
+n-gram search index plus per-level and per-type id lists) and answers JSON
+queries on an asyncio server, keeping the encoded responses of hot queries
+in an LRU cache:
+
+    GET /search?q=agua&level=N5&limit=20
+    GET /search?q=はい&dataset=uchinaguchi&category=saludos
+    GET /level/N5?type=verbo&offset=50&limit=50
+    GET /type/adjetivo?level=N4
+    GET /random?n=10&level=N3&seed=7
+    GET /stats
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, unquote, urlencode, urlsplit
+
+from search_index import JLPT_FIELDS, UCHINAGUCHI_FIELDS, SearchIndex, SearchIndexBuilder
+from translation_backend import LRUCache
+
+JLPT_FILE = "vocabulario-jlpt-4000.json"
+UCHINAGUCHI_FILE = "vocabulario-uchinaguchi.json"
+SERVICE_HOST = "127.0.0.1"
+SERVICE_PORT = 8771
+CACHE_SIZE = 1024
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 1000
+MAX_HEADER_LINES = 100
+
+STATUS_TEXT = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed"}
+
+class QueryError(Exception):
+    """A request the service cannot answer, with the HTTP status to report"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+def build_index(words: List[Dict[str, Any]], fields: List[str], partition_key: str) -> SearchIndex:
+    """Search index built in memory, the same one the converter writes next to its output"""
+    builder = SearchIndexBuilder(fields, partition_key)
+    for word in words:
+        builder.add(word)
+    return SearchIndex(builder.to_dict(), words)
+
+class VocabularyStore:
+    """The datasets, loaded once, with the id lists the queries need"""
+
+    def __init__(self, words: List[Dict[str, Any]], uchinaguchi: Optional[List[Dict[str, Any]]] = None):
+        self.words = words
+        self.uchinaguchi = uchinaguchi or []
+        self.index = build_index(self.words, JLPT_FIELDS, "level")
+        self.uchinaguchi_index = build_index(self.uchinaguchi, UCHINAGUCHI_FIELDS, "category")
+        # (level or None, type or None) -> word ids in dataset order
+        self.groups: Dict[Tuple[Optional[str], Optional[str]], List[int]] = {(None, None): list(range(len(words)))}
+        for word_id, word in enumerate(words):
+            level, word_type = word.get('level'), word.get('type')
+            for key in ((level, None), (None, word_type), (level, word_type)):
+                self.groups.setdefault(key, []).append(word_id)
+
+    @classmethod
+    def load(cls, path: str = JLPT_FILE, uchinaguchi_path: Optional[str] = UCHINAGUCHI_FILE) -> "VocabularyStore":
+        with open(path, encoding='utf-8') as f:
+            words = json.load(f)['words']
+        uchinaguchi = None
+        if uchinaguchi_path:
+            try:
+                with open(uchinaguchi_path, encoding='utf-8') as f:
+                    uchinaguchi = json.load(f)['words']
+            except OSError:
+                pass
+        return cls(words, uchinaguchi)
+
+    def dataset(self, name: str) -> List[Dict[str, Any]]:
+        return self.uchinaguchi if name == "uchinaguchi" else self.words
+
+    def search(self, term: str, partition: Optional[str] = None, dataset: str = "jlpt") -> List[int]:
+        """Ids of the words containing term, within one level (or Uchinaguchi category) or all"""
+        index = self.uchinaguchi_index if dataset == "uchinaguchi" else self.index
+        return index.search(term, partition)
+
+    def select(self, level: Optional[str] = None, word_type: Optional[str] = None) -> List[int]:
+        """Ids of the words of a level and/or type"""
+        return self.groups.get((level, word_type), [])
+
+    def sample(self, n: int, level: Optional[str] = None, word_type: Optional[str] = None,
+               seed: Optional[int] = None) -> List[Dict[str, Any]]:
+        """n random words of a level and/or type, reproducible when seeded"""
+        ids = self.select(level, word_type)
+        rng = random.Random(seed) if seed is not None else random
+        return [self.words[i] for i in rng.sample(ids, min(n, len(ids)))]
+
+    def counts(self) -> Dict[str, Dict[str, int]]:
+        levels = {level: len(ids) for (level, word_type), ids in self.groups.items()
+                  if level is not None and word_type is None}
+        types = {word_type: len(ids) for (level, word_type), ids in self.groups.items()
+                 if level is None and word_type is not None}
+        return {"levels": levels, "types": types, "uchinaguchi": {"words": len(self.uchinaguchi)}}
+
+def _int_param(params: Dict[str, str], name: str, default: int, maximum: int = MAX_LIMIT) -> int:
+    value = params.get(name)
+    if value is None:
+        return default
+    try:
+        number = int(value)
+    except ValueError:
+        raise QueryError(400, f"{name} must be an integer")
+    if not 0 <= number <= maximum:
+        raise QueryError(400, f"{name} must be between 0 and {maximum}")
+    return number
+
+def _page(ids: List[int], words: List[Dict[str, Any]], params: Dict[str, str]) -> Dict[str, Any]:
+    """One offset/limit page of the words with the given ids"""
+    offset = _int_param(params, "offset", 0, 2 ** 31)
+    limit = _int_param(params, "limit", DEFAULT_LIMIT)
+    return {"count": len(ids), "offset": offset, "results": [words[i] for i in ids[offset:offset + limit]]}
+
+class QueryService:
+    """
+    Routes requests to the store and caches encoded responses
+    Responses are cached under the path plus the sorted query string, so
+    parameter order does not split cache entries; unseeded random samples
+    are never cached
+    """
+
+    def __init__(self, store: VocabularyStore, cache_size: int = CACHE_SIZE):
+        self.store = store
+        self.cache = LRUCache(cache_size) if cache_size > 0 else None
+        self.routes: Dict[str, Callable[[str, Dict[str, str]], Any]] = {
+            "search": self.search,
+            "level": self.level,
+            "type": self.word_type,
+            "random": self.random_sample,
+            "stats": self.stats
+        }
+        self.requests = 0
+        self.hits = 0
+        self.misses = 0
+        self.started = time.time()
+
+    def search(self, argument: str, params: Dict[str, str]) -> Dict[str, Any]:
+        term = params.get("q", "")
+        if not term.strip():
+            raise QueryError(400, "q is required")
+        dataset = params.get("dataset", "jlpt")
+        if dataset not in ("jlpt", "uchinaguchi"):
+            raise QueryError(400, "dataset must be jlpt or uchinaguchi")
+        partition = params.get("category" if dataset == "uchinaguchi" else "level")
+        return _page(self.store.search(term, partition, dataset), self.store.dataset(dataset), params)
+
+    def level(self, argument: str, params: Dict[str, str]) -> Dict[str, Any]:
+        return _page(self.store.select(argument or None, params.get("type")), self.store.words, params)
+
+    def word_type(self, argument: str, params: Dict[str, str]) -> Dict[str, Any]:
+        return _page(self.store.select(params.get("level"), argument or None), self.store.words, params)
+
+    def random_sample(self, argument: str, params: Dict[str, str]) -> Dict[str, Any]:
+        n = _int_param(params, "n", 10)
+        seed = _int_param(params, "seed", 0, 2 ** 63) if "seed" in params else None
+        results = self.store.sample(n, params.get("level"), params.get("type"), seed)
+        return {"count": len(results), "results": results}
+
+    def stats(self, argument: str, params: Dict[str, str]) -> Dict[str, Any]:
+        return {
+            "words": len(self.store.words),
+            **self.store.counts(),
+            "requests": self.requests,
+            "cache": {"size": len(self.cache.data) if self.cache else 0, "hits": self.hits, "misses": self.misses},
+            "uptime_seconds": time.time() - self.started
+        }
+
+    def handle(self, target: str) -> Tuple[int, bytes]:
+        """Status and JSON body for a GET request target"""
+        self.requests += 1
+        url = urlsplit(target)
+        params = dict(parse_qsl(url.query))
+        route, _, argument = url.path.strip("/").partition("/")
+        cacheable = route not in ("stats", "random") or (route == "random" and "seed" in params)
+        key = url.path + "?" + urlencode(sorted(params.items()))
+        if cacheable and self.cache is not None:
+            body = self.cache.get(key)
+            if body is not None:
+                self.hits += 1
+                return 200, body
+        try:
+            handler = self.routes.get(route)
+            if handler is None:
+                raise QueryError(404, f"unknown query {url.path!r}")
+            body = json.dumps(handler(unquote(argument), params), ensure_ascii=False).encode('utf-8')
+        except QueryError as e:
+            return e.status, json.dumps({"error": str(e)}, ensure_ascii=False).encode('utf-8')
+        if cacheable and self.cache is not None:
+            self.misses += 1
+            self.cache.put(key, body)
+        return 200, body
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serve HTTP/1.1 requests on one connection until the client closes it"""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                for _ in range(MAX_HEADER_LINES):
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode('latin-1').partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                try:
+                    method, target, version = request_line.decode('latin-1').split()
+                except ValueError:
+                    await self._respond(writer, 400, b'{"error":"malformed request line"}', False)
+                    break
+                length = int(headers.get("content-length", 0) or 0)
+                if length:
+                    await reader.readexactly(length)
+                connection = headers.get("connection", "").lower()
+                keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+                if method != "GET":
+                    status, body = 405, b'{"error":"only GET is supported"}'
+                else:
+                    # Queries are in-memory lookups, answered on the event loop without blocking it for long
+                    status, body = self.handle(target)
+                await self._respond(writer, status, body, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _respond(writer: asyncio.StreamWriter, status: int, body: bytes, keep_alive: bool):
+        head = (f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+                "Content-Type: application/json; charset=utf-8\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode('latin-1') + body)
+        await writer.drain()
+
+async def start(service: QueryService, host: str = SERVICE_HOST, port: int = SERVICE_PORT) -> asyncio.AbstractServer:
+    """Listen for requests on host:port (0 picks a free port)"""
+    return await asyncio.start_server(service.handle_connection, host, port)
+
+def serve(path: str = JLPT_FILE, uchinaguchi_path: Optional[str] = UCHINAGUCHI_FILE,
+          host: str = SERVICE_HOST, port: int = SERVICE_PORT, cache_size: int = CACHE_SIZE):
+    """Load the datasets and serve queries until interrupted"""
+    start_time = time.perf_counter()
+    store = VocabularyStore.load(path, uchinaguchi_path)
+    service = QueryService(store, cache_size)
+    load_ms = (time.perf_counter() - start_time) * 1000
+
+    async def run():
+        server = await start(service, host, port)
+        bound_port = server.sockets[0].getsockname()[1]
+        # The load test reads the port from this line
+        print(f"Serving {len(store.words)} words ({len(store.uchinaguchi)} Uchinaguchi, loaded in {load_ms:.0f} ms)"
+              f" on http://{host}:{bound_port}", flush=True)
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        print(f"Served {service.requests} requests, {service.hits} from the cache")
+
+def main():
+    """Run the query service: query_service.py [--dataset FILE] [--port N] [--cache-size N]"""
+    parser = argparse.ArgumentParser(description="HTTP query service over the vocabulary datasets")
+    parser.add_argument("--dataset", default=JLPT_FILE, help=f"JLPT vocabulary file (default: {JLPT_FILE})")
+    parser.add_argument("--uchinaguchi", default=UCHINAGUCHI_FILE,
+                        help=f"Uchinaguchi vocabulary file (default: {UCHINAGUCHI_FILE}, '' to skip)")
+    parser.add_argument("--host", default=SERVICE_HOST)
+    parser.add_argument("--port", type=int, default=SERVICE_PORT, help=f"port (default: {SERVICE_PORT}, 0 for any)")
+    parser.add_argument("--cache-size", type=int, default=CACHE_SIZE,
+                        help=f"responses kept in the LRU cache (default: {CACHE_SIZE}, 0 disables it)")
+    args = parser.parse_args()
+    serve(args.dataset, args.uchinaguchi or None, args.host, args.port, args.cache_size)
+
+if __name__ == "__main__":
+    main()
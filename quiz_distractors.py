@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Precomputed multiple-choice distractors for the vocabulary quizzes
+Every word gets the k most similar-sounding other words of its level, by
+edit distance over kana (or romaji). Candidates come from a symmetric
+deletion index, so only words sharing a deletion variant are compared
+instead of every pair in the level
+"""
+
+import argparse
+import json
+import os
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from checkpoint import atomic_open
+
+DISTRACTORS_VERSION = 1
+DEFAULT_K = 3
+MAX_DISTANCE = 2
+KEYS = ["kana", "romaji"]
+
+def levenshtein(a: str, b: str, limit: int) -> int:
+    """Edit distance of a and b, or limit + 1 as soon as it must exceed limit"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return min(previous[-1], limit + 1)
+
+def osa_distance(a: str, b: str, limit: int) -> int:
+    """Edit distance where swapping two adjacent characters (かさ/さか) also costs 1"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    before: List[int] = []
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            cost = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b))
+            if i > 1 and j > 1 and char_a == b[j - 2] and a[i - 2] == char_b:
+                cost = min(cost, before[j - 2] + 1)
+            current.append(cost)
+        # A swap reaches back two rows, so both must be over the limit
+        if min(current) > limit and min(previous) > limit:
+            return limit + 1
+        before, previous = previous, current
+    return min(previous[-1], limit + 1)
+
+# Both are bounded below by what the deletion index can find: any two keys
+# within distance d share a variant with at most d deletions on each side
+METRICS: Dict[str, Callable[[str, str, int], int]] = {
+    "levenshtein": levenshtein,
+    "osa": osa_distance
+}
+
+def deletion_variants(text: str, depth: int) -> List[List[str]]:
+    """Variants of text with exactly 0..depth characters deleted, one list per depth"""
+    layers = [[text]]
+    for _ in range(depth):
+        layers.append(list(dict.fromkeys(
+            variant[:i] + variant[i + 1:] for variant in layers[-1] for i in range(len(variant)))))
+    return layers
+
+class DeletionIndex:
+    """
+    Nearest neighbours of distinct keys under a bounded edit distance
+    Keys within distance r share a variant with at most r deletions each, so
+    searching radius 1 before radius 2 finds the closest keys first and can
+    stop as soon as k of them are confirmed
+    """
+
+    def __init__(self, keys: List[str], max_distance: int = MAX_DISTANCE):
+        self.keys = keys
+        self.max_distance = max_distance
+        self.buckets: List[Dict[str, List[int]]] = [{} for _ in range(max_distance + 1)]
+        for key_id, key in enumerate(keys):
+            for depth, variants in enumerate(deletion_variants(key, max_distance)):
+                bucket = self.buckets[depth]
+                for variant in variants:
+                    bucket.setdefault(variant, []).append(key_id)
+
+    def nearest(self, key_id: int, k: int,
+                metric: Callable[[str, str, int], int] = levenshtein) -> List[Tuple[int, int]]:
+        """Up to k (key id, distance) pairs closest to keys[key_id], nearest first"""
+        key = self.keys[key_id]
+        variants = deletion_variants(key, self.max_distance)
+        seen = {key_id}
+        found: List[Tuple[int, int]] = []
+        for radius in range(1, self.max_distance + 1):
+            # Everything closer than radius was found by the previous rounds
+            pairs = [(a, b) for a in range(radius + 1) for b in range(radius + 1) if max(a, b) == radius]
+            within = sum(1 for distance, _ in found if distance <= radius)
+            for query_depth, index_depth in pairs:
+                bucket = self.buckets[index_depth]
+                for variant in variants[query_depth]:
+                    for other in bucket.get(variant, ()):
+                        if other in seen:
+                            continue
+                        seen.add(other)
+                        distance = metric(key, self.keys[other], self.max_distance)
+                        if distance <= self.max_distance:
+                            found.append((distance, other))
+                            within += distance <= radius
+                    if within >= k:
+                        return self._closest(found, k)
+        return self._closest(found, k)
+
+    @staticmethod
+    def _closest(found: List[Tuple[int, int]], k: int) -> List[Tuple[int, int]]:
+        # Stable sort: equally close keys keep the order they were found in
+        found.sort(key=lambda pair: pair[0])
+        return [(other, distance) for distance, other in found[:k]]
+
+class DistractorBuilder:
+    """
+    Collects words (it can follow a streamed output, like the search index)
+    and computes each word's distractors per level when built
+    Ids are positions in the dataset's words array. Words sharing a reading
+    are never offered for each other, and levels too sparse to give k close
+    readings are topped up with alphabetical neighbours
+    """
+
+    def __init__(self, k: int = DEFAULT_K, key: str = "kana", metric: str = "levenshtein",
+                 max_distance: int = MAX_DISTANCE, partition_key: str = "level", source: str = ""):
+        if key not in KEYS:
+            raise ValueError(f"Unknown distractor key: {key}")
+        if metric not in METRICS:
+            raise ValueError(f"Unknown distance metric: {metric}")
+        self.k = k
+        self.key = key
+        self.metric = metric
+        self.max_distance = max_distance
+        self.partition_key = partition_key
+        self.source = source
+        self.count = 0
+        # partition -> reading -> ids of the words with that reading
+        self.partitions: Dict[str, Dict[str, List[int]]] = {}
+        self.topped_up = 0
+
+    def add(self, word: Dict[str, Any]):
+        """Record the next word's reading"""
+        readings = self.partitions.setdefault(str(word.get(self.partition_key, "")), {})
+        readings.setdefault(str(word.get(self.key, "")), []).append(self.count)
+        self.count += 1
+
+    def build(self) -> List[List[int]]:
+        """Distractor ids for every word, in words array order"""
+        distractors: List[List[int]] = [[] for _ in range(self.count)]
+        metric = METRICS[self.metric]
+        self.topped_up = 0
+        for readings in self.partitions.values():
+            keys = list(readings)
+            index = DeletionIndex(keys, self.max_distance)
+            alphabetical = sorted(range(len(keys)), key=keys.__getitem__)
+            rank = {key_id: position for position, key_id in enumerate(alphabetical)}
+            for key_id, key in enumerate(keys):
+                chosen = [other for other, _ in index.nearest(key_id, self.k, metric)]
+                if len(chosen) < self.k:
+                    chosen.extend(self._neighbours(alphabetical, rank[key_id], chosen))
+                    self.topped_up += len(readings[key])
+                # Each distractor stands for its reading's first word
+                ids = [readings[keys[other]][0] for other in chosen]
+                for word_id in readings[key]:
+                    distractors[word_id] = ids
+        return distractors
+
+    def _neighbours(self, alphabetical: List[int], position: int, chosen: List[int]) -> List[int]:
+        """Readings next to position in alphabetical order, nearest first, not already chosen"""
+        extra = []
+        for offset in range(1, len(alphabetical)):
+            for neighbour in (position - offset, position + offset):
+                if 0 <= neighbour < len(alphabetical) and alphabetical[neighbour] not in chosen:
+                    extra.append(alphabetical[neighbour])
+                    if len(chosen) + len(extra) == self.k:
+                        return extra
+        return extra
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "version": DISTRACTORS_VERSION,
+            "source": self.source,
+            "count": self.count,
+            "k": self.k,
+            "key": self.key,
+            "metric": self.metric,
+            "max_distance": self.max_distance,
+            "distractors": self.build()
+        }
+
+    def write(self, path: str):
+        """Write the distractor file (minified; it is only read by the quiz page)"""
+        with atomic_open(path) as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, separators=(',', ':'))
+
+def distractors_path_for(dataset_path: str) -> str:
+    """Companion distractor file name: vocabulario-x.json -> vocabulario-x.distractors.json"""
+    root, _ = os.path.splitext(dataset_path)
+    return root + ".distractors.json"
+
+def build_distractors_for_file(dataset_path: str, output_path: Optional[str] = None,
+                               **options) -> DistractorBuilder:
+    """Compute and write distractors for an existing vocabulary file"""
+    with open(dataset_path, encoding='utf-8') as f:
+        words = json.load(f)['words']
+    builder = DistractorBuilder(source=os.path.basename(dataset_path), **options)
+    for word in words:
+        builder.add(word)
+    builder.write(output_path or distractors_path_for(dataset_path))
+    return builder
+
+def main():
+    """Build the distractor file for a vocabulary file: quiz_distractors.py DATASET [options]"""
+    parser = argparse.ArgumentParser(description="Precompute quiz distractors for a vocabulary file")
+    parser.add_argument("dataset", help="vocabulary JSON file (JLPT shape)")
+    parser.add_argument("--output", default=None, help="distractor file (default: DATASET.distractors.json)")
+    parser.add_argument("-k", type=int, default=DEFAULT_K, help=f"distractors per word (default: {DEFAULT_K})")
+    parser.add_argument("--key", choices=KEYS, default="kana", help="field compared (default: kana)")
+    parser.add_argument("--metric", choices=list(METRICS), default="levenshtein",
+                        help="edit distance (osa also counts adjacent swaps as one edit)")
+    parser.add_argument("--max-distance", type=int, default=MAX_DISTANCE,
+                        help=f"largest distance searched before topping up (default: {MAX_DISTANCE})")
+    args = parser.parse_args()
+    output = args.output or distractors_path_for(args.dataset)
+    builder = build_distractors_for_file(args.dataset, output, k=args.k, key=args.key,
+                                         metric=args.metric, max_distance=args.max_distance)
+    print(f"Created {output}: {args.k} distractors for {builder.count} words"
+          f" ({builder.topped_up} topped up with alphabetical neighbours)")
+
+if __name__ == "__main__":
+    main()
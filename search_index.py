@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Prebuilt search index for the vocabulary browser pages
+Builds an accent-folded n-gram inverted index, partitioned by level (or
+category), that the pages intersect instead of scanning every word
+"""
+
+import hashlib
+import json
+import os
+import sys
+import unicodedata
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from checkpoint import atomic_open
+
+INDEX_VERSION = 2
+GRAM_SIZE = 2
+
+# Searchable fields and partition key per dataset shape
+JLPT_FIELDS = ["kanji", "kana", "romaji", "español"]
+UCHINAGUCHI_FIELDS = ["japanese", "uchinaguchi", "romaji", "español", "category"]
+
+def normalize(text: str) -> str:
+    """Lowercase and strip Latin accents (á -> a) while keeping kana dakuten intact"""
+    decomposed = unicodedata.normalize('NFD', text.lower())
+    stripped = "".join(c for c in decomposed if not "\u0300" <= c <= "\u036f")
+    return unicodedata.normalize('NFC', stripped)
+
+def grams(text: str, size: int = GRAM_SIZE) -> Set[str]:
+    """Every n-gram of text, or text itself when shorter than n"""
+    if len(text) <= size:
+        return {text} if text else set()
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+def field_values(word: Dict[str, Any], fields: List[str]) -> List[str]:
+    """Normalized values of the searchable fields (lists are flattened)"""
+    values = []
+    for field in fields:
+        value = word.get(field)
+        if isinstance(value, list):
+            values.extend(normalize(str(item)) for item in value)
+        elif value:
+            values.append(normalize(str(value)))
+    return values
+
+def word_json(word: Dict[str, Any]) -> str:
+    """A word as JSON.stringify writes it in the pages (compact, non-ASCII kept)"""
+    return json.dumps(word, ensure_ascii=False, separators=(',', ':'))
+
+def words_sha256(words: Iterable[Dict[str, Any]]) -> str:
+    """Hash of a dataset's words array, recorded in its index to detect stale indexes"""
+    text = "[" + ",".join(word_json(word) for word in words) + "]"
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+def query_grams(term: str, size: int = GRAM_SIZE) -> Set[str]:
+    """
+    Grams a word must contain to match term as a substring
+    Single characters are indexed on their own, so short queries still work
+    """
+    if len(term) < size:
+        return {term}
+    return grams(term, size)
+
+class SearchIndexBuilder:
+    """Accumulates postings word by word, so it can follow a streamed output"""
+
+    def __init__(self, fields: List[str], partition_key: str, source: str = ""):
+        self.fields = fields
+        self.partition_key = partition_key
+        self.source = source
+        self.count = 0
+        self.partitions: Dict[str, Dict[str, List[int]]] = {}
+        # Running words_sha256 of the words added so far (without the closing bracket)
+        self._digest = hashlib.sha256()
+
+    def add(self, word: Dict[str, Any]):
+        """Index the next word; ids are positions in the dataset's words array"""
+        word_id = self.count
+        self.count += 1
+        self._digest.update((("," if word_id else "[") + word_json(word)).encode('utf-8'))
+        postings = self.partitions.setdefault(str(word.get(self.partition_key, "")), {})
+        word_grams = set()
+        for value in field_values(word, self.fields):
+            word_grams |= grams(value)
+            # Single characters too, for one-character queries
+            word_grams.update(value)
+        for gram in word_grams:
+            postings.setdefault(gram, []).append(word_id)
+
+    def words_sha256(self) -> str:
+        """words_sha256 of the indexed words"""
+        digest = self._digest.copy()
+        digest.update(b"]" if self.count else b"[]")
+        return digest.hexdigest()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Index with delta-encoded posting lists and the hash of the words it was built from"""
+        partitions = {}
+        for partition, postings in self.partitions.items():
+            encoded = {}
+            for gram in sorted(postings):
+                ids = postings[gram]
+                encoded[gram] = [ids[0]] + [b - a for a, b in zip(ids, ids[1:])]
+            partitions[partition] = encoded
+        return {
+            "version": INDEX_VERSION,
+            "source": self.source,
+            "gram_size": GRAM_SIZE,
+            "fields": self.fields,
+            "partition_key": self.partition_key,
+            "count": self.count,
+            "words_sha256": self.words_sha256(),
+            "partitions": partitions
+        }
+
+    def write(self, path: str):
+        """Write the index as compact JSON"""
+        with atomic_open(path) as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, separators=(',', ':'))
+
+class SearchIndex:
+    """Query side of the index, mirroring what the browser pages do"""
+
+    def __init__(self, data: Dict[str, Any], words: List[Dict[str, Any]]):
+        self.fields = data['fields']
+        self.gram_size = data['gram_size']
+        self.words = words
+        self.partitions = data['partitions']
+        self._decoded: Dict[Any, List[int]] = {}
+        self._haystacks: Dict[int, str] = {}
+
+    @classmethod
+    def load(cls, index_path: str, dataset_path: str) -> "SearchIndex":
+        """Load an index together with the dataset it was built from (ValueError when it is stale)"""
+        with open(index_path, encoding='utf-8') as f:
+            data = json.load(f)
+        with open(dataset_path, encoding='utf-8') as f:
+            words = json.load(f)['words']
+        if data.get('words_sha256') != words_sha256(words):
+            raise ValueError(f"{index_path} was not built from the words of {dataset_path}; rebuild it")
+        return cls(data, words)
+
+    def postings(self, partition: str, gram: str) -> List[int]:
+        """Decoded, cached posting list of one gram"""
+        key = (partition, gram)
+        ids = self._decoded.get(key)
+        if ids is None:
+            ids = []
+            total = 0
+            for delta in self.partitions.get(partition, {}).get(gram, []):
+                total += delta
+                ids.append(total)
+            self._decoded[key] = ids
+        return ids
+
+    def haystack(self, word_id: int) -> str:
+        """Normalized searchable text of a word, fields separated by newlines"""
+        text = self._haystacks.get(word_id)
+        if text is None:
+            text = "\n".join(field_values(self.words[word_id], self.fields))
+            self._haystacks[word_id] = text
+        return text
+
+    def search(self, term: str, partition: Optional[str] = None) -> List[int]:
+        """Ids of words containing term in any field, within one partition or all"""
+        term = normalize(term).strip()
+        partitions = [partition] if partition is not None else list(self.partitions)
+        if not term:
+            return sorted(i for p in partitions for i in self.all_ids(p))
+
+        matches = []
+        for name in partitions:
+            lists = sorted((self.postings(name, gram) for gram in query_grams(term, self.gram_size)), key=len)
+            if not lists or not lists[0]:
+                continue
+            candidates = set(lists[0])
+            for ids in lists[1:]:
+                candidates.intersection_update(ids)
+                if not candidates:
+                    break
+            # Grams can match out of order, so confirm the substring
+            matches.extend(i for i in candidates if term in self.haystack(i))
+        return sorted(matches)
+
+    def all_ids(self, partition: str) -> Set[int]:
+        """Every word id in a partition"""
+        ids = set()
+        for gram in self.partitions.get(partition, {}):
+            if len(gram) == 1:
+                ids.update(self.postings(partition, gram))
+        return ids
+
+def index_path_for(dataset_path: str) -> str:
+    """Companion index file name: foo.json -> foo.index.json"""
+    root, _ = os.path.splitext(dataset_path)
+    return root + ".index.json"
+
+def build_index_for_file(dataset_path: str, index_path: Optional[str] = None) -> str:
+    """Build the index for a JLPT or uchinaguchi dataset file"""
+    with open(dataset_path, encoding='utf-8') as f:
+        words = json.load(f)['words']
+    if words and 'uchinaguchi' in words[0]:
+        builder = SearchIndexBuilder(UCHINAGUCHI_FIELDS, "category", os.path.basename(dataset_path))
+    else:
+        builder = SearchIndexBuilder(JLPT_FIELDS, "level", os.path.basename(dataset_path))
+    for word in words:
+        builder.add(word)
+    index_path = index_path or index_path_for(dataset_path)
+    builder.write(index_path)
+    return index_path
+
+def main():
+    """Build indexes for the dataset files given on the command line"""
+    paths: Iterable[str] = sys.argv[1:] or ["vocabulario-jlpt-4000.json", "vocabulario-uchinaguchi.json"]
+    for path in paths:
+        index_path = build_index_for_file(path)
+        print(f"Created {index_path} ({os.path.getsize(index_path) / 1024:.0f} KB)")
+
+if __name__ == "__main__":
+    main()
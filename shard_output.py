@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Level-sharded vocabulary output
+Writes one minified JSON shard per JLPT level, gzip/brotli precompressed
+copies of each, and a small manifest with counts and content hashes
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import sys
+import tempfile
+from typing import Any, Dict, IO, Optional, Set
+
+from checkpoint import atomic_open
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; .br files are skipped without it
+    brotli = None
+
+SHARD_MANIFEST = "manifest.json"
+SHARD_VERSION = 1
+COMPRESSED_SUFFIXES = (".gz", ".br")
+
+def dump_compact(value: Any) -> str:
+    """Minified JSON, keeping non-ASCII text readable"""
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+
+class ShardWriter:
+    """
+    Splits words into per-level shards as they are produced
+    Words are appended to a temporary file per level, so the writer can
+    follow a streamed run; close() assembles, compresses and hashes them
+    """
+
+    def __init__(self, directory: str, partition_key: str = "level", compress: bool = True):
+        self.directory = directory
+        self.partition_key = partition_key
+        self.compress = compress
+        self.spools: Dict[str, IO[str]] = {}
+        self.counts: Dict[str, int] = {}
+
+    def add(self, word: Dict[str, Any]):
+        """Append one word to its level's shard"""
+        shard = str(word.get(self.partition_key, ""))
+        spool = self.spools.get(shard)
+        if spool is None:
+            spool = self.spools[shard] = tempfile.TemporaryFile('w+', encoding='utf-8')
+            self.counts[shard] = 0
+        spool.write(("," if self.counts[shard] else "") + dump_compact(word))
+        self.counts[shard] += 1
+
+    def close(self, metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Write shards, compressed variants and the manifest; returns the manifest
+        Files of the previous run that this one did not rewrite (dropped
+        levels, .gz/.br copies no longer produced) are removed afterwards,
+        so a server preferring precompressed files never serves stale ones
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        previous = self._previous_files()
+        written: Set[str] = set()
+        shards = {}
+        for shard, spool in self.spools.items():
+            spool.seek(0)
+            body = ('{"' + self.partition_key + '":' + dump_compact(shard) +
+                    ',"words":[' + spool.read() + ']}').encode('utf-8')
+            spool.close()
+
+            filename = f"{shard}.json"
+            info = {
+                "file": filename,
+                "count": self.counts[shard],
+                "bytes": len(body),
+                "sha256": hashlib.sha256(body).hexdigest()
+            }
+            self._write(filename, body)
+            written.add(filename)
+            if self.compress:
+                # mtime=0 keeps the .gz bytes identical across rebuilds
+                info["gzip_bytes"] = self._write(filename + ".gz", gzip.compress(body, 9, mtime=0))
+                written.add(filename + ".gz")
+                if brotli is not None:
+                    info["brotli_bytes"] = self._write(filename + ".br", brotli.compress(body))
+                    written.add(filename + ".br")
+            previous.update(filename + suffix for suffix in COMPRESSED_SUFFIXES)
+            shards[shard] = info
+        self.spools = {}
+
+        manifest = {
+            "version": SHARD_VERSION,
+            "partition_key": self.partition_key,
+            "total_words": sum(self.counts.values()),
+            "metadata": metadata or {},
+            "shards": shards
+        }
+        with atomic_open(os.path.join(self.directory, SHARD_MANIFEST)) as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        for filename in previous - written:
+            try:
+                os.remove(os.path.join(self.directory, filename))
+            except OSError:
+                pass
+        return manifest
+
+    def _previous_files(self) -> Set[str]:
+        """Files listed by the manifest of an earlier run in the directory"""
+        try:
+            with open(os.path.join(self.directory, SHARD_MANIFEST), encoding='utf-8') as f:
+                shards = json.load(f).get('shards', {})
+        except (OSError, ValueError):
+            return set()
+        return {info['file'] + suffix for info in shards.values() if 'file' in info
+                for suffix in ("",) + COMPRESSED_SUFFIXES}
+
+    def _write(self, filename: str, data: bytes) -> int:
+        with atomic_open(os.path.join(self.directory, filename), 'wb') as f:
+            f.write(data)
+        return len(data)
+
+def shard_file(dataset_path: str, directory: str, partition_key: str = "level") -> Dict[str, Any]:
+    """Shard an existing vocabulary file"""
+    with open(dataset_path, encoding='utf-8') as f:
+        data = json.load(f)
+    writer = ShardWriter(directory, partition_key)
+    for word in data['words']:
+        writer.add(word)
+    return writer.close(data.get('metadata'))
+
+def load_shard(directory: str, shard: str, verify: bool = True) -> Dict[str, Any]:
+    """Read one shard, checking it against the manifest hash"""
+    with open(os.path.join(directory, SHARD_MANIFEST), encoding='utf-8') as f:
+        info = json.load(f)['shards'][shard]
+    with open(os.path.join(directory, info['file']), 'rb') as f:
+        body = f.read()
+    if verify and hashlib.sha256(body).hexdigest() != info['sha256']:
+        raise ValueError(f"Shard {shard} does not match its manifest hash")
+    return json.loads(body)
+
+def main():
+    """Shard a dataset file: shard_output.py DATASET DIRECTORY [PARTITION_KEY]"""
+    if len(sys.argv) < 3:
+        print("Usage: shard_output.py DATASET DIRECTORY [PARTITION_KEY]")
+        sys.exit(1)
+    manifest = shard_file(sys.argv[1], sys.argv[2], *sys.argv[3:4])
+    for shard, info in manifest['shards'].items():
+        sizes = f"{info['bytes'] / 1024:.1f} KB"
+        if 'gzip_bytes' in info:
+            sizes += f", gzip {info['gzip_bytes'] / 1024:.1f} KB"
+        if 'brotli_bytes' in info:
+            sizes += f", brotli {info['brotli_bytes'] / 1024:.1f} KB"
+        print(f"  {shard}: {info['count']} words ({sizes})")
+    if brotli is None:
+        print("brotli module not installed, .br files were not written")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+"""
+SQLite export of the vocabulary datasets
+Words, glosses, levels, types and the uchinaguchi words and categories go
+into normalized tables, with FTS5 trigram indexes for substring search over
+kanji, kana, romaji and accent-folded Spanish, and covering indexes for
+level/type listings. VocabularyDB is the query side
+"""
+
+import json
+import os
+import sqlite3
+import sys
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from search_index import normalize
+
+SCHEMA_VERSION = 1
+JLPT_FILE = "vocabulario-jlpt-4000.json"
+UCHINAGUCHI_FILE = "vocabulario-uchinaguchi.json"
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+# Trigram FTS5 matches substrings of three or more characters
+MIN_MATCH_LENGTH = 3
+
+SCHEMA = """
+CREATE TABLE info (key TEXT PRIMARY KEY, value TEXT NOT NULL) WITHOUT ROWID;
+CREATE TABLE levels (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE);
+CREATE TABLE types (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE);
+CREATE TABLE words (
+    id INTEGER PRIMARY KEY,
+    kanji TEXT NOT NULL,
+    kana TEXT NOT NULL,
+    romaji TEXT NOT NULL,
+    level_id INTEGER NOT NULL REFERENCES levels(id),
+    type_id INTEGER NOT NULL REFERENCES types(id)
+);
+CREATE TABLE glosses (
+    word_id INTEGER NOT NULL REFERENCES words(id),
+    position INTEGER NOT NULL,
+    text TEXT NOT NULL,
+    PRIMARY KEY (word_id, position)
+) WITHOUT ROWID;
+CREATE TABLE categories (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE);
+CREATE TABLE uchinaguchi_words (
+    id INTEGER PRIMARY KEY,
+    japanese TEXT NOT NULL,
+    uchinaguchi TEXT NOT NULL,
+    romaji TEXT NOT NULL,
+    category_id INTEGER NOT NULL REFERENCES categories(id)
+);
+CREATE TABLE uchinaguchi_glosses (
+    word_id INTEGER NOT NULL REFERENCES uchinaguchi_words(id),
+    position INTEGER NOT NULL,
+    text TEXT NOT NULL,
+    PRIMARY KEY (word_id, position)
+) WITHOUT ROWID;
+CREATE VIRTUAL TABLE words_fts USING fts5(kanji, kana, romaji, espanol, tokenize='trigram');
+CREATE VIRTUAL TABLE uchinaguchi_fts USING fts5(japanese, uchinaguchi, romaji, espanol, tokenize='trigram');
+-- Folded text of every field, scanned for queries too short for trigrams
+CREATE TABLE words_text (id INTEGER PRIMARY KEY REFERENCES words(id), text TEXT NOT NULL);
+CREATE TABLE uchinaguchi_text (id INTEGER PRIMARY KEY REFERENCES uchinaguchi_words(id), text TEXT NOT NULL);
+"""
+
+# Created after loading, which is faster than maintaining them row by row.
+# Counts by level and/or type are answered from these alone, and the
+# implicit trailing rowid keeps each (level, type) run in dataset order
+INDEXES = """
+CREATE INDEX words_by_level ON words (level_id, type_id);
+CREATE INDEX words_by_type ON words (type_id, level_id);
+CREATE INDEX uchinaguchi_by_category ON uchinaguchi_words (category_id);
+"""
+
+def _ids(names: Iterable[str]) -> Dict[str, int]:
+    """Stable ids for lookup table values, in first-seen order"""
+    return {name: i for i, name in enumerate(dict.fromkeys(names), 1)}
+
+def _folded(glosses: List[str]) -> str:
+    """Accent-folded Spanish for the FTS index, one gloss per line"""
+    return "\n".join(normalize(gloss) for gloss in glosses)
+
+def _fts_rows(words: List[Dict[str, Any]], fields: List[str]) -> List[Tuple[Any, ...]]:
+    """(id, folded field..., folded Spanish) rows for a dataset's FTS table"""
+    return [(i, *(normalize(w[field]) for field in fields), _folded(w['español']))
+            for i, w in enumerate(words, 1)]
+
+class SqliteWriter:
+    """Collects JLPT words as they are produced (usable as a converter output sink)"""
+
+    def __init__(self, path: str, uchinaguchi_path: Optional[str] = UCHINAGUCHI_FILE):
+        self.path = path
+        self.uchinaguchi_path = uchinaguchi_path
+        self.words: List[Dict[str, Any]] = []
+
+    def add(self, word: Dict[str, Any]):
+        """Queue one word; everything is written in one transaction by close()"""
+        self.words.append(word)
+
+    def resolve_uchinaguchi_path(self) -> Optional[str]:
+        """
+        The uchinaguchi file: a relative path is looked up next to the
+        database, then next to this script (not in the current directory)
+        """
+        if not self.uchinaguchi_path:
+            return None
+        for base in (os.path.dirname(os.path.abspath(self.path)), SCRIPT_DIR):
+            candidate = os.path.join(base, self.uchinaguchi_path)
+            if os.path.exists(candidate):
+                return candidate
+        return None
+
+    def close(self, metadata: Optional[Dict[str, Any]] = None) -> Dict[str, int]:
+        """Write the database, including the uchinaguchi file when it exists"""
+        uchinaguchi = None
+        uchinaguchi_path = self.resolve_uchinaguchi_path()
+        if uchinaguchi_path:
+            with open(uchinaguchi_path, encoding='utf-8') as f:
+                uchinaguchi = json.load(f)
+        elif self.uchinaguchi_path:
+            print(f"Warning: {self.uchinaguchi_path} not found next to {self.path} or {SCRIPT_DIR}; "
+                  "exporting without the uchinaguchi words")
+        return build_database(self.path, {"metadata": metadata or {}, "words": self.words}, uchinaguchi)
+
+def build_database(path: str, jlpt: Optional[Dict[str, Any]],
+                   uchinaguchi: Optional[Dict[str, Any]] = None) -> Dict[str, int]:
+    """
+    Create the database at path from loaded dataset dicts
+    The file is built under a temporary name and renamed into place, so
+    readers never see a half-written database
+    """
+    tmp_path = path + ".tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    connection = sqlite3.connect(tmp_path)
+    counts = {}
+    try:
+        # The file is discarded on failure anyway, so skip the journal
+        connection.execute("PRAGMA journal_mode = OFF")
+        connection.execute("PRAGMA synchronous = OFF")
+        connection.executescript(SCHEMA)
+        with connection:
+            info = {"schema_version": SCHEMA_VERSION}
+            if jlpt is not None:
+                counts["words"] = _load_jlpt(connection, jlpt['words'])
+                info["jlpt_metadata"] = jlpt.get('metadata', {})
+            if uchinaguchi is not None:
+                counts["uchinaguchi_words"] = _load_uchinaguchi(connection, uchinaguchi['words'])
+                info["uchinaguchi_metadata"] = uchinaguchi.get('metadata', {})
+            connection.executemany("INSERT INTO info (key, value) VALUES (?, ?)",
+                                   [(key, json.dumps(value, ensure_ascii=False)) for key, value in info.items()])
+        connection.executescript(INDEXES)
+        connection.execute("ANALYZE")
+        connection.commit()
+    except BaseException:
+        connection.close()
+        os.remove(tmp_path)
+        raise
+    connection.close()
+    os.replace(tmp_path, path)
+    return counts
+
+def _load_jlpt(connection: sqlite3.Connection, words: List[Dict[str, Any]]) -> int:
+    levels = _ids(word['level'] for word in words)
+    types = _ids(word['type'] for word in words)
+    connection.executemany("INSERT INTO levels (id, name) VALUES (?, ?)", [(i, n) for n, i in levels.items()])
+    connection.executemany("INSERT INTO types (id, name) VALUES (?, ?)", [(i, n) for n, i in types.items()])
+    connection.executemany(
+        "INSERT INTO words (id, kanji, kana, romaji, level_id, type_id) VALUES (?, ?, ?, ?, ?, ?)",
+        [(i, w['kanji'], w['kana'], w['romaji'], levels[w['level']], types[w['type']])
+         for i, w in enumerate(words, 1)])
+    connection.executemany(
+        "INSERT INTO glosses (word_id, position, text) VALUES (?, ?, ?)",
+        [(i, position, gloss) for i, w in enumerate(words, 1) for position, gloss in enumerate(w['español'])])
+    rows = _fts_rows(words, ["kanji", "kana", "romaji"])
+    connection.executemany("INSERT INTO words_fts (rowid, kanji, kana, romaji, espanol) VALUES (?, ?, ?, ?, ?)", rows)
+    connection.executemany("INSERT INTO words_text (id, text) VALUES (?, ?)",
+                           [(row[0], "\n".join(row[1:])) for row in rows])
+    return len(words)
+
+def _load_uchinaguchi(connection: sqlite3.Connection, words: List[Dict[str, Any]]) -> int:
+    categories = _ids(word['category'] for word in words)
+    connection.executemany("INSERT INTO categories (id, name) VALUES (?, ?)",
+                           [(i, n) for n, i in categories.items()])
+    connection.executemany(
+        "INSERT INTO uchinaguchi_words (id, japanese, uchinaguchi, romaji, category_id) VALUES (?, ?, ?, ?, ?)",
+        [(i, w['japanese'], w['uchinaguchi'], w['romaji'], categories[w['category']])
+         for i, w in enumerate(words, 1)])
+    connection.executemany(
+        "INSERT INTO uchinaguchi_glosses (word_id, position, text) VALUES (?, ?, ?)",
+        [(i, position, gloss) for i, w in enumerate(words, 1) for position, gloss in enumerate(w['español'])])
+    rows = _fts_rows(words, ["japanese", "uchinaguchi", "romaji"])
+    connection.executemany(
+        "INSERT INTO uchinaguchi_fts (rowid, japanese, uchinaguchi, romaji, espanol) VALUES (?, ?, ?, ?, ?)", rows)
+    connection.executemany("INSERT INTO uchinaguchi_text (id, text) VALUES (?, ?)",
+                           [(row[0], "\n".join(row[1:])) for row in rows])
+    return len(words)
+
+# Query SQL is fixed text with bound parameters, so sqlite3's statement
+# cache prepares each one once per connection
+_WORD_COLUMNS = """
+    w.id, w.kanji, w.kana, w.romaji, l.name AS level, t.name AS type,
+    (SELECT json_group_array(text) FROM (SELECT text FROM glosses g
+     WHERE g.word_id = w.id ORDER BY position)) AS espanol
+"""
+_SEARCH_SQL = f"""
+    SELECT {_WORD_COLUMNS} FROM words_fts f
+    JOIN words w ON w.id = f.rowid JOIN levels l ON l.id = w.level_id JOIN types t ON t.id = w.type_id
+    WHERE words_fts MATCH ? AND (? IS NULL OR l.name = ?)
+    ORDER BY w.id LIMIT ?
+"""
+_SEARCH_SHORT_SQL = f"""
+    SELECT {_WORD_COLUMNS} FROM words_text x
+    JOIN words w ON w.id = x.id JOIN levels l ON l.id = w.level_id JOIN types t ON t.id = w.type_id
+    WHERE instr(x.text, ?1) > 0 AND (?2 IS NULL OR l.name = ?2)
+    ORDER BY w.id LIMIT ?3
+"""
+_BY_LEVEL_SQL = f"""
+    SELECT {_WORD_COLUMNS} FROM words w
+    JOIN levels l ON l.id = w.level_id JOIN types t ON t.id = w.type_id
+    WHERE w.level_id = ? ORDER BY w.id LIMIT ?
+"""
+_BY_LEVEL_TYPE_SQL = f"""
+    SELECT {_WORD_COLUMNS} FROM words w
+    JOIN levels l ON l.id = w.level_id JOIN types t ON t.id = w.type_id
+    WHERE w.level_id = ? AND w.type_id = ? ORDER BY w.id LIMIT ?
+"""
+_COUNTS_SQL = """
+    SELECT l.name, t.name, COUNT(*) FROM words w
+    JOIN levels l ON l.id = w.level_id JOIN types t ON t.id = w.type_id
+    GROUP BY w.level_id, w.type_id
+"""
+_UCHINAGUCHI_COLUMNS = """
+    u.id, u.japanese, u.uchinaguchi, u.romaji, c.name AS category,
+    (SELECT json_group_array(text) FROM (SELECT text FROM uchinaguchi_glosses g
+     WHERE g.word_id = u.id ORDER BY position)) AS espanol
+"""
+_UCHINAGUCHI_SEARCH_SQL = f"""
+    SELECT {_UCHINAGUCHI_COLUMNS} FROM uchinaguchi_fts f
+    JOIN uchinaguchi_words u ON u.id = f.rowid JOIN categories c ON c.id = u.category_id
+    WHERE uchinaguchi_fts MATCH ? AND (? IS NULL OR c.name = ?)
+    ORDER BY u.id LIMIT ?
+"""
+_UCHINAGUCHI_SEARCH_SHORT_SQL = f"""
+    SELECT {_UCHINAGUCHI_COLUMNS} FROM uchinaguchi_text x
+    JOIN uchinaguchi_words u ON u.id = x.id JOIN categories c ON c.id = u.category_id
+    WHERE instr(x.text, ?1) > 0 AND (?2 IS NULL OR c.name = ?2)
+    ORDER BY u.id LIMIT ?3
+"""
+
+def _fts_phrase(term: str) -> str:
+    """Quote a search term as a single FTS5 phrase"""
+    return '"' + term.replace('"', '""') + '"'
+
+class VocabularyDB:
+    """Read-only query API over an exported database"""
+
+    def __init__(self, path: str):
+        if not os.path.exists(path):
+            raise FileNotFoundError(path)
+        self.connection = sqlite3.connect(f"file:{path}?mode=ro", uri=True, cached_statements=64,
+                                          check_same_thread=False)
+        self.connection.row_factory = sqlite3.Row
+        # Lookup tables are tiny; resolving names up front keeps the word
+        # queries on plain indexed integer comparisons
+        self.levels = {name: i for i, name in self.connection.execute("SELECT id, name FROM levels")}
+        self.types = {name: i for i, name in self.connection.execute("SELECT id, name FROM types")}
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self) -> "VocabularyDB":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _rows(self, sql: str, params: Tuple[Any, ...]) -> List[Dict[str, Any]]:
+        rows = []
+        for row in self.connection.execute(sql, params):
+            word = dict(row)
+            word['español'] = json.loads(word.pop('espanol'))
+            rows.append(word)
+        return rows
+
+    def _search(self, sql: str, short_sql: str, term: str, partition: Optional[str],
+                limit: int) -> List[Dict[str, Any]]:
+        term = normalize(term).strip()
+        if not term:
+            return []
+        if len(term) >= MIN_MATCH_LENGTH:
+            return self._rows(sql, (_fts_phrase(term), partition, partition, limit))
+        return self._rows(short_sql, (term, partition, limit))
+
+    def search(self, term: str, level: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        """JLPT words containing term in kanji, kana, romaji or (accent-insensitively) Spanish"""
+        return self._search(_SEARCH_SQL, _SEARCH_SHORT_SQL, term, level, limit)
+
+    def by_level(self, level: str, word_type: Optional[str] = None, limit: int = -1) -> List[Dict[str, Any]]:
+        """Words of one level, optionally of one type, in dataset order"""
+        level_id = self.levels.get(level)
+        if level_id is None:
+            return []
+        if word_type is None:
+            return self._rows(_BY_LEVEL_SQL, (level_id, limit))
+        type_id = self.types.get(word_type)
+        if type_id is None:
+            return []
+        return self._rows(_BY_LEVEL_TYPE_SQL, (level_id, type_id, limit))
+
+    def counts(self) -> Dict[str, Dict[str, int]]:
+        """Word counts per level and type"""
+        counts: Dict[str, Dict[str, int]] = {}
+        for level, word_type, count in self.connection.execute(_COUNTS_SQL):
+            counts.setdefault(level, {})[word_type] = count
+        return counts
+
+    def search_uchinaguchi(self, term: str, category: Optional[str] = None,
+                           limit: int = 50) -> List[Dict[str, Any]]:
+        """Uchinaguchi words containing term in any field"""
+        return self._search(_UCHINAGUCHI_SEARCH_SQL, _UCHINAGUCHI_SEARCH_SHORT_SQL, term, category, limit)
+
+    def info(self, key: str) -> Any:
+        """Stored metadata entry (schema_version, jlpt_metadata, uchinaguchi_metadata)"""
+        row = self.connection.execute("SELECT value FROM info WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+def export_files(path: str, jlpt_path: Optional[str] = JLPT_FILE,
+                 uchinaguchi_path: Optional[str] = UCHINAGUCHI_FILE) -> Dict[str, int]:
+    """Build a database from dataset files"""
+    datasets = []
+    for dataset_path in (jlpt_path, uchinaguchi_path):
+        if dataset_path:
+            with open(dataset_path, encoding='utf-8') as f:
+                datasets.append(json.load(f))
+        else:
+            datasets.append(None)
+    return build_database(path, *datasets)
+
+def main():
+    """Export or query: sqlite_export.py OUT.db [JLPT.json [UCHINAGUCHI.json]] | sqlite_export.py DB --search TERM"""
+    if len(sys.argv) == 4 and sys.argv[2] == "--search":
+        with VocabularyDB(sys.argv[1]) as db:
+            for word in db.search(sys.argv[3]) + db.search_uchinaguchi(sys.argv[3]):
+                print(json.dumps(word, ensure_ascii=False))
+        return
+    if len(sys.argv) < 2:
+        print("Usage: sqlite_export.py OUT.db [JLPT.json [UCHINAGUCHI.json]]")
+        print("       sqlite_export.py DB --search TERM")
+        sys.exit(1)
+    counts = export_files(sys.argv[1], *sys.argv[2:4])
+    summary = ", ".join(f"{count} {name.replace('_', ' ')}" for name, count in counts.items())
+    print(f"Created {sys.argv[1]} ({os.path.getsize(sys.argv[1]) / 1024:.0f} KB: {summary})")
+
+if __name__ == "__main__":
+    main()
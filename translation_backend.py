@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Pluggable translation backends for the converters
+Meanings are deduplicated across a run, answered from an in-process LRU
+cache or a persistent SQLite translation memory when possible, and only
+the remaining ones are sent to the backend in concurrent batches
+"""
+
+import concurrent.futures
+import os
+import random
+import sqlite3
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from paged_fetch import RETRY_STATUSES
+
+BATCH_SIZE = 50
+CONCURRENCY = 4
+RETRIES = 3
+BACKOFF_BASE = 0.5
+REQUEST_TIMEOUT = 30
+LRU_SIZE = 10000
+MEMORY_FILE = "translation-memory.sqlite"
+
+def normalize_text(text: str) -> str:
+    """Key under which a meaning is translated and remembered"""
+    return text.lower().strip()
+
+class TranslationError(Exception):
+    """A batch that could not be translated"""
+
+class TranslationBackend:
+    """Translates batches of English texts; subclasses implement translate_batch"""
+
+    name = "backend"
+
+    def translate_batch(self, texts: List[str]) -> List[str]:
+        """Spanish translations of texts, in the same order"""
+        raise NotImplementedError
+
+class DictionaryBackend(TranslationBackend):
+    """Offline backend wrapping a local translate function (the converter's dictionary Translator)"""
+
+    name = "dictionary"
+
+    def __init__(self, translate: Callable[[str], str]):
+        self.translate = translate
+
+    def translate_batch(self, texts: List[str]) -> List[str]:
+        return [self.translate(text) for text in texts]
+
+class HTTPBackend(TranslationBackend):
+    """
+    Remote backend speaking a small JSON protocol:
+    POST {"source": "en", "target": "es", "q": [...]} -> {"translations": [...]}
+    """
+
+    def __init__(self, url: str, timeout: float = REQUEST_TIMEOUT, retries: int = RETRIES,
+                 backoff: float = BACKOFF_BASE, pool_size: int = CONCURRENCY,
+                 session: Optional[requests.Session] = None):
+        self.url = url
+        self.name = f"http:{url}"
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.session = session or requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def translate_batch(self, texts: List[str]) -> List[str]:
+        payload = {"source": "en", "target": "es", "q": texts}
+        for attempt in range(self.retries + 1):
+            try:
+                response = self.session.post(self.url, json=payload, timeout=self.timeout)
+                response.raise_for_status()
+                translations = response.json()['translations']
+                if not isinstance(translations, list) or len(translations) != len(texts):
+                    raise ValueError("translation count does not match the batch")
+                return [str(text) for text in translations]
+            except (requests.RequestException, ValueError, KeyError, TypeError) as e:
+                status = getattr(getattr(e, 'response', None), 'status_code', None)
+                if attempt == self.retries or (status is not None and status not in RETRY_STATUSES):
+                    raise TranslationError(f"batch of {len(texts)}: {e}") from e
+                time.sleep(random.uniform(0, self.backoff * 2 ** attempt))
+        raise AssertionError("unreachable")
+
+class LRUCache:
+    """Small in-process least-recently-used map"""
+
+    def __init__(self, maxsize: int = LRU_SIZE):
+        self.maxsize = maxsize
+        self.data: "OrderedDict[str, Any]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Any]:
+        value = self.data.get(key)
+        if value is not None:
+            self.data.move_to_end(key)
+        return value
+
+    def put(self, key: str, value: Any):
+        self.data[key] = value
+        self.data.move_to_end(key)
+        if len(self.data) > self.maxsize:
+            self.data.popitem(last=False)
+
+class TranslationMemory:
+    """
+    Persistent translation memory in SQLite
+    Entries are keyed by backend and normalized source text, so switching
+    backends never serves another backend's translations
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.connection = sqlite3.connect(path)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS translations ("
+            " backend TEXT NOT NULL, source TEXT NOT NULL, target TEXT NOT NULL,"
+            " PRIMARY KEY (backend, source)) WITHOUT ROWID")
+
+    def get_many(self, backend: str, texts: List[str]) -> Dict[str, str]:
+        """Known translations of texts"""
+        found = {}
+        # Stay well below SQLite's bound-parameter limit
+        for start in range(0, len(texts), 500):
+            chunk = texts[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self.connection.execute(
+                f"SELECT source, target FROM translations WHERE backend = ? AND source IN ({placeholders})",
+                [backend, *chunk])
+            found.update(rows)
+        return found
+
+    def put_many(self, backend: str, translations: Dict[str, str]):
+        """Remember translations in one transaction"""
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO translations (backend, source, target) VALUES (?, ?, ?)",
+                [(backend, source, target) for source, target in translations.items()])
+
+    def __len__(self) -> int:
+        return self.connection.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+
+    def close(self):
+        self.connection.close()
+
+class TranslationService:
+    """
+    Batched, memoized front end to a backend
+    Lookups go LRU cache -> translation memory -> backend; only the texts
+    missing from both are sent, deduplicated, in batches of batch_size with
+    up to concurrency batches in flight
+    """
+
+    def __init__(self, backend: TranslationBackend, memory: Optional[TranslationMemory] = None,
+                 batch_size: int = BATCH_SIZE, concurrency: int = CONCURRENCY,
+                 cache_size: int = LRU_SIZE, fallback: Optional[Callable[[str], str]] = None):
+        self.backend = backend
+        self.memory = memory
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.cache = LRUCache(cache_size)
+        self.fallback = fallback
+        # Normalized texts currently answered by the fallback, as their batch failed
+        self.fallback_keys: Set[str] = set()
+        self.stats = {"requested": 0, "unique": 0, "cache_hits": 0, "memory_hits": 0,
+                      "backend_texts": 0, "backend_calls": 0, "failed": 0}
+
+    def translate_many(self, texts: Iterable[str]) -> Dict[str, str]:
+        """
+        Map of normalized text -> translation for every text given
+        Texts of failed batches get the fallback translation and are listed
+        in fallback_keys until a later call translates them
+        """
+        keys = [normalize_text(text) for text in texts if text]
+        unique = list(dict.fromkeys(keys))
+        self.stats["requested"] += len(keys)
+        self.stats["unique"] += len(unique)
+
+        result: Dict[str, str] = {}
+        missing = []
+        for key in unique:
+            cached = self.cache.get(key)
+            if cached is None:
+                missing.append(key)
+            else:
+                result[key] = cached
+        self.stats["cache_hits"] += len(unique) - len(missing)
+
+        if missing and self.memory is not None:
+            remembered = self.memory.get_many(self.backend.name, missing)
+            self.stats["memory_hits"] += len(remembered)
+            result.update(remembered)
+            missing = [key for key in missing if key not in remembered]
+
+        if missing:
+            fresh = self._translate_remote(missing)
+            if fresh and self.memory is not None:
+                self.memory.put_many(self.backend.name, fresh)
+            result.update(fresh)
+
+        for key, value in result.items():
+            self.cache.put(key, value)
+        self.fallback_keys.difference_update(result)
+        if self.fallback is not None:
+            # Texts whose batch failed are translated locally but not remembered
+            for key in unique:
+                if key not in result:
+                    result[key] = self.fallback(key)
+                    self.fallback_keys.add(key)
+        return result
+
+    def translate(self, text: str) -> str:
+        """Translate a single text through the same cache layers"""
+        return self.translate_many([text]).get(normalize_text(text), "")
+
+    def _translate_remote(self, texts: List[str]) -> Dict[str, str]:
+        batches = [texts[start:start + self.batch_size] for start in range(0, len(texts), self.batch_size)]
+        fresh: Dict[str, str] = {}
+        errors = []
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            futures = {executor.submit(self.backend.translate_batch, batch): batch for batch in batches}
+            for future in concurrent.futures.as_completed(futures):
+                batch = futures[future]
+                self.stats["backend_calls"] += 1
+                try:
+                    fresh.update(zip(batch, future.result()))
+                    self.stats["backend_texts"] += len(batch)
+                except TranslationError as e:
+                    errors.append(e)
+                    self.stats["failed"] += len(batch)
+        if errors:
+            print(f"Warning: {len(errors)} of {len(batches)} translation batches failed (first: {errors[0]})")
+        return fresh
+
+    def report(self) -> str:
+        """One-line summary of where translations came from"""
+        s = self.stats
+        return (f"Translations ({self.backend.name}): {s['requested']} requested, {s['unique']} unique, "
+                f"{s['cache_hits']} from cache, {s['memory_hits']} from memory, "
+                f"{s['backend_texts']} from {s['backend_calls']} backend calls"
+                + (f", {s['failed']} failed" if s['failed'] else ""))
+
+    def close(self):
+        if self.memory is not None:
+            self.memory.close()
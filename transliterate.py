@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Table-driven kana <-> romaji transliteration
+The kana and romaji tables are compiled once into longest-match tries, so
+each text is read in a single left-to-right pass; sokuon (っ), the syllabic
+n and long vowels are resolved on the token stream instead of by chains of
+regex replaces. Romaji follows the JLPT API's modified Hepburn: macrons for
+long vowels (がっこう -> gakkō), n' before vowels and y (ほんや -> hon'ya)
+"""
+
+import argparse
+import json
+import re
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+HIRAGANA_ROMAJI = {
+    "あ": "a", "い": "i", "う": "u", "え": "e", "お": "o",
+    "か": "ka", "き": "ki", "く": "ku", "け": "ke", "こ": "ko",
+    "さ": "sa", "し": "shi", "す": "su", "せ": "se", "そ": "so",
+    "た": "ta", "ち": "chi", "つ": "tsu", "て": "te", "と": "to",
+    "な": "na", "に": "ni", "ぬ": "nu", "ね": "ne", "の": "no",
+    "は": "ha", "ひ": "hi", "ふ": "fu", "へ": "he", "ほ": "ho",
+    "ま": "ma", "み": "mi", "む": "mu", "め": "me", "も": "mo",
+    "や": "ya", "ゆ": "yu", "よ": "yo",
+    "ら": "ra", "り": "ri", "る": "ru", "れ": "re", "ろ": "ro",
+    "わ": "wa", "ゐ": "i", "ゑ": "e", "を": "o", "ん": "n",
+    "が": "ga", "ぎ": "gi", "ぐ": "gu", "げ": "ge", "ご": "go",
+    "ざ": "za", "じ": "ji", "ず": "zu", "ぜ": "ze", "ぞ": "zo",
+    "だ": "da", "ぢ": "ji", "づ": "zu", "で": "de", "ど": "do",
+    "ば": "ba", "び": "bi", "ぶ": "bu", "べ": "be", "ぼ": "bo",
+    "ぱ": "pa", "ぴ": "pi", "ぷ": "pu", "ぺ": "pe", "ぽ": "po",
+    "ゔ": "vu",
+    "ぁ": "a", "ぃ": "i", "ぅ": "u", "ぇ": "e", "ぉ": "o",
+    "ゃ": "ya", "ゅ": "yu", "ょ": "yo", "ゎ": "wa",
+    # Combinations used for loanwords (mostly seen in katakana)
+    "ふぁ": "fa", "ふぃ": "fi", "ふぇ": "fe", "ふぉ": "fo",
+    "てぃ": "ti", "でぃ": "di", "とぅ": "tu", "どぅ": "du",
+    "うぃ": "wi", "うぇ": "we", "うぉ": "wo", "いぇ": "ye",
+    "しぇ": "she", "じぇ": "je", "ちぇ": "che", "つぁ": "tsa",
+    "ゔぁ": "va", "ゔぃ": "vi", "ゔぇ": "ve", "ゔぉ": "vo"
+}
+
+# Yōon: i-row kana + small ya/yu/yo
+for _kana, _stem in [("き", "ky"), ("ぎ", "gy"), ("し", "sh"), ("じ", "j"), ("ち", "ch"), ("ぢ", "j"),
+                     ("に", "ny"), ("ひ", "hy"), ("び", "by"), ("ぴ", "py"), ("み", "my"), ("り", "ry")]:
+    for _small, _vowel in [("ゃ", "a"), ("ゅ", "u"), ("ょ", "o")]:
+        HIRAGANA_ROMAJI[_kana + _small] = _stem + _vowel
+
+SOKUON = {"っ", "ッ"}
+CHOONPU = "ー"
+VOWELS = "aeiou"
+MACRONS = {"a": "ā", "i": "ī", "u": "ū", "e": "ē", "o": "ō"}
+# Vowel pairs written with a macron (おう -> ō); ああ, ええ and えい stay as they are
+LONG_VOWELS = {("o", "u"), ("o", "o"), ("u", "u")}
+# Punctuation the API spells in ASCII
+PUNCTUATION = {"・": "-", "（": "(", "）": ")", "。": ".", "、": ",", "　": " "}
+KANA_PUNCTUATION = {"-": "・", ".": "。", ",": "、"}
+MACRON_VOWELS = {macron: vowel for vowel, macron in MACRONS.items()}
+# Hiragana spell a long vowel with a second vowel kana; ō is nearly always おう
+MACRON_HIRAGANA = {"ā": "a", "ī": "i", "ū": "u", "ē": "e", "ō": "u"}
+DOUBLING_CONSONANTS = set("bcdfghjkprstvwz")
+
+def to_katakana(text: str) -> str:
+    """Hiragana -> katakana; other characters are kept"""
+    return "".join(chr(ord(c) + 0x60) if "ぁ" <= c <= "ゖ" else c for c in text)
+
+def to_hiragana(text: str) -> str:
+    """Katakana -> hiragana; other characters (including ー) are kept"""
+    return "".join(chr(ord(c) - 0x60) if "ァ" <= c <= "ヶ" else c for c in text)
+
+def is_kana(text: str) -> bool:
+    """Whether text is written in kana only (separators such as / and spaces allowed)"""
+    has_kana = False
+    for c in text:
+        if "ぁ" <= c <= "ゖ" or "ァ" <= c <= "ヺ" or c == CHOONPU:
+            has_kana = True
+        elif not (c.isspace() or c in "/・,、~〜()（）"):
+            return False
+    return has_kana
+
+class LongestMatch:
+    """
+    A table compiled into a trie; scan() splits text into the longest table
+    entries at each position, passing other characters through unmatched
+    """
+
+    def __init__(self, table: Dict[str, str]):
+        # Node: (children, output or None)
+        self.root: Tuple[Dict[str, Any], Optional[str]] = ({}, None)
+        for source, output in table.items():
+            node = self.root
+            for char in source[:-1]:
+                node = node[0].setdefault(char, ({}, None))
+            last = source[-1]
+            children = node[0].get(last, ({}, None))[0]
+            node[0][last] = (children, output)
+
+    def scan(self, text: str) -> List[Tuple[str, Optional[str]]]:
+        """(source piece, output) tokens; output is None for characters not in the table"""
+        tokens = []
+        root_children = self.root[0]
+        position = 0
+        length = len(text)
+        while position < length:
+            children = root_children
+            match_end, match_output = position + 1, None
+            cursor = position
+            while cursor < length:
+                node = children.get(text[cursor])
+                if node is None:
+                    break
+                cursor += 1
+                children = node[0]
+                if node[1] is not None:
+                    match_end, match_output = cursor, node[1]
+            tokens.append((text[position:match_end], match_output))
+            position = match_end
+        return tokens
+
+class Transliterator:
+    """Kana -> romaji and romaji -> kana over the compiled tables"""
+
+    def __init__(self, table: Dict[str, str] = HIRAGANA_ROMAJI):
+        kana_table = dict(table)
+        kana_table.update({to_katakana(kana): roman for kana, roman in table.items()})
+        self.kana = LongestMatch(kana_table)
+        # First spelling wins, so the table's main kana (お, じ, ず) beat を, ぢ, づ and small kana
+        romaji_table: Dict[str, str] = {}
+        for kana, roman in table.items():
+            if len(kana) > 1 or kana not in "ぁぃぅぇぉゃゅょゎゐゑをぢづ":
+                romaji_table.setdefault(roman, kana)
+        # A bare n is resolved by what follows it (see romaji_to_kana)
+        romaji_table["n'"] = romaji_table.pop("n")
+        self.romaji = LongestMatch(romaji_table)
+
+    def kana_to_romaji(self, text: str) -> str:
+        """Hepburn romaji of a kana text"""
+        out: List[str] = []
+        sokuon = False
+        for piece, roman in self.kana.scan(text):
+            if roman is None:
+                if sokuon:
+                    # Nothing to double: a glottal stop, written as in the API (あっ -> a')
+                    out.append("'")
+                if piece in SOKUON:
+                    sokuon = True
+                    continue
+                if piece == CHOONPU and out and out[-1][-1:] in MACRONS:
+                    out[-1] = out[-1][:-1] + MACRONS[out[-1][-1]]
+                else:
+                    out.append(PUNCTUATION.get(piece, piece))
+                sokuon = False
+                continue
+            if sokuon and roman[0] in VOWELS:
+                out.append("'")
+                sokuon = False
+            previous = out[-1] if out else ""
+            if previous == "n" and roman[0] in VOWELS + "y":
+                out[-1] = "n'"
+            elif piece in "あいうえおアイウエオ" and (previous[-1:], roman) in LONG_VOWELS:
+                out[-1] = previous[:-1] + MACRONS[previous[-1]]
+                sokuon = False
+                continue
+            if sokuon and roman[0] not in VOWELS:
+                roman = ("t" if roman.startswith("ch") else roman[0]) + roman
+            sokuon = False
+            out.append(roman)
+        if sokuon:
+            out.append("'")
+        return "".join(out)
+
+    def romaji_to_kana(self, text: str, katakana: bool = False) -> str:
+        """Kana of a Hepburn romaji text, in hiragana unless katakana is set"""
+        text = text.lower()
+        if katakana:
+            text = "".join(MACRON_VOWELS[c] + CHOONPU if c in MACRON_VOWELS else c for c in text)
+        else:
+            text = "".join(MACRON_VOWELS[c] + MACRON_HIRAGANA[c] if c in MACRON_VOWELS else c for c in text)
+        out: List[str] = []
+        position = 0
+        for piece, kana in self.romaji.scan(text):
+            position += len(piece)
+            if kana is not None:
+                out.append(kana)
+                continue
+            following = text[position:position + 1]
+            if piece == "n" or (piece == "m" and following in ("b", "p", "m")):
+                # Not followed by a vowel or y, or it would have matched na, nya...;
+                # Hepburn writes it m before labials (shimbun, sampo)
+                out.append("ん")
+            elif piece == "'":
+                # n' is matched whole, so this one stands for a sokuon (a' -> あっ)
+                out.append("っ")
+            elif piece in DOUBLING_CONSONANTS and (following == piece or piece + following == "tc"):
+                out.append("っ")
+            else:
+                out.append(KANA_PUNCTUATION.get(piece, piece))
+        result = "".join(out)
+        return to_katakana(result) if katakana else result
+
+    def kana_to_romaji_many(self, texts: Iterable[str]) -> List[str]:
+        """Romaji of many kana texts; repeated texts are transliterated once"""
+        return _memoized(self.kana_to_romaji, texts)
+
+    def romaji_to_kana_many(self, texts: Iterable[str], katakana: bool = False) -> List[str]:
+        """Kana of many romaji texts; repeated texts are transliterated once"""
+        return _memoized(lambda text: self.romaji_to_kana(text, katakana), texts)
+
+def _memoized(convert: Callable[[str], str], texts: Iterable[str]) -> List[str]:
+    memo: Dict[str, str] = {}
+    results = []
+    for text in texts:
+        result = memo.get(text)
+        if result is None:
+            result = memo[text] = convert(text)
+        results.append(result)
+    return results
+
+TRANSLITERATOR = Transliterator()
+
+def kana_to_romaji(text: str) -> str:
+    return TRANSLITERATOR.kana_to_romaji(text)
+
+def romaji_to_kana(text: str, katakana: bool = False) -> str:
+    return TRANSLITERATOR.romaji_to_kana(text, katakana)
+
+_FOLD_VOWELS_RE = re.compile(r"([aeiou])\1|ou")
+_FOLD_DROP_RE = re.compile(r"[^a-z]")
+
+def fold_romaji(text: str) -> str:
+    """
+    Comparison key for romaji spellings of one reading: macrons, doubled
+    vowels and ou all fold to the short vowel, punctuation and spaces go
+    """
+    text = "".join(MACRON_VOWELS.get(c, c) for c in text.lower())
+    return _FOLD_VOWELS_RE.sub(lambda m: m.group(0)[0], _FOLD_DROP_RE.sub("", text))
+
+def readings_agree(kana: str, romaji: str) -> bool:
+    """Whether a kana reading and a romaji spelling describe the same sounds"""
+    return fold_romaji(TRANSLITERATOR.kana_to_romaji(kana)) == fold_romaji(romaji)
+
+def check_file(path: str, kana_field: str = "kana", romaji_field: str = "romaji") -> List[Tuple[int, str, str]]:
+    """(position, kana, romaji) of the words of a vocabulary file whose readings disagree"""
+    with open(path, encoding='utf-8') as f:
+        words = json.load(f)['words']
+    kana = [str(w.get(kana_field, "")) for w in words]
+    romaji = [str(w.get(romaji_field, "")) for w in words]
+    derived = TRANSLITERATOR.kana_to_romaji_many(kana)
+    return [(i, kana[i], romaji[i]) for i in range(len(words))
+            if is_kana(kana[i]) and fold_romaji(derived[i]) != fold_romaji(romaji[i])]
+
+def main():
+    """Transliterate texts, or cross-check a vocabulary file: transliterate.py TEXT... | --check FILE"""
+    parser = argparse.ArgumentParser(description="Kana <-> romaji transliteration")
+    parser.add_argument("texts", nargs="*", help="kana or romaji texts to transliterate")
+    parser.add_argument("--katakana", action="store_true", help="write romaji as katakana instead of hiragana")
+    parser.add_argument("--check", metavar="FILE", default=None,
+                        help="list the words of a vocabulary file whose kana and romaji disagree")
+    args = parser.parse_args()
+    if args.check:
+        mismatches = check_file(args.check)
+        for position, kana, romaji in mismatches:
+            print(f"  {position}: {kana} -> {kana_to_romaji(kana)}, file has {romaji}")
+        print(f"{len(mismatches)} words of {args.check} have kana and romaji that disagree")
+        return
+    for text in args.texts:
+        print(kana_to_romaji(text) if is_kana(text) else romaji_to_kana(text, args.katakana))
+
+if __name__ == "__main__":
+    main()
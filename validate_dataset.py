@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+Quality gate for the generated vocabulary files
+One pass per file checks the schema, duplicate entries, glosses left in
+English, the script of the kana/romaji fields and the level (or category)
+balance, then compares the findings with configurable thresholds
+"""
+
+import argparse
+import json
+import re
+import sys
+import time
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+from convert_jlpt_to_spanish import (LEVEL_DISTRIBUTION, LEVELS, PHRASE_TRANSLATIONS, SYNONYM_MAP,
+                                     WORD_TRANSLATIONS, WORD_TYPE_PATTERNS)
+
+DEFAULT_FILES = [
+    "vocabulario-jlpt-4000.json",
+    "vocabulario-data.json",
+    "vocabulario-data-4000.json",
+    "vocabulario-uchinaguchi.json"
+]
+MAX_EXAMPLES = 5
+
+# Field layout per dataset shape: (string fields, key fields for duplicates,
+# kana field, partition field)
+JLPT_SHAPE = {
+    "strings": ["kanji", "kana", "romaji", "level", "type"],
+    "key": ("kanji", "kana"),
+    "kana": "kana",
+    "partition": "level"
+}
+UCHINAGUCHI_SHAPE = {
+    "strings": ["japanese", "uchinaguchi", "romaji", "category"],
+    "key": ("japanese", "uchinaguchi"),
+    "kana": "uchinaguchi",
+    "partition": "category"
+}
+WORD_TYPES = frozenset(WORD_TYPE_PATTERNS)
+
+DEFAULT_THRESHOLDS = {
+    "max_schema_errors": 0,
+    "max_duplicates": 0,
+    "max_english_ratio": 0.05,      # share of words whose first gloss reads as English
+    "max_kana_errors": 0,
+    "max_level_deviation": 0.05,    # absolute difference from LEVEL_DISTRIBUTION shares
+    "max_category_share": 0.5,      # largest category of a dataset without levels
+    "min_balance_words": 500        # smaller hand-made sets are not balance checked
+}
+
+_TOKEN_RE = re.compile(r"[^\W\d_]+")
+# Hiragana, katakana, the long vowel mark and the punctuation the datasets use
+_KANA_RE = re.compile(r"[ぁ-ゟ゠-ヿー〜～・/,、\s]+")
+_ROMAJI_RE = re.compile(r"[a-zA-ZÀ-ɏ̄'\-/,.\s]+")
+_SPANISH_LETTERS_RE = re.compile(r"[áéíóúñü¿¡]")
+# Spelling that (almost) never occurs in Spanish words: digraphs, suffixes,
+# doubled consonants, y before a consonant and unusual final letters
+_ENGLISH_SPELLING_RE = re.compile(
+    r"th|sh|ck|ph|ee|oo|ou|w|k|rl|tion$|sion$|ions$|ness$|ous$|ful$|ure$|ing$|([bdfgmptz])\1"
+    r"|y(?![aeiouáéíóú])|[bcfgkmptvwx]$")
+
+SPANISH_FUNCTION_WORDS = {
+    "de", "del", "la", "el", "los", "las", "un", "una", "unos", "unas", "en", "por", "para", "con",
+    "sin", "que", "y", "o", "u", "al", "se", "su", "sus", "muy", "más", "menos", "es", "ser",
+    "estar", "lo", "le", "les", "mi", "tu", "algo", "alguien", "hacia", "entre", "sobre", "hasta",
+    "hoy", "hay", "ley", "rey", "soy", "voy", "doy", "estoy"
+}
+ENGLISH_FUNCTION_WORDS = {
+    "the", "of", "and", "to", "for", "with", "on", "in", "at", "by", "from", "up", "off", "out",
+    "over", "into", "be", "is", "are", "it", "its", "one", "one's", "someone", "something",
+    "oneself", "this", "that", "these", "those", "or", "but", "not", "as", "an", "get", "make",
+    "take", "have", "do", "very", "etc", "who", "what", "which", "when", "where", "why", "how"
+}
+
+def _tokens(texts) -> FrozenSet[str]:
+    return frozenset(token for text in texts for token in _TOKEN_RE.findall(text.lower()))
+
+def build_lexicons() -> Tuple[FrozenSet[str], FrozenSet[str]]:
+    """English and Spanish word sets from the converter's tables; words in both count as neither"""
+    spanish = _tokens(WORD_TRANSLATIONS.values()) | _tokens(replacement for _, replacement in PHRASE_TRANSLATIONS)
+    spanish |= _tokens(SYNONYM_MAP) | _tokens(s for synonyms in SYNONYM_MAP.values() for s in synonyms)
+    spanish |= SPANISH_FUNCTION_WORDS
+    english = _tokens(WORD_TRANSLATIONS) | _tokens(phrase for phrase, _ in PHRASE_TRANSLATIONS)
+    english |= ENGLISH_FUNCTION_WORDS
+    return frozenset(english - spanish), frozenset(spanish - english)
+
+ENGLISH_WORDS, SPANISH_WORDS = build_lexicons()
+
+def is_english(text: str) -> bool:
+    """Whether a gloss reads as untranslated English rather than Spanish"""
+    english = spanish = 0
+    for token in _TOKEN_RE.findall(text):
+        if token[0].isupper():
+            # Proper nouns (Okinawa, Shuri) are the same in both languages
+            continue
+        token = token.lower()
+        if token in SPANISH_WORDS or _SPANISH_LETTERS_RE.search(token):
+            spanish += 1
+        elif token in ENGLISH_WORDS or _ENGLISH_SPELLING_RE.search(token):
+            english += 1
+    return english > spanish
+
+def shape_for(words: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Field layout matching a dataset's word shape"""
+    if words and 'uchinaguchi' in words[0]:
+        return UCHINAGUCHI_SHAPE
+    return JLPT_SHAPE
+
+class ValidationReport:
+    """Findings for one dataset file"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.words = 0
+        self.issues: Dict[str, int] = {}
+        self.examples: Dict[str, List[str]] = {}
+        self.partitions: Dict[str, int] = {}
+        self.english_words = 0
+        self.failures: List[str] = []
+        self.seconds = 0.0
+
+    def add(self, issue: str, example: str):
+        """Record one problem of a kind, keeping the first few examples"""
+        self.issues[issue] = self.issues.get(issue, 0) + 1
+        examples = self.examples.setdefault(issue, [])
+        if len(examples) < MAX_EXAMPLES:
+            examples.append(example)
+
+    def count(self, *issues: str) -> int:
+        """Total findings of the given kinds"""
+        return sum(self.issues.get(issue, 0) for issue in issues)
+
+    @property
+    def english_ratio(self) -> float:
+        return self.english_words / self.words if self.words else 0.0
+
+    @property
+    def ok(self) -> bool:
+        return not self.failures
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "path": self.path,
+            "words": self.words,
+            "ok": self.ok,
+            "failures": self.failures,
+            "issues": self.issues,
+            "examples": self.examples,
+            "english_ratio": self.english_ratio,
+            "partitions": self.partitions,
+            "milliseconds": self.seconds * 1000
+        }
+
+def validate_words(data: Dict[str, Any], path: str = "",
+                   thresholds: Optional[Dict[str, float]] = None) -> ValidationReport:
+    """Check one loaded dataset in a single pass over its words"""
+    thresholds = {**DEFAULT_THRESHOLDS, **(thresholds or {})}
+    report = ValidationReport(path)
+    start = time.perf_counter()
+
+    words = data.get('words')
+    if not isinstance(words, list):
+        report.add("schema", "top-level 'words' list is missing")
+        words = []
+    shape = shape_for(words)
+    string_fields = shape["strings"]
+    key_fields = shape["key"]
+    kana_field = shape["kana"]
+    partition_field = shape["partition"]
+    jlpt = partition_field == "level"
+    levels = frozenset(LEVELS)
+
+    seen = set()
+    partitions = report.partitions
+    for i, word in enumerate(words):
+        if not isinstance(word, dict):
+            report.add("schema", f"#{i}: not an object")
+            continue
+        label = f"#{i} {word.get(key_fields[0], '')}"
+
+        for field in string_fields:
+            value = word.get(field)
+            if not isinstance(value, str) or not value:
+                report.add("schema", f"{label}: missing or empty {field}")
+        glosses = word.get('español')
+        if not isinstance(glosses, list) or not glosses or not all(isinstance(g, str) and g for g in glosses):
+            report.add("schema", f"{label}: español must be a non-empty list of strings")
+            glosses = None
+        if jlpt:
+            if word.get('level') not in levels:
+                report.add("schema", f"{label}: unknown level {word.get('level')!r}")
+            if word.get('type') not in WORD_TYPES:
+                report.add("schema", f"{label}: unknown type {word.get('type')!r}")
+
+        key = tuple(word.get(field) for field in key_fields)
+        if key in seen:
+            report.add("duplicate", f"{label}: {' / '.join(map(str, key))}")
+        else:
+            seen.add(key)
+
+        if glosses is not None and is_english(glosses[0]):
+            report.english_words += 1
+            report.add("english", f"{label}: {glosses[0]}")
+
+        kana = word.get(kana_field)
+        if isinstance(kana, str) and kana and not _KANA_RE.fullmatch(kana):
+            report.add("kana", f"{label}: {kana_field} {kana!r} is not kana")
+        romaji = word.get('romaji')
+        if isinstance(romaji, str) and romaji and not _ROMAJI_RE.fullmatch(romaji):
+            report.add("romaji", f"{label}: romaji {romaji!r} is not Latin script")
+
+        partition = str(word.get(partition_field, ""))
+        partitions[partition] = partitions.get(partition, 0) + 1
+
+    report.words = len(words)
+    declared = data.get('metadata', {}).get('total_words')
+    if declared is not None and declared != report.words:
+        report.add("metadata", f"metadata.total_words is {declared}, file has {report.words} words")
+
+    check_thresholds(report, thresholds, jlpt)
+    report.seconds = time.perf_counter() - start
+    return report
+
+def check_thresholds(report: ValidationReport, thresholds: Dict[str, float], jlpt: bool):
+    """Turn findings into failures according to the thresholds"""
+    failures = report.failures
+    schema_errors = report.count("schema", "metadata")
+    if schema_errors > thresholds["max_schema_errors"]:
+        failures.append(f"{schema_errors} schema errors (max {thresholds['max_schema_errors']})")
+    duplicates = report.count("duplicate")
+    if duplicates > thresholds["max_duplicates"]:
+        failures.append(f"{duplicates} duplicate entries (max {thresholds['max_duplicates']})")
+    if report.english_ratio > thresholds["max_english_ratio"]:
+        failures.append(f"{report.english_ratio:.1%} of words left in English"
+                        f" (max {thresholds['max_english_ratio']:.1%})")
+    kana_errors = report.count("kana", "romaji")
+    if kana_errors > thresholds["max_kana_errors"]:
+        failures.append(f"{kana_errors} kana/romaji script errors (max {thresholds['max_kana_errors']})")
+
+    if report.words < thresholds["min_balance_words"]:
+        return
+    if jlpt:
+        expected_total = sum(LEVEL_DISTRIBUTION.values())
+        for level in LEVELS:
+            share = report.partitions.get(level, 0) / report.words
+            expected = LEVEL_DISTRIBUTION[level] / expected_total
+            if abs(share - expected) > thresholds["max_level_deviation"]:
+                failures.append(f"{level} is {share:.1%} of the words, expected {expected:.1%}"
+                                f" ± {thresholds['max_level_deviation']:.1%}")
+    else:
+        category, size = max(report.partitions.items(), key=lambda item: item[1])
+        if size / report.words > thresholds["max_category_share"]:
+            failures.append(f"category {category} holds {size / report.words:.1%} of the words"
+                            f" (max {thresholds['max_category_share']:.1%})")
+
+def validate_file(path: str, thresholds: Optional[Dict[str, float]] = None) -> ValidationReport:
+    """Load and check one dataset file"""
+    try:
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        report = ValidationReport(path)
+        report.add("schema", f"cannot read file: {e}")
+        report.failures.append(f"cannot read file: {e}")
+        return report
+    return validate_words(data, path, thresholds)
+
+def print_report(report: ValidationReport, verbose: bool = False):
+    """Human-readable summary of one report"""
+    status = "ok" if report.ok else "FAILED"
+    print(f"{report.path}: {status} ({report.words} words, {report.seconds * 1000:.1f} ms)")
+    for issue, count in sorted(report.issues.items()):
+        print(f"  {issue}: {count}")
+        if verbose:
+            for example in report.examples[issue]:
+                print(f"    {example}")
+    for failure in report.failures:
+        print(f"  ✗ {failure}")
+
+def parse_args(argv=None) -> argparse.Namespace:
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Validate vocabulary dataset files")
+    parser.add_argument("files", nargs="*", default=DEFAULT_FILES,
+                        help="dataset files (default: the bundled vocabulary files)")
+    for name, value in DEFAULT_THRESHOLDS.items():
+        parser.add_argument("--" + name.replace("_", "-"), type=type(value), default=value,
+                            help=f"default: {value}")
+    parser.add_argument("--json", metavar="PATH", default=None, help="also write the reports as JSON")
+    parser.add_argument("--verbose", "-v", action="store_true", help="show example entries for each issue")
+    return parser.parse_args(argv)
+
+def main(argv=None) -> int:
+    """Validate files and return a non-zero exit status when any fails"""
+    args = parse_args(argv)
+    thresholds = {name: getattr(args, name) for name in DEFAULT_THRESHOLDS}
+    reports = [validate_file(path, thresholds) for path in args.files]
+    for report in reports:
+        print_report(report, args.verbose)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump([report.to_dict() for report in reports], f, ensure_ascii=False, indent=2)
+    failed = [report.path for report in reports if not report.ok]
+    if failed:
+        print(f"Validation failed for {len(failed)} of {len(reports)} files")
+        return 1
+    print(f"All {len(reports)} files passed")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())